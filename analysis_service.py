@@ -0,0 +1,407 @@
+"""
+Serviço local de análise.
+Servidor HTTP assíncrono (asyncio, sem dependências externas) que recebe
+extratos em PDF e catálogos de produtos e devolve as transações extraídas e a
+análise CVP. O trabalho pesado roda em um pool de processos de tamanho fixo,
+alimentado por uma fila de jobs com limite de profundidade: cada envio recebe
+um ID e o cliente consulta o status até o job terminar. Assim, várias sessões
+do Streamlit enviando extratos grandes não bloqueiam umas às outras.
+
+Endpoints:
+    POST /statements?name=extrato.pdf   corpo: bytes do PDF      -> 202 {job}
+    POST /cvp                           corpo: JSON {products, fixed_costs, tax_rate} -> 202 {job}
+    GET  /jobs/<id>                     status do job (e o resultado, quando concluído)
+    GET  /status                        workers, fila, jobs em execução e contadores
+
+Uso:
+    python analysis_service.py --port 8765 --workers 2 --max-queue 16
+    ANALYSIS_SERVICE_URL=http://127.0.0.1:8765 streamlit run app_melhorado_final.py
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import signal
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Dict, List, Optional
+
+from cash_flow_analyzer import _extract_statement
+from financial_analysis import FinancialAnalyzer
+from report_writers import json_safe
+from statement_cache import StatementCache
+
+FINISHED_STATUSES = ('done', 'failed')
+DEFAULT_PORT = 8765
+# Tamanho máximo do corpo de uma requisição (um extrato em PDF)
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Jobs concluídos mantidos para consulta; os mais antigos são descartados
+MAX_FINISHED_JOBS = 256
+
+
+def _cvp_job(payload: Dict) -> Dict:
+    # Executado nos processos do pool
+    analyzer = FinancialAnalyzer(payload['products'], float(payload.get('fixed_costs', 0.0)),
+                                 float(payload.get('tax_rate', 0.0)))
+    return {
+        'cvp': analyzer.get_cost_volume_profit_analysis(),
+        'contribution_margin': analyzer.get_contribution_margin_analysis().to_dict(orient='records')
+    }
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _cvp_payload_error(payload) -> Optional[str]:
+    """Mensagem de erro para um corpo de /cvp inválido, ou None se ele estiver correto"""
+    if not isinstance(payload, dict):
+        return 'O corpo deve ser um objeto JSON {products, fixed_costs, tax_rate}'
+    products = payload.get('products')
+    if not isinstance(products, list) or not products:
+        return 'Informe a lista de produtos'
+    for index, product in enumerate(products):
+        if not isinstance(product, dict) or 'name' not in product:
+            return f'Produto {index}: informe um objeto com name, price, cost e quantity'
+        invalid = [column for column in ('price', 'cost', 'quantity') if not _is_number(product.get(column))]
+        if invalid:
+            return f"Produto {index} ({product['name']}): valores não numéricos em {', '.join(invalid)}"
+    invalid = [key for key in ('fixed_costs', 'tax_rate') if key in payload and not _is_number(payload[key])]
+    if invalid:
+        return f"Valores não numéricos em {', '.join(invalid)}"
+    return None
+
+
+def _run_job(kind: str, payload):
+    # Ponto de entrada dos processos do pool: devolve (resultado, erro)
+    if kind == 'statement':
+        return _extract_statement(payload)
+    try:
+        return _cvp_job(payload), None
+    except Exception as e:
+        return None, str(e)
+
+
+@dataclass
+class Job:
+    """Um pedido de análise e seu andamento"""
+    id: str
+    kind: str
+    name: str = ''
+    status: str = 'queued'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cached: bool = False
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        job = {
+            'id': self.id,
+            'kind': self.kind,
+            'name': self.name,
+            'status': self.status,
+            'cached': self.cached,
+            'queued_seconds': (self.started_at or time.time()) - self.submitted_at,
+            'seconds': self.seconds,
+            'error': self.error
+        }
+        if include_result and self.status == 'done':
+            job['result'] = self.result
+        return job
+
+
+class AnalysisService:
+    """Fila de jobs atendida por um pool de processos de tamanho fixo"""
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, cache: StatementCache = None):
+        """
+        Args:
+            workers: Processos do pool (jobs executados ao mesmo tempo)
+            max_queue: Jobs aguardando na fila; além disso os envios são recusados
+            cache: Cache de extratos já processados, indexado pelo conteúdo do PDF
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.cache = cache
+        self.jobs: Dict[str, Job] = OrderedDict()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.time()
+        self._queue = None
+        self._executor = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # Os processos ignoram Ctrl+C: quem encerra o pool é o processo principal
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=signal.signal,
+                                             initargs=(signal.SIGINT, signal.SIG_IGN))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind: str, payload, name: str = '') -> Job:
+        """
+        Enfileira um job
+
+        Returns:
+            O job criado; com a fila cheia, o job volta com status 'rejected'
+        """
+        job = Job(id=uuid.uuid4().hex, kind=kind, name=name)
+        key = StatementCache.key_for(payload) if kind == 'statement' and self.cache is not None else None
+        columns = self.cache.get(key) if key is not None else None
+        if columns is not None:
+            job.started_at = job.finished_at = time.time()
+            job.status, job.cached, job.result = 'done', True, columns
+            self.completed += 1
+        elif self._queue.full():
+            job.status, job.error = 'rejected', f'Fila cheia ({self.max_queue} jobs aguardando)'
+            self.rejected += 1
+            return job
+        else:
+            self._queue.put_nowait((job, payload, key))
+        self._remember(job)
+        return job
+
+    def _remember(self, job: Job):
+        self.jobs[job.id] = job
+        finished = [job_id for job_id, known in self.jobs.items() if known.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, payload, key = await self._queue.get()
+            job.status, job.started_at = 'running', time.time()
+            self.running += 1
+            try:
+                result, error = await loop.run_in_executor(self._executor, _run_job, job.kind, payload)
+            except Exception as e:
+                result, error = None, str(e) or type(e).__name__
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+            job.finished_at = time.time()
+            self.busy_seconds += job.seconds
+            if error is None:
+                job.status, job.result = 'done', result
+                self.completed += 1
+                if key is not None:
+                    self.cache.put(key, result)
+            else:
+                job.status, job.error = 'failed', error
+                self.failed += 1
+
+    def status(self) -> Dict:
+        """Limites configurados, ocupação atual e contadores desde o início"""
+        finished = self.completed + self.failed
+        status = {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'mean_job_seconds': self.busy_seconds / finished if finished else 0.0,
+            'uptime_seconds': time.time() - self.started_at
+        }
+        if self.cache is not None:
+            status['cache'] = self.cache.stats()
+        return status
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma requisição HTTP/1.1 (uma por conexão)"""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return await _respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'Requisição inválida'})
+            length = int(headers.get('content-length', 0) or 0)
+            if length > MAX_BODY_BYTES:
+                return await _respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                      {'error': f'Corpo maior que {MAX_BODY_BYTES} bytes'})
+            body = await reader.readexactly(length) if length else b''
+            status, response = self._route(request_line[0].upper(), request_line[1], body)
+            await _respond(writer, status, response)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            await _respond_safely(writer, HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            # Erro inesperado: responde 500 em vez de fechar a conexão sem resposta
+            print(f"Erro ao atender requisição: {type(e).__name__}: {e}", file=sys.stderr)
+            await _respond_safely(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                  {'error': f'Erro interno: {type(e).__name__}: {e}'})
+        finally:
+            writer.close()
+
+    def _route(self, method: str, target: str, body: bytes):
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        path = url.path.rstrip('/')
+        if method == 'GET' and path == '/status':
+            return HTTPStatus.OK, self.status()
+        if method == 'GET' and path.startswith('/jobs/'):
+            job = self.jobs.get(path[len('/jobs/'):])
+            if job is None:
+                return HTTPStatus.NOT_FOUND, {'error': 'Job não encontrado'}
+            return HTTPStatus.OK, job.to_dict()
+        if method == 'POST' and path == '/statements':
+            if not body:
+                return HTTPStatus.BAD_REQUEST, {'error': 'Envie os bytes do PDF no corpo da requisição'}
+            job = self.submit('statement', body, name=query.get('name', [''])[0])
+        elif method == 'POST' and path == '/cvp':
+            payload = json.loads(body or b'{}')
+            error = _cvp_payload_error(payload)
+            if error is not None:
+                return HTTPStatus.BAD_REQUEST, {'error': error}
+            job = self.submit('cvp', payload, name=str(payload.get('name', '')))
+        else:
+            return HTTPStatus.NOT_FOUND, {'error': f'Rota não encontrada: {method} {url.path}'}
+        if job.status == 'rejected':
+            return HTTPStatus.SERVICE_UNAVAILABLE, job.to_dict(include_result=False)
+        return HTTPStatus.ACCEPTED, job.to_dict(include_result=job.cached)
+
+
+async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, body: Dict):
+    # JSON estrito: floats não finitos (ex.: alavancagem infinita) vão como null
+    data = json.dumps(json_safe(body), ensure_ascii=False, allow_nan=False, default=str).encode('utf-8')
+    head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(data)}\r\nConnection: close\r\n\r\n')
+    writer.write(head.encode('latin-1') + data)
+    await writer.drain()
+
+
+async def _respond_safely(writer: asyncio.StreamWriter, status: HTTPStatus, body: Dict):
+    # Resposta de erro; o cliente pode já ter desconectado
+    try:
+        await _respond(writer, status, body)
+    except ConnectionError:
+        pass
+
+
+async def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, workers: int = 2, max_queue: int = 16,
+                cache_dir: Optional[str] = None):
+    """Sobe o serviço e atende requisições até ser interrompido"""
+    service = AnalysisService(workers, max_queue, StatementCache(cache_dir=cache_dir))
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serviço de análise em http://{host}:{port} "
+          f"({workers} worker(s), fila de até {max_queue} jobs)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+class AnalysisServiceClient:
+    """Cliente do serviço para o aplicativo Streamlit (apenas biblioteca padrão)"""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, data: bytes = None, content_type: str = None) -> Dict:
+        # Respostas de erro do serviço (fila cheia, job inexistente) voltam como {'error': ...};
+        # falhas de conexão propagam OSError para o chamador decidir o que fazer
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                return json.loads(e.read())
+            except ValueError:
+                return {'error': f'HTTP {e.code}: {e.reason}'}
+        except (http.client.HTTPException, ValueError) as e:
+            # Conexão interrompida no meio da resposta: tratada como as demais falhas de conexão
+            raise ConnectionError(f'Resposta incompleta do serviço: {e}') from e
+
+    def status(self) -> Dict:
+        return self._request('GET', '/status')
+
+    def job(self, job_id: str) -> Dict:
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def submit_statement(self, data: bytes, name: str = '') -> Dict:
+        """Envia um extrato em PDF; devolve o job (com 'error' se a fila estiver cheia)"""
+        query = urllib.parse.urlencode({'name': name})
+        return self._request('POST', f'/statements?{query}', data, 'application/pdf')
+
+    def submit_cvp(self, products: List[Dict], fixed_costs: float, tax_rate: float = 0.0) -> Dict:
+        payload = {'products': products, 'fixed_costs': fixed_costs, 'tax_rate': tax_rate}
+        return self._request('POST', '/cvp', json.dumps(json_safe(payload), allow_nan=False).encode('utf-8'),
+                             'application/json')
+
+    def wait(self, job_id: str, poll_interval: float = 0.25, timeout: float = 600.0) -> Dict:
+        """
+        Consulta o job até ele terminar
+
+        Returns:
+            O job concluído ('done' com 'result', ou 'failed' com 'error'); se o
+            prazo acabar, o último status recebido, com 'error'
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.job(job_id)
+            if job.get('status') in FINISHED_STATUSES or 'status' not in job:
+                return job
+            if time.monotonic() >= deadline:
+                return {**job, 'error': f'Job não concluído em {timeout:.0f} s'}
+            time.sleep(poll_interval)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Serviço local de análise CVP e de extratos em PDF')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='Processos para os jobs (padrão: número de CPUs menos um)')
+    parser.add_argument('--max-queue', type=int, default=16,
+                        help='Jobs aguardando na fila antes de recusar novos envios')
+    parser.add_argument('--cache-dir', default=None, help='Diretório do cache de extratos em disco')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue, args.cache_dir))
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
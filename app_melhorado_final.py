@@ -1,14 +1,33 @@
+import time
+# Início da execução, antes das importações, para medir o tempo de inicialização
+SCRIPT_START = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+# plotly (charts) e pdfminer (cash_flow_analyzer) são importados só no primeiro uso
+import charts
+import instrumentation
 from financial_analysis import FinancialAnalyzer
+from risk_simulation import MonteCarloRiskAnalyzer
+from combo_search import ComboSearchEngine
 from cash_flow_analyzer import CashFlowAnalyzer
+from analysis_service import AnalysisServiceClient
+from cash_flow_forecast import CashFlowForecaster
+from transaction_store import TransactionStore
+from statement_cache import StatementCache
+from product_loader import load_products
+from report_writers import (
+    report_file, write_financial_report, write_cash_flow_report, write_tables_csv, write_tables_xlsx,
+    financial_report_tables, cash_flow_report_tables
+)
 import io
+import json
+import os
 from datetime import datetime
 
+IMPORT_SECONDS = time.perf_counter() - SCRIPT_START
+
 # Configuração da página
 st.set_page_config(
     page_title="Análise de Precificação e Lucratividade",
@@ -17,6 +36,13 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentação das etapas nesta reexecução (ligada no painel de diagnóstico, no rodapé)
+if st.session_state.get('diagnostics_enabled', False):
+    diagnostics_recorder = instrumentation.start(profile=st.session_state.get('diagnostics_profile', False))
+else:
+    diagnostics_recorder = None
+    instrumentation.disable()
+
 # CSS customizado
 st.markdown("""
 <style>
@@ -53,126 +79,127 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Função para gerar relatório em PDF
-def generate_report(analyzer, cvp_analysis, contribution_analysis):
-    """Gera relatório em formato texto para download"""
-    report = f"""
-RELATÓRIO DE ANÁLISE FINANCEIRA - CAFETERIA
-Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-{'='*60}
-
-RESUMO EXECUTIVO
-{'='*60}
-• Receita Total: R$ {cvp_analysis['total_revenue']:,.2f}
-• Margem de Contribuição Total: R$ {cvp_analysis['total_contribution']:,.2f}
-• Custos Fixos: R$ {cvp_analysis['fixed_costs']:,.2f}
-• Lucro Líquido: R$ {cvp_analysis['net_profit']:,.2f}
-• Margem de Contribuição (%): {cvp_analysis['contribution_margin_ratio']:.1f}%
-
-ANÁLISE POR PRODUTO
-{'='*60}
-"""
-    
-    for _, product in contribution_analysis.iterrows():
-        report += f"""
-{product['name']}:
-  - Preço: R$ {product['price']:.2f}
-  - Custo Variável: R$ {product['cost']:.2f}
-  - Margem de Contribuição: R$ {product['contribution_margin']:.2f} ({product['contribution_margin_percent']:.1f}%)
-  - Quantidade Vendida: {product['quantity']} unidades
-  - Contribuição Total: R$ {product['total_contribution']:.2f}
-  - Participação na Receita: {product['revenue_participation']:.1f}%
-  - Participação na Contribuição: {product['contribution_participation']:.1f}%
-"""
-
-    report += f"""
-
-ANÁLISE CUSTO-VOLUME-LUCRO
-{'='*60}
-• Ponto de Equilíbrio (unidades): {cvp_analysis['breakeven_units']:,.0f}
-• Ponto de Equilíbrio (receita): R$ {cvp_analysis['breakeven_revenue']:,.2f}
-• Margem de Segurança (unidades): {cvp_analysis['safety_margin_units']:,.0f}
-• Margem de Segurança (%): {cvp_analysis['safety_margin_percent']:.1f}%
-• Alavancagem Operacional: {cvp_analysis['operating_leverage']:.2f}
-• Razão Margem de Contribuição: {cvp_analysis['contribution_margin_ratio']:.1f}%
-
-RECOMENDAÇÕES ESTRATÉGICAS
-{'='*60}
-"""
-    
-    optimization = analyzer.analyze_product_mix_optimization()
-    
-    report += "\nPRODUTOS COM MAIOR MARGEM:\n"
-    for product in optimization['high_margin_products']:
-        report += f"• {product['name']}: {product['contribution_margin_percent']:.1f}% de margem\n"
-    
-    report += "\nPRODUTOS COM MENOR MARGEM:\n"
-    for product in optimization['low_margin_products']:
-        report += f"• {product['name']}: {product['contribution_margin_percent']:.1f}% de margem\n"
-    
-    report += "\nMAIORES CONTRIBUIDORES:\n"
-    for product in optimization['high_contribution_products']:
-        report += f"• {product['name']}: R$ {product['total_contribution']:.2f}\n"
-    
-    report += f"""
-
-CONCLUSÕES E PRÓXIMOS PASSOS
-{'='*60}
-1. Foque nos produtos de maior margem para aumentar lucratividade
-2. Revise preços ou custos dos produtos de menor margem
-3. Considere criar combos estratégicos
-4. Monitore regularmente o ponto de equilíbrio
-5. Analise oportunidades de aumento de volume nos produtos mais lucrativos
-
-Relatório gerado automaticamente pelo Sistema de Análise de Precificação e Lucratividade
-"""
+# Banco local com o histórico de transações dos extratos
+CASH_FLOW_DB_PATH = "transacoes.db"
+# Cache em disco dos extratos já processados
+STATEMENT_CACHE_DIR = ".cache_extratos"
+
+@st.cache_resource
+def get_transaction_store():
+    """Abre o banco de transações uma única vez por processo do Streamlit"""
+    return TransactionStore(CASH_FLOW_DB_PATH)
+
+@st.cache_resource
+def get_statement_cache():
+    """Cache de extratos compartilhado entre as reexecuções do script"""
+    return StatementCache(cache_dir=STATEMENT_CACHE_DIR)
+
+@st.cache_resource
+def get_analysis_client():
+    """Cliente do analysis_service, se ANALYSIS_SERVICE_URL estiver definida (senão, extração no próprio app)"""
+    url = os.environ.get("ANALYSIS_SERVICE_URL")
+    return AnalysisServiceClient(url) if url else None
+
+def parse_with_service(client, cash_flow_analyzer, uploaded_pdfs):
+    """
+    Envia os extratos ao serviço e aguarda os jobs, sem ocupar a CPU desta sessão
+
+    Os IDs ficam na sessão, indexados pelo conteúdo do PDF, para que as
+    reexecuções do script acompanhem os mesmos jobs em vez de reenviar os arquivos.
+    Se o serviço cair no meio do caminho, os extratos são processados nesta sessão.
+    """
+    start = time.perf_counter()
+    jobs = st.session_state.setdefault('statement_jobs', {})
+    submitted, errors, parsed = [], {}, []
+    progress = st.progress(0.0, text="Aguardando o serviço de análise...")
+    try:
+        for uploaded_pdf in uploaded_pdfs:
+            data = uploaded_pdf.getvalue()
+            key = StatementCache.key_for(data)
+            if key not in jobs:
+                job = client.submit_statement(data, uploaded_pdf.name)
+                if 'id' not in job or job.get('status') == 'rejected':
+                    errors[uploaded_pdf.name] = job.get('error')
+                    continue
+                jobs[key] = job['id']
+            submitted.append((uploaded_pdf.name, key))
+
+        for position, (name, key) in enumerate(submitted, start=1):
+            job = client.wait(jobs[key])
+            if job.get('status') != 'done':
+                # Job com erro ou descartado pelo serviço: um novo envio será feito na próxima execução
+                jobs.pop(key, None)
+                errors[name] = job.get('error')
+            else:
+                parsed.append((name, job['result']))
+            progress.progress(position / len(submitted), text=f"{position}/{len(submitted)} extrato(s) concluído(s)")
+    except OSError as e:
+        # Inclui ConnectionError: nada foi juntado ao analisador ainda, então todos os extratos são refeitos aqui
+        st.warning(f"⚠️ Conexão com o serviço de análise perdida ({e}); processando os extratos nesta sessão.")
+        st.session_state['statement_jobs'] = {}
+        return cash_flow_analyzer.parse_statements(uploaded_pdfs)
+    finally:
+        progress.empty()
+    return cash_flow_analyzer.add_parsed_statements(parsed, start, errors)
+
+@st.cache_data(show_spinner=False)
+def load_uploaded_products(data, file_name):
+    """Lê a planilha enviada uma única vez por conteúdo de arquivo"""
+    return load_products(io.BytesIO(data), filename=file_name)
+
+@st.cache_resource
+def get_startup_timing():
+    """Tempos de inicialização da primeira execução do script neste processo"""
+    return {}
+
+# Mantém o analisador financeiro entre reexecuções e aplica só o que mudou
+def get_financial_analyzer(product_data, fixed_costs, tax_rate):
+    """Reaproveita o FinancialAnalyzer da sessão, atualizando apenas produtos alterados"""
+    cached = st.session_state.get('financial_analyzer')
+    if isinstance(product_data, pd.DataFrame):
+        # Planilha carregada: reaproveita o analisador enquanto os produtos forem os mesmos
+        same_products = (
+            cached is not None
+            and isinstance(cached["products"], pd.DataFrame)
+            and cached["products"].equals(product_data)
+        )
+        if same_products:
+            analyzer = cached["analyzer"]
+            if analyzer.tax_rate != tax_rate:
+                analyzer.tax_rate = tax_rate
+            if analyzer.fixed_costs != fixed_costs:
+                analyzer.fixed_costs = fixed_costs
+        else:
+            analyzer = FinancialAnalyzer(product_data, fixed_costs, tax_rate)
+        st.session_state.financial_analyzer = {"analyzer": analyzer, "products": product_data}
+        return analyzer
     
-    return report
-
-# Função para gerar relatório de fluxo de caixa
-def generate_cash_flow_report(analyzer):
-    report = f"""
-RELATÓRIO DE ANÁLISE DE FLUXO DE CAIXA
-Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-{'='*60}
-
-RESUMO MENSAL
-{'='*60}
-"""
-    monthly_summary = analyzer.get_monthly_summary()
-    for _, row in monthly_summary.iterrows():
-        report += f"Mês/Ano: {row['Month']}/{row['Year']}\n"
-        report += f"  - Entradas: R$ {row['Total Inflow']:.2f}\n"
-        report += f"  - Saídas: R$ {row['Total Outflow']:.2f}\n"
-        report += f"  - Saldo: R$ {row['Net Flow']:.2f}\n\n"
-
-    report += f"""
-DETALHAMENTO DE ENTRADAS POR CATEGORIA
-{'='*60}
-"""
-    inflow_categories = analyzer.get_category_summary("Inflow")
-    for _, row in inflow_categories.iterrows():
-        report += f"- {row['Category']}: R$ {row['Total Amount']:.2f}\n"
-
-    report += f"""
-
-DETALHAMENTO DE SAÍDAS POR CATEGORIA
-{'='*60}
-"""
-    outflow_categories = analyzer.get_category_summary("Outflow")
-    for _, row in outflow_categories.iterrows():
-        report += f"- {row['Category']}: R$ {row['Total Amount']:.2f}\n"
-
-    report += f"""
-
-TRANSAÇÕES INDIVIDUAIS
-{'='*60}
-"""
-    all_transactions = analyzer.get_all_transactions()
-    for _, row in all_transactions.iterrows():
-        report += f"{row['Date'].strftime('%d/%m/%Y')} - {row['Description']} - R$ {row['Amount']:.2f} ({row['Category']})\n"
-
-    return report
+    names = [product["name"] for product in product_data]
+    can_patch = (
+        cached is not None
+        and isinstance(cached["products"], list)
+        and [product["name"] for product in cached["products"]] == names
+        and len(set(names)) == len(names)
+    )
+    if not can_patch:
+        analyzer = FinancialAnalyzer(product_data, fixed_costs, tax_rate)
+    else:
+        analyzer = cached["analyzer"]
+        for old_product, new_product in zip(cached["products"], product_data):
+            if old_product != new_product:
+                analyzer.update_product(
+                    new_product["name"], price=new_product["price"],
+                    cost=new_product["cost"], quantity=new_product["quantity"]
+                )
+        if analyzer.tax_rate != tax_rate:
+            analyzer.tax_rate = tax_rate
+        if analyzer.fixed_costs != fixed_costs:
+            analyzer.fixed_costs = fixed_costs
+    st.session_state.financial_analyzer = {
+        "analyzer": analyzer,
+        "products": [dict(product) for product in product_data]
+    }
+    return analyzer
 
 # Título principal
 st.title("☕ Análise de Precificação e Lucratividade da Cafeteria")
@@ -213,23 +240,16 @@ use_uploaded_data = False
 
 if uploaded_file is not None:
     try:
-        if uploaded_file.name.endswith('.csv'):
-            df_upload = pd.read_csv(uploaded_file)
-        else:
-            df_upload = pd.read_excel(uploaded_file)
-        
-        # Verificar se as colunas necessárias existem
-        required_columns = ['Nome do Produto', 'Preço de Venda (R$)', 'Custo Variável (R$)', 'Quantidade Vendida (mês)']
-        if all(col in df_upload.columns for col in required_columns):
-            for _, row in df_upload.iterrows():
-                product_data.append({
-                    "name": row['Nome do Produto'],
-                    "price": float(row['Preço de Venda (R$)']),
-                    "cost": float(row['Custo Variável (R$)']),
-                    "quantity": int(row['Quantidade Vendida (mês)'])
-                })
+        product_load = load_uploaded_products(uploaded_file.getvalue(), uploaded_file.name)
+        if product_load.ok:
+            product_data = product_load.products
             use_uploaded_data = True
             st.sidebar.success(f"✅ Planilha carregada com {len(product_data)} produtos!")
+            if len(product_load.errors) > 0:
+                invalid_rows = product_load.errors['row'].nunique()
+                st.sidebar.warning(f"⚠️ {invalid_rows} linha(s) ignorada(s) por erros de validação.")
+                with st.sidebar.expander("Ver erros da planilha"):
+                    st.dataframe(product_load.errors, use_container_width=True)
         else:
             st.sidebar.error("❌ Planilha não possui as colunas necessárias. Use o template fornecido.")
     except Exception as e:
@@ -284,13 +304,13 @@ st.sidebar.subheader("🏢 Custos Fixos")
 fixed_costs = st.sidebar.number_input("Custos Fixos Totais (R$/mês)", min_value=0.0, value=8000.0, format="%.2f")
 
 # Inicializar analisador financeiro
-if product_data:
-    analyzer = FinancialAnalyzer(product_data, fixed_costs, tax_rate)
+if len(product_data) > 0:
+    analyzer = get_financial_analyzer(product_data, fixed_costs, tax_rate)
     cvp_analysis = analyzer.get_cost_volume_profit_analysis()
     contribution_analysis = analyzer.get_contribution_margin_analysis()
 
 # Seção principal de resultados
-if product_data and not contribution_analysis.empty:
+if len(product_data) > 0 and not contribution_analysis.empty:
     # Métricas principais
     col1, col2, col3, col4 = st.columns(4)
     
@@ -342,17 +362,11 @@ if product_data and not contribution_analysis.empty:
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_margin = px.bar(contribution_analysis, x='name', y='contribution_margin_percent', 
-                           title='Margem de Contribuição por Produto (%)',
-                           labels={'contribution_margin_percent': 'Margem (%)', 'name': 'Produto'},
-                           color='contribution_margin_percent',
-                           color_continuous_scale='RdYlGn')
-        fig_margin.update_layout(showlegend=False, xaxis_tickangle=-45)
+        fig_margin = charts.contribution_margin_bar(contribution_analysis)
         st.plotly_chart(fig_margin, use_container_width=True)
     
     with col2:
-        fig_contribution = px.pie(contribution_analysis, values='total_contribution', names='name', 
-                                 title='Participação na Margem de Contribuição Total')
+        fig_contribution = charts.contribution_pie(contribution_analysis)
         st.plotly_chart(fig_contribution, use_container_width=True)
 
     st.markdown("---")
@@ -368,7 +382,7 @@ if product_data and not contribution_analysis.empty:
         st.metric("Receita", f"R$ {cvp_analysis['breakeven_revenue']:,.2f}")
         
         # Legenda do ponto de equilíbrio
-        current_units = sum([p["quantity"] for p in product_data])
+        current_units = analyzer.summary.total_quantity
         if current_units > cvp_analysis['breakeven_units']:
             st.markdown('<div class="success-card">✅ <strong>Situação:</strong> Acima do ponto de equilíbrio</div>', unsafe_allow_html=True)
         else:
@@ -402,28 +416,131 @@ if product_data and not contribution_analysis.empty:
         else:
             st.markdown('<div class="danger-card">🚨 <strong>Sensibilidade:</strong> Alta - Volátil</div>', unsafe_allow_html=True)
 
+    # Análise de risco por simulação de Monte Carlo
+    with st.expander("🎲 Análise de Risco (Monte Carlo)"):
+        st.markdown("Simula a volatilidade de demanda, custos dos insumos e custos fixos para estimar a probabilidade de prejuízo.")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            quantity_volatility = st.slider("Volatilidade da demanda (%)", 0, 100, 20) / 100
+        with col2:
+            cost_volatility = st.slider("Volatilidade dos custos (%)", 0, 100, 10) / 100
+        with col3:
+            price_volatility = st.slider("Volatilidade dos preços (%)", 0, 100, 0) / 100
+        with col4:
+            fixed_cost_volatility = st.slider("Volatilidade dos custos fixos (%)", 0, 100, 5) / 100
+        n_scenarios = st.select_slider("Número de cenários", options=[10_000, 100_000, 1_000_000], value=100_000)
+
+        if st.button("▶️ Executar simulação"):
+            risk_analyzer = MonteCarloRiskAnalyzer(
+                analyzer, price_volatility=price_volatility, cost_volatility=cost_volatility,
+                quantity_volatility=quantity_volatility, fixed_cost_volatility=fixed_cost_volatility
+            )
+            risk = risk_analyzer.run(n_scenarios=n_scenarios, seed=42)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Probabilidade de Prejuízo", f"{risk['probability_of_loss']:.1%}")
+            with col2:
+                st.metric("Lucro Líquido (mediana)", f"R$ {risk['net_profit']['p50']:,.2f}")
+            with col3:
+                st.metric("Margem de Segurança (P5)", f"{risk['safety_margin_percent']['p5']:.1f}%")
+            percentiles_df = pd.DataFrame({
+                'Lucro Líquido (R$)': risk['net_profit'],
+                'Ponto de Equilíbrio (un.)': risk['breakeven_units'],
+                'Margem de Segurança (%)': risk['safety_margin_percent']
+            })
+            st.dataframe(percentiles_df.style.format('{:,.2f}'), use_container_width=True)
+            st.caption(f"{risk['scenarios']:,} cenários em {risk['elapsed_seconds']:.2f} s "
+                       f"({risk['scenarios_per_second']:,.0f} cenários/s)")
+
+    # Busca automática de combos
+    with st.expander("🍱 Sugestão de Combos"):
+        st.markdown("Procura em todo o cardápio os combos de 2 a 4 produtos com melhor resultado.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            combo_discounts = st.multiselect("Descontos avaliados (%)", [5, 10, 15, 20, 25], default=[5, 10, 15])
+        with col2:
+            combo_top_n = st.number_input("Quantidade de combos", min_value=1, max_value=50, value=10, step=1)
+        with col3:
+            combo_sort = st.radio("Ordenar por", ["Margem do combo", "Contribuição incremental estimada"])
+
+        if st.button("🔍 Buscar combos") and combo_discounts:
+            combo_engine = ComboSearchEngine(analyzer)
+            combos_df = combo_engine.search(
+                sizes=(2, 3, 4), discounts=combo_discounts, top_n=int(combo_top_n),
+                sort_by='combo_margin' if combo_sort == "Margem do combo" else 'incremental_contribution'
+            )
+            if combos_df.empty:
+                st.info("Produtos insuficientes para montar combos.")
+            else:
+                combos_df['products'] = combos_df['products'].apply(" + ".join)
+                display_combos = combos_df[['products', 'discount_applied', 'discounted_price', 'combo_margin',
+                                            'combo_margin_percent', 'incremental_contribution', 'viability']]
+                display_combos.columns = ['Combo', 'Desconto (%)', 'Preço (R$)', 'Margem (R$)', 'Margem (%)',
+                                          'Contr. Incremental (R$)', 'Viabilidade']
+                st.dataframe(display_combos.style.format({
+                    'Desconto (%)': '{:.0f}%',
+                    'Preço (R$)': 'R$ {:.2f}',
+                    'Margem (R$)': 'R$ {:.2f}',
+                    'Margem (%)': '{:.1f}%',
+                    'Contr. Incremental (R$)': 'R$ {:.2f}'
+                }), use_container_width=True)
+
     # Seção de Análise de Fluxo de Caixa
     st.markdown("---")
     st.subheader("💰 Análise de Fluxo de Caixa")
     st.markdown("**Faça upload de extratos bancários em PDF para análise de fluxo de caixa.**")
 
-    uploaded_pdf = st.file_uploader("Subir extrato bancário (PDF)", type=["pdf"])
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        keep_history = st.checkbox(
+            "💾 Manter histórico dos extratos", value=True,
+            help="Guarda as transações em um banco local; extratos com períodos sobrepostos não duplicam lançamentos"
+        )
+    with col2:
+        account = st.text_input("Conta bancária", value="", help="Identificação da conta dos extratos enviados")
+    transaction_store = get_transaction_store() if keep_history else None
+    if transaction_store is not None and transaction_store.count() > 0:
+        if st.button("🗑️ Limpar histórico de transações"):
+            transaction_store.clear()
 
-    if uploaded_pdf is not None:
-        st.info("Processando o extrato bancário...")
-        
-        cash_flow_analyzer = CashFlowAnalyzer()
-        # Salvar o arquivo PDF temporariamente para que o pdfminer.six possa lê-lo
-        with open("temp_extrato.pdf", "wb") as f:
-            f.write(uploaded_pdf.getbuffer())
-        cash_flow_analyzer.parse_pdf_statement("temp_extrato.pdf")
-        
-        st.success("✅ Extrato processado com sucesso!")
+    uploaded_pdfs = st.file_uploader("Subir extratos bancários (PDF)", type=["pdf"], accept_multiple_files=True)
+
+    if uploaded_pdfs:
+        st.info("Processando os extratos bancários...")
         
-        # Verificar se há transações processadas
-        all_transactions_df = cash_flow_analyzer.get_all_transactions()
+        statement_cache = get_statement_cache()
+        cash_flow_analyzer = CashFlowAnalyzer(store=transaction_store, account=account, cache=statement_cache)
+        analysis_client = get_analysis_client()
+        service_status = None
+        if analysis_client is not None:
+            try:
+                service_status = analysis_client.status()
+            except OSError as e:
+                st.warning(f"⚠️ Serviço de análise indisponível ({e}); processando os extratos nesta sessão.")
+        if service_status is not None:
+            parse_result = parse_with_service(analysis_client, cash_flow_analyzer, uploaded_pdfs)
+            st.caption(f"Serviço de análise: {service_status['running']}/{service_status['workers']} worker(s) ocupados, "
+                       f"{service_status['queued']}/{service_status['max_queue']} job(s) na fila")
+        else:
+            # Os uploads vão direto para o pdfminer, em memória, sem arquivos temporários
+            parse_result = cash_flow_analyzer.parse_statements(uploaded_pdfs)
         
-        if not all_transactions_df.empty:
+        for name, error in parse_result.errors.items():
+            st.error(f"❌ {name}: {error}")
+        st.success(f"✅ {parse_result.stats['files']} extrato(s) processado(s) com sucesso!")
+        parse_stats = parse_result.stats
+        if parse_stats:
+            st.caption(f"{parse_stats['rows']} transações lidas em {parse_stats['seconds']:.2f} s "
+                       f"({parse_stats['rows_per_second']:,.0f} linhas/s)")
+            if 'new_rows' in parse_stats:
+                st.caption(f"{parse_stats['new_rows']} novas transações gravadas no histórico, "
+                           f"{parse_stats['duplicate_rows']} já existentes ignoradas")
+        cache_stats = statement_cache.stats()
+        st.caption(f"Cache de extratos: {cache_stats['hits']} acertos, {cache_stats['misses']} faltas "
+                   f"({cache_stats['hit_rate']:.0%})")
+
+        # Verificar se há transações processadas (consulta de uma linha, sem carregar o extrato inteiro)
+        if cash_flow_analyzer.query_transactions(page_size=1).total > 0:
             st.subheader("📈 Sumário Mensal de Fluxo de Caixa")
             monthly_summary_df = cash_flow_analyzer.get_monthly_summary()
             st.dataframe(monthly_summary_df.style.format({
@@ -439,8 +556,7 @@ if product_data and not contribution_analysis.empty:
                 st.subheader("📊 Entradas por Categoria")
                 inflow_category_df = cash_flow_analyzer.get_category_summary("Inflow")
                 if not inflow_category_df.empty:
-                    fig_inflow = px.pie(inflow_category_df, values='Total Amount', names='Category', 
-                                       title='Distribuição das Entradas')
+                    fig_inflow = charts.category_pie(inflow_category_df, 'Distribuição das Entradas')
                     st.plotly_chart(fig_inflow, use_container_width=True)
                     st.dataframe(inflow_category_df.style.format({
                         'Total Amount': 'R$ {:.2f}'
@@ -452,8 +568,7 @@ if product_data and not contribution_analysis.empty:
                 st.subheader("📊 Saídas por Categoria")
                 outflow_category_df = cash_flow_analyzer.get_category_summary("Outflow")
                 if not outflow_category_df.empty:
-                    fig_outflow = px.pie(outflow_category_df, values='Total Amount', names='Category', 
-                                        title='Distribuição das Saídas')
+                    fig_outflow = charts.category_pie(outflow_category_df, 'Distribuição das Saídas')
                     st.plotly_chart(fig_outflow, use_container_width=True)
                     st.dataframe(outflow_category_df.style.format({
                         'Total Amount': 'R$ {:.2f}'
@@ -461,28 +576,124 @@ if product_data and not contribution_analysis.empty:
                 else:
                     st.info("Nenhuma saída encontrada no período.")
             
+            st.subheader("💰 Posição de Caixa")
+            col1, col2 = st.columns(2)
+            with col1:
+                opening_balance = st.number_input("Saldo inicial (R$)", value=0.0, step=100.0)
+            with col2:
+                balance_threshold = st.number_input("Saldo mínimo desejado (R$)", value=0.0, step=100.0)
+            timeline = cash_flow_analyzer.get_timeline(opening_balance)
+            balance_summary = timeline.period_summary("monthly", threshold=balance_threshold)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Saldo Final", f"R$ {balance_summary['Closing Balance'].iloc[-1]:,.2f}")
+            with col2:
+                st.metric("Menor Saldo", f"R$ {balance_summary['Min Balance'].min():,.2f}")
+            with col3:
+                st.metric("Dias Abaixo do Mínimo", timeline.days_below(balance_threshold))
+            st.plotly_chart(charts.balance_line(timeline.daily_balances(), balance_threshold),
+                            use_container_width=True)
+            st.dataframe(balance_summary.style.format({
+                'Opening Balance': 'R$ {:.2f}',
+                'Closing Balance': 'R$ {:.2f}',
+                'Min Balance': 'R$ {:.2f}',
+                'Max Balance': 'R$ {:.2f}',
+                'Min Balance Date': '{:%d/%m/%Y}'
+            }), use_container_width=True)
+
+            st.subheader("🔮 Previsão de Caixa")
+            forecast_weeks = st.slider("Semanas a projetar", min_value=2, max_value=26, value=8)
+            forecaster = CashFlowForecaster(horizon_weeks=forecast_weeks).fit(
+                cash_flow_analyzer.get_all_transactions(), opening_balances=opening_balance
+            )
+            projected = forecaster.shortfalls(threshold=balance_threshold)
+            shortfall_weeks = projected[projected['Shortfall']]
+            if not shortfall_weeks.empty:
+                st.warning(f"⚠️ Saldo projetado abaixo do mínimo a partir da semana "
+                           f"{shortfall_weeks['Period'].iloc[0]} ({len(shortfall_weeks)} semana(s) no horizonte)")
+            else:
+                st.success("✅ Nenhuma falta de caixa projetada no horizonte")
+            st.dataframe(projected.assign(Period=projected['Period'].astype(str)).style.format({
+                'Net Flow': 'R$ {:.2f}',
+                'Projected Balance': 'R$ {:.2f}'
+            }), use_container_width=True)
+            if not forecaster.recurring.empty:
+                with st.expander(f"🔁 {len(forecaster.recurring)} pagamento(s)/recebimento(s) recorrente(s) detectado(s)"):
+                    st.dataframe(forecaster.recurring.drop(columns=['Store']).style.format({
+                        'Amount': 'R$ {:.2f}',
+                        'Last Date': '{:%d/%m/%Y}'
+                    }), use_container_width=True)
+
             st.subheader("📋 Todas as Transações")
-            st.dataframe(all_transactions_df.style.format({
+            # Filtros e paginação: só a página visível é carregada e enviada ao navegador
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                period = st.date_input("Período", value=(), format="DD/MM/YYYY")
+                transaction_type = st.selectbox("Tipo", ["Todos", "Entradas", "Saídas"])
+            with col2:
+                category_options = sorted(set(inflow_category_df['Category']) | set(outflow_category_df['Category']))
+                selected_categories = st.multiselect("Categorias", category_options)
+                search = st.text_input("Buscar na descrição", value="")
+            with col3:
+                min_amount = st.number_input("Valor mínimo (R$)", value=None, step=10.0)
+                max_amount = st.number_input("Valor máximo (R$)", value=None, step=10.0)
+            col1, col2 = st.columns(2)
+            with col1:
+                page_size = st.selectbox("Transações por página", [50, 100, 250, 500], index=1)
+            with col2:
+                page_number = st.number_input("Página", min_value=1, value=1, step=1)
+            transaction_page = cash_flow_analyzer.query_transactions(
+                start_date=period[0] if len(period) > 0 else None,
+                end_date=period[1] if len(period) > 1 else None,
+                transaction_type={"Entradas": "Inflow", "Saídas": "Outflow"}.get(transaction_type),
+                categories=selected_categories or None,
+                search=search or None,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                page=page_number - 1,
+                page_size=page_size
+            )
+            st.dataframe(transaction_page.rows.style.format({
                 'Amount': 'R$ {:.2f}'
             }), use_container_width=True)
+            st.caption(f"{transaction_page.total:,} transações encontradas — página {page_number} de "
+                       f"{transaction_page.page_count}")
             
             # Botão para download do relatório de fluxo de caixa
             if st.button("📊 Gerar Relatório de Fluxo de Caixa", use_container_width=True):
-                cash_flow_report_content = generate_cash_flow_report(cash_flow_analyzer)
-                cash_flow_report_bytes = cash_flow_report_content.encode('utf-8')
-                st.download_button(
-                    label="📥 Baixar Relatório de Fluxo de Caixa (TXT)",
-                    data=cash_flow_report_bytes,
-                    file_name=f"relatorio_fluxo_caixa_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-                st.success("✅ Relatório de Fluxo de Caixa gerado com sucesso! Clique no botão acima para baixar.")
+                report_timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+                cash_flow_tables = cash_flow_report_tables(cash_flow_analyzer)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.download_button(
+                        label="📥 Baixar Relatório de Fluxo de Caixa (TXT)",
+                        data=report_file(write_cash_flow_report, cash_flow_analyzer),
+                        file_name=f"relatorio_fluxo_caixa_{report_timestamp}.txt",
+                        mime="text/plain",
+                        use_container_width=True
+                    )
+                with col2:
+                    st.download_button(
+                        label="📥 Baixar Tabelas (CSV)",
+                        data=report_file(write_tables_csv, cash_flow_tables, binary=True),
+                        file_name=f"relatorio_fluxo_caixa_{report_timestamp}.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
+                with col3:
+                    st.download_button(
+                        label="📥 Baixar Tabelas (XLSX)",
+                        data=report_file(write_tables_xlsx, cash_flow_tables, binary=True),
+                        file_name=f"relatorio_fluxo_caixa_{report_timestamp}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+                st.success("✅ Relatório de Fluxo de Caixa gerado com sucesso! Clique em um dos botões acima para baixar.")
         else:
             st.warning("⚠️ Nenhuma transação foi encontrada no PDF. Verifique o formato do extrato.")
 
     else:
-        st.info("Por favor, suba um arquivo PDF para analisar o fluxo de caixa.")
+        st.info("Por favor, suba um ou mais arquivos PDF para analisar o fluxo de caixa.")
 
     # Seção de download do relatório
     st.markdown("---")
@@ -492,23 +703,79 @@ if product_data and not contribution_analysis.empty:
     
     with col2:
         if st.button("📊 Gerar Relatório Completo", use_container_width=True):
-            report_content = generate_report(analyzer, cvp_analysis, contribution_analysis)
-            
-            # Criar arquivo para download
-            report_bytes = report_content.encode('utf-8')
+            report_timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+            report_tables = financial_report_tables(analyzer, cvp_analysis, contribution_analysis)
             
+            # Os arquivos são escritos em blocos e entregues ao botão sem montar o texto inteiro na memória
             st.download_button(
                 label="📥 Baixar Relatório (TXT)",
-                data=report_bytes,
-                file_name=f"relatorio_analise_cafeteria_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
+                data=report_file(write_financial_report, analyzer, cvp_analysis, contribution_analysis),
+                file_name=f"relatorio_analise_cafeteria_{report_timestamp}.txt",
                 mime="text/plain",
                 use_container_width=True
             )
+            st.download_button(
+                label="📥 Baixar Tabelas (CSV)",
+                data=report_file(write_tables_csv, report_tables, binary=True),
+                file_name=f"relatorio_analise_cafeteria_{report_timestamp}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+            st.download_button(
+                label="📥 Baixar Tabelas (XLSX)",
+                data=report_file(write_tables_xlsx, report_tables, binary=True),
+                file_name=f"relatorio_analise_cafeteria_{report_timestamp}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
             
-            st.success("✅ Relatório gerado com sucesso! Clique no botão acima para baixar.")
+            st.success("✅ Relatório gerado com sucesso! Clique em um dos botões acima para baixar.")
 
 # Footer
 st.markdown("---")
 st.markdown("**💡 Desenvolvido para otimização de lucratividade de cafeterias** ☕")
 st.markdown("*Use as análises para tomar decisões estratégicas baseadas em dados!*")
 
+# Tempo de inicialização: importações e primeira renderização completa (registrado uma vez por processo)
+startup_timing = get_startup_timing()
+if not startup_timing:
+    startup_timing.update({
+        'import_seconds': IMPORT_SECONDS,
+        'first_render_seconds': time.perf_counter() - SCRIPT_START
+    })
+st.caption(f"⏱️ Inicialização: imports {startup_timing['import_seconds']:.2f} s, "
+           f"primeira renderização {startup_timing['first_render_seconds']:.2f} s")
+
+# Diagnóstico de desempenho: tempos e linhas por etapa de cada reexecução
+with st.expander("🩺 Diagnóstico de desempenho"):
+    st.checkbox("Medir as etapas a cada reexecução", key='diagnostics_enabled')
+    st.checkbox("Capturar perfil detalhado (cProfile)", key='diagnostics_profile',
+                disabled=not st.session_state.get('diagnostics_enabled', False))
+    if diagnostics_recorder is not None:
+        instrumentation.stop(diagnostics_recorder)
+        diagnostics_runs = st.session_state.setdefault('diagnostics_runs', [])
+        diagnostics_runs.append(diagnostics_recorder.to_dict())
+        # Guarda só as últimas reexecuções
+        del diagnostics_runs[:-20]
+
+        st.caption(f"Reexecução atual: {diagnostics_recorder.elapsed:.2f} s no total "
+                   f"({len(diagnostics_runs)} reexecução(ões) registrada(s))")
+        stage_summary = diagnostics_recorder.summary()
+        if not stage_summary.empty:
+            st.dataframe(stage_summary.style.format({
+                'total_seconds': '{:.4f}',
+                'mean_seconds': '{:.4f}',
+                'max_seconds': '{:.4f}',
+                'rows_per_second': '{:,.0f}'
+            }), use_container_width=True)
+        else:
+            st.info("Nenhuma etapa instrumentada foi executada nesta reexecução.")
+        profile_text = diagnostics_recorder.profile_text()
+        if profile_text:
+            st.code(profile_text)
+        st.download_button(
+            label="📥 Baixar tempos por etapa (JSON)",
+            data=json.dumps(diagnostics_runs, indent=2, ensure_ascii=False, default=str),
+            file_name=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
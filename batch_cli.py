@@ -0,0 +1,295 @@
+"""
+Processamento em lote, sem interface, para as rotinas noturnas.
+Percorre um diretório com uma subpasta por loja (planilhas de produtos .csv,
+.xls ou .xlsx e extratos .pdf), roda o FinancialAnalyzer e o CashFlowAnalyzer
+de cada loja em processos separados e grava as métricas CVP, os resumos e os
+relatórios em Parquet, JSON e TXT.
+
+Um manifesto (manifest.json no diretório de saída) registra a impressão
+digital das entradas de cada loja concluída; ao reexecutar, as lojas cujas
+entradas não mudaram são puladas, o que permite retomar após uma interrupção.
+
+Uso:
+    python batch_cli.py entradas/ saidas/ --workers 4 --fixed-costs 8000 --tax-rate 6
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+import pandas as pd
+
+from cash_flow_analyzer import CashFlowAnalyzer
+from financial_analysis import FinancialAnalyzer
+from product_loader import PRODUCT_COLUMNS, load_products
+from report_writers import json_safe, write_cash_flow_report, write_financial_report
+
+PRODUCT_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+STATEMENT_EXTENSIONS = ('.pdf',)
+# Parâmetros próprios da loja (fixed_costs, tax_rate), opcionais, dentro da pasta da loja
+STORE_CONFIG = 'config.json'
+MANIFEST = 'manifest.json'
+# Muda quando o formato das saídas muda, invalidando o manifesto
+OUTPUT_VERSION = 1
+
+
+def discover_stores(input_dir: str) -> Dict[str, List[str]]:
+    """
+    Lista as lojas e seus arquivos de entrada
+
+    Cada subpasta é uma loja; se não houver subpastas, o próprio diretório é
+    tratado como uma única loja.
+
+    Returns:
+        Dicionário {loja: caminhos dos arquivos, em ordem}
+    """
+    def inputs(directory: str) -> List[str]:
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(PRODUCT_EXTENSIONS + STATEMENT_EXTENSIONS) or name == STORE_CONFIG
+        )
+
+    subdirectories = sorted(
+        entry.name for entry in os.scandir(input_dir) if entry.is_dir() and not entry.name.startswith('.')
+    )
+    if not subdirectories:
+        return {os.path.basename(os.path.abspath(input_dir)): inputs(input_dir)}
+    return {name: inputs(os.path.join(input_dir, name)) for name in subdirectories}
+
+
+def fingerprint(paths: List[str], fixed_costs: float, tax_rate: float) -> str:
+    """Impressão digital das entradas (nome, tamanho e data de modificação) e dos parâmetros"""
+    digest = hashlib.sha256(f'{OUTPUT_VERSION}|{fixed_costs}|{tax_rate}'.encode('utf-8'))
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'|{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir: str) -> Dict:
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir: str, manifest: Dict):
+    # Escrita atômica: uma interrupção no meio nunca deixa o manifesto corrompido
+    path = os.path.join(output_dir, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def _write_table(table: pd.DataFrame, path: str):
+    # Colunas de períodos (pd.Period) não têm tipo equivalente no Parquet
+    table = table.copy()
+    for column in table.columns:
+        if isinstance(table[column].dtype, pd.PeriodDtype):
+            table[column] = table[column].astype(str)
+    table.to_parquet(path, index=False)
+
+
+def _write_json(data: Dict, path: str):
+    # JSON estrito: floats não finitos (ex.: alavancagem operacional infinita) são gravados como null
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(json_safe(data), f, indent=2, ensure_ascii=False, allow_nan=False)
+
+
+def _analyze_store(store: str, paths: List[str], work_dir: str, fixed_costs: float, tax_rate: float) -> Dict:
+    # Roda as duas análises da loja e grava as saídas em work_dir
+    products, invalid_rows = [], 0
+    for path in paths:
+        if path.lower().endswith(PRODUCT_EXTENSIONS):
+            loaded = load_products(path)
+            if not loaded.ok:
+                raise ValueError(f"{os.path.basename(path)}: colunas ausentes: {', '.join(loaded.missing_columns)}")
+            products.append(loaded.products)
+            invalid_rows += len(loaded.errors)
+            if len(loaded.errors) > 0:
+                _write_table(loaded.errors.astype({'value': str}),
+                             os.path.join(work_dir, f'erros_{os.path.splitext(os.path.basename(path))[0]}.parquet'))
+    products = pd.concat(products, ignore_index=True) if products else pd.DataFrame(columns=PRODUCT_COLUMNS)
+
+    if len(products) > 0:
+        analyzer = FinancialAnalyzer(products, fixed_costs, tax_rate)
+        cvp_analysis = analyzer.get_cost_volume_profit_analysis()
+        contribution_analysis = analyzer.get_contribution_margin_analysis()
+        _write_json({'store': store, 'fixed_costs': fixed_costs, 'tax_rate': tax_rate, **cvp_analysis},
+                    os.path.join(work_dir, 'cvp.json'))
+        _write_table(contribution_analysis, os.path.join(work_dir, 'produtos.parquet'))
+        with open(os.path.join(work_dir, 'relatorio_financeiro.txt'), 'w', encoding='utf-8') as f:
+            write_financial_report(f, analyzer, cvp_analysis, contribution_analysis)
+
+    statements = [path for path in paths if path.lower().endswith(STATEMENT_EXTENSIONS)]
+    transactions = 0
+    if statements:
+        cash_flow = CashFlowAnalyzer()
+        # Já estamos em um processo do pool: os extratos da loja são lidos em sequência
+        result = cash_flow.parse_statements(statements, workers=1)
+        if result.errors:
+            # A loja falha e fica fora do manifesto, para ser reprocessada na próxima execução
+            errors = '; '.join(f'{name}: {error}' for name, error in result.errors.items())
+            raise ValueError(f'extratos ilegíveis: {errors}')
+        transactions = len(cash_flow.transactions)
+    # Extratos sem nenhuma transação reconhecida não geram saídas de fluxo de caixa
+    if transactions > 0:
+        _write_table(cash_flow.get_monthly_summary(), os.path.join(work_dir, 'resumo_mensal.parquet'))
+        _write_table(cash_flow.get_period_summary('monthly', by_category=True),
+                     os.path.join(work_dir, 'resumo_categorias.parquet'))
+        _write_table(cash_flow.transactions, os.path.join(work_dir, 'transacoes.parquet'))
+        with open(os.path.join(work_dir, 'relatorio_fluxo_caixa.txt'), 'w', encoding='utf-8') as f:
+            write_cash_flow_report(f, cash_flow)
+
+    return {
+        'products': len(products),
+        'invalid_product_rows': invalid_rows,
+        'statements': len(statements),
+        'transactions': transactions
+    }
+
+
+def process_store(store: str, paths: List[str], output_dir: str, fixed_costs: float, tax_rate: float) -> Dict:
+    """
+    Processa uma loja e grava as saídas em ``output_dir/<loja>``
+
+    As saídas são escritas em uma pasta temporária e renomeadas ao final, de
+    modo que uma loja interrompida nunca fica com saídas parciais.
+
+    Returns:
+        Estatísticas da loja (produtos, transações, erros de planilha, segundos)
+    """
+    start = time.perf_counter()
+    config_path = next((path for path in paths if os.path.basename(path) == STORE_CONFIG), None)
+    if config_path is not None:
+        with open(config_path, encoding='utf-8') as f:
+            config = json.load(f)
+        fixed_costs = float(config.get('fixed_costs', fixed_costs))
+        tax_rate = float(config.get('tax_rate', tax_rate))
+
+    store_dir = os.path.join(output_dir, store)
+    work_dir = store_dir + '.tmp'
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    try:
+        stats = _analyze_store(store, paths, work_dir, fixed_costs, tax_rate)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    stats['seconds'] = time.perf_counter() - start
+    _write_json(stats, os.path.join(work_dir, 'estatisticas.json'))
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(work_dir, store_dir)
+    return stats
+
+
+def run_batch(input_dir: str, output_dir: str, fixed_costs: float = 0.0, tax_rate: float = 0.0,
+              workers: int = None, force: bool = False) -> Dict:
+    """
+    Processa todas as lojas de ``input_dir``, pulando as já concluídas
+
+    Args:
+        input_dir: Diretório de entrada (uma subpasta por loja)
+        output_dir: Diretório de saída (uma subpasta por loja e o manifesto)
+        fixed_costs: Custos fixos padrão (config.json da loja tem prioridade)
+        tax_rate: Alíquota padrão, em % (config.json da loja tem prioridade)
+        workers: Processos em paralelo (padrão: número de CPUs)
+        force: Se True, reprocessa todas as lojas
+
+    Returns:
+        Estatísticas de throughput da execução
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    stores = discover_stores(input_dir)
+
+    pending, skipped = {}, []
+    for store, paths in stores.items():
+        key = fingerprint(paths, fixed_costs, tax_rate)
+        done = manifest.get(store)
+        if done and done.get('fingerprint') == key and os.path.isdir(os.path.join(output_dir, store)):
+            skipped.append(store)
+        else:
+            pending[store] = (paths, key)
+
+    completed, failed = {}, {}
+    interrupted = False
+    if pending:
+        # Os processos do pool ignoram o Ctrl+C: só o processo principal trata a interrupção
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=signal.signal,
+                                       initargs=(signal.SIGINT, signal.SIG_IGN))
+        futures = {
+            executor.submit(process_store, store, paths, output_dir, fixed_costs, tax_rate): (store, key)
+            for store, (paths, key) in pending.items()
+        }
+        try:
+            for future in as_completed(futures):
+                store, key = futures[future]
+                try:
+                    completed[store] = future.result()
+                except Exception as e:
+                    failed[store] = str(e)
+                    print(f"[erro] {store}: {e}", file=sys.stderr, flush=True)
+                    if manifest.pop(store, None) is not None:
+                        save_manifest(output_dir, manifest)
+                    continue
+                # O manifesto é gravado a cada loja concluída: uma interrupção perde no máximo as lojas em andamento
+                manifest[store] = {'fingerprint': key, 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                   **completed[store]}
+                save_manifest(output_dir, manifest)
+                print(f"[ok] {store}: {completed[store]['products']} produtos, "
+                      f"{completed[store]['transactions']} transações em {completed[store]['seconds']:.2f} s",
+                      flush=True)
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\n[interrompido] as lojas restantes serão processadas na próxima execução", flush=True)
+        finally:
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    products = sum(stats['products'] for stats in completed.values())
+    transactions = sum(stats['transactions'] for stats in completed.values())
+    return {
+        'stores': len(stores),
+        'interrupted': interrupted,
+        'processed': len(completed),
+        'skipped': len(skipped),
+        'failed': failed,
+        'products': products,
+        'transactions': transactions,
+        'seconds': elapsed,
+        'stores_per_second': len(completed) / elapsed if elapsed > 0 else 0.0,
+        'transactions_per_second': transactions / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Análise financeira e de fluxo de caixa em lote, por loja")
+    parser.add_argument("input_dir", help="Diretório com uma subpasta por loja (planilhas e extratos PDF)")
+    parser.add_argument("output_dir", help="Diretório de saída")
+    parser.add_argument("--fixed-costs", type=float, default=0.0, help="Custos fixos mensais padrão (R$)")
+    parser.add_argument("--tax-rate", type=float, default=0.0, help="Alíquota padrão sobre a receita (%%)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: CPUs)")
+    parser.add_argument("--force", action="store_true", help="Reprocessa todas as lojas, ignorando o manifesto")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.input_dir, args.output_dir, args.fixed_costs, args.tax_rate, args.workers, args.force)
+    print(f"\n{summary['processed']} loja(s) processada(s), {summary['skipped']} pulada(s) (já concluídas), "
+          f"{len(summary['failed'])} com erro, de {summary['stores']}")
+    print(f"{summary['products']} produtos e {summary['transactions']} transações em {summary['seconds']:.2f} s "
+          f"({summary['stores_per_second']:.2f} lojas/s, {summary['transactions_per_second']:,.0f} transações/s)")
+    return 1 if summary['failed'] or summary['interrupted'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
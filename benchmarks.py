@@ -0,0 +1,567 @@
+"""
+Benchmarks dos caminhos críticos da análise financeira e de fluxo de caixa.
+
+Uso:
+    python benchmarks.py                                  # suíte completa
+    python benchmarks.py --quick                          # tamanhos menores
+    python benchmarks.py --output atual.json --baseline base.json
+
+Os resultados são salvos em JSON; com --baseline, as medições mais lentas que
+a referência além da tolerância são listadas como regressões (código de saída 1).
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+from cash_flow_analyzer import CashFlowAnalyzer, parse_statement_lines
+from cash_flow_forecast import CashFlowForecaster
+from cash_flow_timeline import CashFlowTimeline
+from financial_analysis import FinancialAnalyzer
+import instrumentation
+from report_writers import write_cash_flow_report, write_financial_report
+from transaction_categorizer import TransactionCategorizer
+
+DESCRIPTION_WORDS = [
+    "SALÁRIO", "PAGAMENTO", "VENDA", "CLIENTE", "ALUGUEL", "LUZ", "ÁGUA", "INTERNET",
+    "FORNECEDOR", "COMPRA", "FOLHA", "IMPOSTO", "TAXA", "UBER", "MANUTENÇÃO", "PIX", "TED", "DOC"
+]
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def generate_descriptions(n_rows: int, distinct: int = 5_000, seed: int = 0) -> pd.DataFrame:
+    """Gera descrições e tipos sintéticos com ``distinct`` descrições diferentes"""
+    rng = np.random.default_rng(seed)
+    words = np.array(DESCRIPTION_WORDS, dtype=object)
+    pool = np.array(
+        [f"{' '.join(rng.choice(words, size=2))} {index:05d}" for index in range(distinct)], dtype=object
+    )
+    return pd.DataFrame({
+        "Description": pool[rng.integers(0, distinct, size=n_rows)],
+        "Type": np.where(rng.random(n_rows) < 0.5, "Inflow", "Outflow")
+    })
+
+
+def _legacy_categorize(categories, description: str, transaction_type: str) -> str:
+    # Implementação original (laço por linha e por palavra-chave), mantida como referência
+    description = description.lower()
+    flow = "inflow" if transaction_type == "Inflow" else "outflow"
+    for category, keywords in categories[flow].items():
+        for keyword in keywords:
+            if keyword in description:
+                return category
+    return "Outra Entrada" if transaction_type == "Inflow" else "Outra Saída"
+
+
+def benchmark_categorization(n_rows: int = 100_000) -> Dict:
+    """Compara a categorização linha a linha com o categorizador compilado"""
+    categories = CashFlowAnalyzer().categories
+    data = generate_descriptions(n_rows)
+
+    _, legacy_seconds = _timed(lambda: [
+        _legacy_categorize(categories, description, transaction_type)
+        for description, transaction_type in zip(data["Description"], data["Type"])
+    ])
+    categorizer, compile_seconds = _timed(TransactionCategorizer, categories)
+    _, batch_seconds = _timed(categorizer.categorize_series, data["Description"], data["Type"])
+
+    return {
+        "rows": n_rows,
+        "legacy_seconds": legacy_seconds,
+        "compile_seconds": compile_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": legacy_seconds / batch_seconds if batch_seconds > 0 else float("inf")
+    }
+
+
+def generate_transactions(n_rows: int, years: int = 3, seed: int = 0) -> pd.DataFrame:
+    """Gera um DataFrame de transações no formato de CashFlowAnalyzer.transactions"""
+    rng = np.random.default_rng(seed)
+    descriptions = generate_descriptions(n_rows, seed=seed)["Description"]
+    amounts = np.round(rng.normal(0, 1_000, size=n_rows), 2)
+    transactions = pd.DataFrame({
+        "Date": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 365 * years, size=n_rows), unit="D"),
+        "Description": descriptions,
+        "Amount": amounts,
+        "Type": np.where(amounts >= 0, "Inflow", "Outflow")
+    })
+    transactions["Category"] = TransactionCategorizer(CashFlowAnalyzer().categories).categorize_series(
+        transactions["Description"], transactions["Type"]
+    )
+    transactions["Source"] = "sintetico.pdf"
+    return transactions.sort_values("Date", kind="mergesort", ignore_index=True)
+
+
+def benchmark_period_summary(n_rows: int = 300_000) -> Dict:
+    """Mede os resumos por período em todas as granularidades"""
+    analyzer = CashFlowAnalyzer()
+    analyzer.transactions = generate_transactions(n_rows)
+    result = {"rows": n_rows}
+    _, result["monthly_seconds"] = _timed(analyzer.get_monthly_summary)
+    for granularity in ("daily", "weekly", "quarterly"):
+        _, result[f"{granularity}_by_category_seconds"] = _timed(
+            analyzer.get_period_summary, granularity, by_category=True
+        )
+    return result
+
+
+def benchmark_timeline(n_rows: int = 300_000) -> Dict:
+    """
+    Compara a linha do tempo incremental com a reconstrução completa
+
+    Os lotes chegam fora de ordem: o primeiro semestre; o ano do meio, que
+    começa depois de um intervalo sem nenhuma transação (julho e agosto do
+    primeiro ano são removidos); um lote que amplia o intervalo nos dois
+    sentidos; por fim o restante. Os saldos incrementais precisam coincidir
+    com os da reconstrução.
+    """
+    transactions = generate_transactions(n_rows)
+    years, months = transactions["Date"].dt.year, transactions["Date"].dt.month
+    first_year = years == years.min()
+    transactions = transactions[~(first_year & months.isin([7, 8]))].reset_index(drop=True)
+    years, months = transactions["Date"].dt.year, transactions["Date"].dt.month
+    first_half = (years == years.min()) & (months <= 6)
+    middle = years == years.min() + 1
+    edges = months.isin([1, 12]) & ~middle & ~first_half
+    rest = ~first_half & ~middle & ~edges
+    batches = [transactions[mask] for mask in (first_half, middle, edges, rest)]
+
+    full, full_seconds = _timed(CashFlowTimeline, 1_000.0, transactions)
+    incremental = CashFlowTimeline(1_000.0)
+    start = time.perf_counter()
+    for batch in batches:
+        incremental.add_transactions(batch)
+    incremental_seconds = time.perf_counter() - start
+    if not incremental.daily_balances().equals(full.daily_balances()):
+        raise AssertionError("Saldos da linha do tempo incremental diferem da reconstrução completa")
+    return {
+        "rows": n_rows,
+        "batches": len(batches),
+        "full_seconds": full_seconds,
+        "incremental_seconds": incremental_seconds
+    }
+
+
+def generate_products(n_products: int, seed: int = 0) -> list:
+    """Gera um cardápio sintético no formato de FinancialAnalyzer"""
+    rng = np.random.default_rng(seed)
+    return [
+        {"name": f"Produto {index}", "price": float(rng.uniform(4, 25)), "cost": float(rng.uniform(1, 8)),
+         "quantity": int(rng.integers(50, 1_500))}
+        for index in range(n_products)
+    ]
+
+
+def _legacy_analysis(products_data, fixed_costs: float, tax_rate: float) -> Dict:
+    # Caminho original em pandas (DataFrame criado e colunas atribuídas a cada análise), mantido como referência
+    df = pd.DataFrame(products_data)
+    df["tax"] = df["price"] * (tax_rate / 100)
+    df["total_tax"] = df["tax"] * df["quantity"]
+    df["contribution_margin"] = df["price"] - df["cost"] - df["tax"]
+    df["contribution_margin_percent"] = (df["contribution_margin"] / df["price"] * 100).fillna(0)
+    df["total_revenue"] = df["price"] * df["quantity"]
+    df["total_variable_cost"] = (df["cost"] + df["tax"]) * df["quantity"]
+    df["total_contribution"] = df["contribution_margin"] * df["quantity"]
+    total_revenue = df["total_revenue"].sum()
+    total_contribution = df["total_contribution"].sum()
+    total_quantity = df["quantity"].sum()
+    weighted_avg_contribution_margin = total_contribution / total_quantity if total_quantity > 0 else 0
+    breakeven_units = fixed_costs / weighted_avg_contribution_margin if weighted_avg_contribution_margin > 0 else 0
+    columns = ["name", "contribution_margin_percent", "total_contribution"]
+    return {
+        "net_profit": total_contribution - fixed_costs,
+        "contribution_margin_ratio": total_contribution / total_revenue * 100 if total_revenue > 0 else 0,
+        "breakeven_units": breakeven_units,
+        "high_margin_products": df.nlargest(3, "contribution_margin_percent")[columns].to_dict("records"),
+        "low_margin_products": df.nsmallest(3, "contribution_margin_percent")[columns].to_dict("records"),
+        "high_contribution_products": df.nlargest(3, "total_contribution")[columns].to_dict("records")
+    }
+
+
+def _core_analysis(products_data, fixed_costs: float, tax_rate: float) -> Dict:
+    analyzer = FinancialAnalyzer(products_data, fixed_costs, tax_rate)
+    return {**analyzer.get_cost_volume_profit_analysis(), **analyzer.analyze_product_mix_optimization()}
+
+
+def benchmark_analyzer_core(n_products: int = 20, repeat: int = 2_000) -> Dict:
+    """Latência por chamada (criar o analisador, CVP e mix) com pandas e com o núcleo em arrays"""
+    products = generate_products(n_products)
+    result = {"products": n_products, "repeat": repeat}
+    for name, function in (("legacy", _legacy_analysis), ("core", _core_analysis)):
+        function(products, 20_000.0, 6.0)
+        _, elapsed = _timed(lambda: [function(products, 20_000.0, 6.0) for _ in range(repeat)])
+        result[f"{name}_microseconds_per_call"] = elapsed / repeat * 1e6
+    result["speedup"] = result["legacy_microseconds_per_call"] / result["core_microseconds_per_call"]
+    return result
+
+
+def generate_store_histories(n_stores: int = 60, years: int = 3, sales_per_day: int = 6, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera o histórico de várias lojas (coluna Store), com vendas diárias sazonais e
+    pagamentos recorrentes de aluguel, energia e fornecedor
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2022-01-01", periods=365 * years, freq="D")
+    stores = np.array([f"Loja {number:02d}" for number in range(n_stores)], dtype=object)
+
+    n_sales = n_stores * len(days) * sales_per_day
+    sale_days = np.tile(np.repeat(days.to_numpy(), sales_per_day), n_stores)
+    seasonal = 1 + 0.3 * np.sin(2 * np.pi * pd.DatetimeIndex(sale_days).dayofyear.to_numpy() / 365)
+    sales = pd.DataFrame({
+        "Store": np.repeat(stores, len(days) * sales_per_day),
+        "Date": sale_days,
+        "Description": "VENDA CLIENTE",
+        "Amount": np.round(np.abs(rng.normal(150, 40, size=n_sales)) * seasonal, 2),
+        "Type": "Inflow",
+        "Category": "Venda/Serviço"
+    })
+
+    recurring = []
+    for description, category, day_of_month, amount in (("ALUGUEL LOJA", "Aluguel", 5, -3_000.0),
+                                                          ("CONTA DE LUZ", "Contas de Consumo", 10, -450.0)):
+        month_days = days[days.day == day_of_month].to_numpy()
+        recurring.append(pd.DataFrame({
+            "Store": np.repeat(stores, len(month_days)), "Date": np.tile(month_days, n_stores),
+            "Description": description, "Amount": amount, "Type": "Outflow", "Category": category
+        }))
+    fridays = days[days.dayofweek == 4].to_numpy()
+    recurring.append(pd.DataFrame({
+        "Store": np.repeat(stores, len(fridays)), "Date": np.tile(fridays, n_stores),
+        "Description": "FORNECEDOR CAFE", "Amount": np.round(-rng.uniform(2_500, 2_700, len(fridays) * n_stores), 2),
+        "Type": "Outflow", "Category": "Fornecedores/Compras"
+    }))
+    histories = pd.concat([sales, *recurring], ignore_index=True)
+    histories["Source"] = "sintetico.pdf"
+    return histories.sort_values(["Store", "Date"], kind="mergesort", ignore_index=True)
+
+
+def benchmark_forecast(n_stores: int = 60, years: int = 3, horizon_weeks: int = 8) -> Dict:
+    """Ajuste e previsão semanal (recorrências + Holt-Winters) para várias lojas de uma vez"""
+    histories = generate_store_histories(n_stores, years)
+    forecaster = CashFlowForecaster(horizon_weeks=horizon_weeks)
+    _, elapsed = _timed(forecaster.fit, histories, store_column="Store", opening_balances=20_000.0)
+    _, shortfall_seconds = _timed(forecaster.shortfalls)
+    return {
+        "stores": n_stores,
+        "rows": len(histories),
+        "series": forecaster.forecast()[["Store", "Category"]].drop_duplicates().shape[0],
+        "recurring_detected": len(forecaster.recurring),
+        "fit_seconds": elapsed,
+        "shortfall_seconds": shortfall_seconds
+    }
+
+
+def benchmark_instrumentation(n_products: int = 20, repeat: int = 2_000) -> Dict:
+    """Custo da instrumentação por chamada do analisador (criar, CVP e mix), desligada e ligada"""
+    products = generate_products(n_products)
+    result = {"products": n_products, "repeat": repeat}
+    instrumentation.disable()
+    _, off_seconds = _timed(lambda: [_core_analysis(products, 20_000.0, 6.0) for _ in range(repeat)])
+    recorder = instrumentation.start()
+    _, on_seconds = _timed(lambda: [_core_analysis(products, 20_000.0, 6.0) for _ in range(repeat)])
+    instrumentation.stop(recorder)
+    result["off_microseconds_per_call"] = off_seconds / repeat * 1e6
+    result["on_microseconds_per_call"] = on_seconds / repeat * 1e6
+    result["stages_recorded"] = len(recorder.records)
+    return result
+
+
+# Módulos importados pelo aplicativo na inicialização (exceto o streamlit)
+APP_MODULES = [
+    "pandas", "numpy", "charts", "instrumentation", "financial_analysis", "risk_simulation", "combo_search",
+    "cash_flow_analyzer", "cash_flow_forecast", "transaction_store", "statement_cache", "product_loader",
+    "report_writers", "analysis_service"
+]
+# Dependências pesadas que só devem ser carregadas no primeiro uso
+LAZY_MODULES = ["plotly", "pdfminer", "scipy", "openpyxl"]
+
+_STARTUP_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+print(json.dumps({{
+    "import_seconds": time.perf_counter() - start,
+    "eager_heavy_modules": [name for name in {lazy!r} if name in sys.modules]
+}}))
+"""
+
+
+def benchmark_startup(repeat: int = 3) -> Dict:
+    """
+    Mede a inicialização do aplicativo em interpretadores novos
+
+    Reporta o menor tempo de importação dos módulos do aplicativo, as
+    dependências pesadas carregadas antes do uso (deve ser vazio) e, se o
+    streamlit estiver instalado, o tempo até a primeira renderização completa.
+    """
+    script = _STARTUP_SCRIPT.format(modules=APP_MODULES, lazy=LAZY_MODULES)
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = [
+        json.loads(subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=root
+        ).stdout)
+        for _ in range(repeat)
+    ]
+    result = {
+        "import_seconds": min(run["import_seconds"] for run in runs),
+        "eager_heavy_modules": ", ".join(runs[0]["eager_heavy_modules"]) or "nenhum"
+    }
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return result
+    _, result["first_render_seconds"] = _timed(
+        lambda: AppTest.from_file(os.path.join(root, "app_melhorado_final.py"), default_timeout=120).run()
+    )
+    return result
+
+
+CATALOG_SIZES = (10, 1_000, 100_000)
+STATEMENT_SIZES = (100, 10_000, 100_000)
+QUICK_CATALOG_SIZES = (10, 1_000, 10_000)
+QUICK_STATEMENT_SIZES = (100, 1_000, 10_000)
+# O pdfminer lê cerca de mil linhas por segundo: extratos maiores são medidos só a partir do texto
+MAX_PDF_LINES = 10_000
+QUICK_MAX_PDF_LINES = 1_000
+STATEMENT_DESCRIPTIONS = [
+    "SALÁRIO", "PAGAMENTO CLIENTE", "VENDA BALCÃO", "ALUGUEL LOJA", "CONTA DE LUZ", "ÁGUA E ESGOTO",
+    "INTERNET", "FORNECEDOR CAFÉ", "COMPRA INSUMOS", "FOLHA PAGAMENTO", "IMPOSTO ISS", "TAXA BANCÁRIA",
+    "COMBUSTÍVEL", "UBER", "MANUTENÇÃO MÁQUINA", "PIX RECEBIDO", "TED ENVIADA"
+]
+STATEMENT_LINES_PER_PAGE = 50
+
+
+def generate_statement_lines(n_lines: int, seed: int = 0) -> list:
+    """
+    Gera linhas de extrato no formato reconhecido por TRANSACTION_PATTERN
+
+    Ex.: "05/01/2025 ALUGUEL LOJA R$ -1.500,00"
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, size=n_lines), unit="D")
+    descriptions = np.array(STATEMENT_DESCRIPTIONS, dtype=object)[rng.integers(0, len(STATEMENT_DESCRIPTIONS),
+                                                                              size=n_lines)]
+    amounts = np.round(rng.uniform(-3_000, 3_000, size=n_lines), 2)
+    # Formato brasileiro: ponto de milhar e vírgula decimal
+    formatted = [f"{abs(amount):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") for amount in amounts]
+    return [
+        f"{date} {description} R$ {'-' if amount < 0 else ''}{value}"
+        for date, description, amount, value in zip(dates.strftime("%d/%m/%Y"), descriptions, amounts, formatted)
+    ]
+
+
+def write_statement_pdf(lines: list, path: str, lines_per_page: int = STATEMENT_LINES_PER_PAGE):
+    """
+    Escreve as linhas em um PDF de texto simples (Helvetica, WinAnsi), sem dependências externas
+
+    O arquivo é lido normalmente pelo pdfminer, como um extrato bancário exportado.
+    """
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * index} 0 R' for index in range(len(pages)))}] "
+        f"/Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    for index, page in enumerate(pages):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page)
+        stream = "\n".join(["BT /F1 10 Tf 14 TL 40 800 Td", *(f"({line}) Tj T*" for line in escaped), "ET"])
+        stream = stream.encode("cp1252")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def _best_of(repeat: int, function, *args, **kwargs) -> float:
+    # Menor tempo entre as repetições (o menos afetado por ruído do sistema)
+    return min(_timed(function, *args, **kwargs)[1] for _ in range(repeat))
+
+
+def benchmark_catalog(n_products: int, repeat: int = 3) -> Dict:
+    """Tempos do FinancialAnalyzer para um cardápio de ``n_products`` produtos"""
+    products = generate_products(n_products)
+    analyzer = FinancialAnalyzer(products, 20_000.0, 6.0)
+    names = [product["name"] for product in products]
+    grid = {name: [product["price"] * 0.9, product["price"] * 1.1]
+            for name, product in zip(names[:100], products[:100])}
+
+    def fresh_cvp():
+        analyzer.invalidate()
+        return analyzer.get_cost_volume_profit_analysis()
+
+    def fresh_report():
+        analyzer.invalidate()
+        write_financial_report(io.StringIO(), analyzer, analyzer.get_cost_volume_profit_analysis(),
+                               analyzer.get_contribution_margin_analysis())
+
+    return {
+        "analyzer_construction_seconds": _best_of(repeat, FinancialAnalyzer, products, 20_000.0, 6.0),
+        "cvp_analysis_seconds": _best_of(repeat, fresh_cvp),
+        "price_simulation_seconds": _best_of(repeat, analyzer.simulate_price_changes, names[-1],
+                                             products[-1]["price"] * 1.1),
+        "price_grid_seconds": _best_of(repeat, analyzer.simulate_price_grid, grid),
+        "combo_analysis_seconds": _best_of(repeat, analyzer.calculate_combo_analysis, names[:3], 10.0),
+        "financial_report_seconds": _best_of(repeat, fresh_report)
+    }
+
+
+def benchmark_statement(n_lines: int, parse_pdf: bool = True, repeat: int = 3) -> Dict:
+    """Tempos de leitura, categorização, resumos e relatório para um extrato de ``n_lines`` linhas"""
+    lines = generate_statement_lines(n_lines)
+    analyzer = CashFlowAnalyzer()
+    result = {}
+    result["text_parsing_seconds"] = _best_of(repeat, parse_statement_lines, lines)
+    columns = parse_statement_lines(lines)
+    result["categorization_seconds"] = _best_of(repeat, analyzer._build_transactions, columns, "sintetico.pdf")
+    if parse_pdf:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "extrato.pdf")
+            write_statement_pdf(lines, path)
+            # Uma única leitura: o PDF é o passo mais lento e o mais estável
+            _, result["pdf_parsing_seconds"] = _timed(CashFlowAnalyzer().parse_statements, [path], workers=1)
+
+    analyzer.transactions = analyzer._build_transactions(columns, "sintetico.pdf")
+    result["monthly_summary_seconds"] = _best_of(repeat, analyzer.get_monthly_summary)
+    result["category_summary_seconds"] = _best_of(
+        repeat, lambda: (analyzer.get_category_summary("Inflow"), analyzer.get_category_summary("Outflow"))
+    )
+    result["cash_flow_report_seconds"] = _best_of(repeat, write_cash_flow_report, io.StringIO(), analyzer)
+    return result
+
+
+def run_suite(catalog_sizes=CATALOG_SIZES, statement_sizes=STATEMENT_SIZES, max_pdf_lines: int = MAX_PDF_LINES,
+              repeat: int = 3) -> Dict:
+    """
+    Executa a suíte completa
+
+    Returns:
+        Dicionário {"meta": ambiente, "results": {"caso[tamanho]": {métrica: segundos}}}
+    """
+    results = {}
+    for size in catalog_sizes:
+        results[f"catalog[{size}]"] = benchmark_catalog(size, repeat)
+    for size in statement_sizes:
+        results[f"statement[{size}]"] = benchmark_statement(size, parse_pdf=size <= max_pdf_lines, repeat=repeat)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float = 0.2, min_seconds: float = 0.02) -> list:
+    """
+    Lista as medições que ficaram mais lentas que a referência
+
+    Args:
+        current: Resultado de run_suite
+        baseline: Resultado de run_suite salvo anteriormente
+        tolerance: Aumento relativo aceito (0.2 = 20%)
+        min_seconds: Medições mais rápidas que isso nas duas execuções são ignoradas (ruído)
+
+    Returns:
+        Lista de dicionários com case, metric, baseline, current e ratio
+    """
+    regressions = []
+    for case, metrics in current["results"].items():
+        for metric, seconds in metrics.items():
+            reference = baseline.get("results", {}).get(case, {}).get(metric)
+            if reference is None or max(reference, seconds) < min_seconds:
+                continue
+            ratio = seconds / reference if reference > 0 else float("inf")
+            if ratio > 1 + tolerance:
+                regressions.append({"case": case, "metric": metric, "baseline": reference,
+                                    "current": seconds, "ratio": ratio})
+    return regressions
+
+
+def _print_result(name: str, result: Dict):
+    print(name)
+    for key, value in result.items():
+        print(f"  {key}: {value:,.4f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks da análise financeira e de fluxo de caixa")
+    parser.add_argument("--quick", action="store_true", help="Tamanhos menores, para uma verificação rápida")
+    parser.add_argument("--output", help="Arquivo JSON onde salvar os resultados")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior, para apontar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento relativo aceito (padrão: 0.2)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por medição (vale o menor tempo)")
+    parser.add_argument("--skip-comparisons", action="store_true",
+                        help="Não executa as comparações com as implementações antigas nem a inicialização")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        report = run_suite(QUICK_CATALOG_SIZES, QUICK_STATEMENT_SIZES, QUICK_MAX_PDF_LINES, args.repeat)
+    else:
+        report = run_suite(repeat=args.repeat)
+    for case, result in report["results"].items():
+        _print_result(case, result)
+
+    if not args.skip_comparisons:
+        report["comparisons"] = {
+            "categorization": benchmark_categorization(),
+            "period_summary": benchmark_period_summary(),
+            "timeline": benchmark_timeline(),
+            "analyzer_core": benchmark_analyzer_core(),
+            "instrumentation": benchmark_instrumentation(),
+            "forecast": benchmark_forecast(),
+            "startup": benchmark_startup()
+        }
+        for name, result in report["comparisons"].items():
+            _print_result(name, result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_results(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression['case']} {regression['metric']}: {regression['baseline']:.4f} s -> "
+                      f"{regression['current']:.4f} s ({regression['ratio']:.2f}x)")
+            return 1
+        print("Nenhuma regressão em relação à referência")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,206 @@
 import pandas as pd
+import numpy as np
+import os
 import re
-from datetime import datetime
-from pdfminer.high_level import extract_text
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from transaction_categorizer import TransactionCategorizer, categories_signature, normalize_text
+from transaction_store import TransactionStore
+from cash_flow_timeline import CashFlowTimeline, PERIOD_GRANULARITIES
+from statement_cache import StatementCache
+from instrumentation import instrumented, stage
 import io
 
+# Regex para capturar data, descrição e valor (considerando formato BRL e sinais)
+# Exemplo de linha: 01/01/2023 Descrição da Transação R$ 1.234,56 C
+# Exemplo de linha: 01/01/2023 Descrição da Transação R$ 1.234,56 D
+# Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56 C
+# Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56 D
+# Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56
+# Exemplo de linha: 01/01/2023 Descrição da Transação -1.234,56
+
+# Ajuste para o formato do extrato fornecido
+# O extrato fornecido tem o formato: Data Descrição Valor
+# Ex: 01/01/2025 SALÁRIO R$ 3.000,00
+# Ex: 05/01/2025 ALUGUEL R$ -1.500,00
+
+# Regex mais robusta para o formato do extrato fornecido
+# Captura a data (DD/MM/YYYY), a descrição (qualquer coisa até o valor) e o valor (com ou sem R$, com , para decimal e . para milhar, e opcionalmente sinal de -)
+# E também considera o formato de crédito/débito no final (C/D)
+
+# Tentativa 1: Formato DD/MM/YYYY Descrição R$ X.XXX,XX [C/D]
+# Tentativa 2: Formato DD/MM/YYYY Descrição X.XXX,XX [C/D]
+# Tentativa 3: Formato DD/MM/YYYY Descrição R$ -X.XXX,XX
+# Tentativa 4: Formato DD/MM/YYYY Descrição -X.XXX,XX
+
+# Ajuste para o extrato fornecido: 01/01/2025 SALÁRIO R$ 3.000,00
+#                                  05/01/2025 ALUGUEL R$ -1.500,00
+
+# Regex para o formato do extrato fornecido
+# Data (DD/MM/YYYY) - Descrição (letras maiúsculas, inclusive acentuadas) - Valor (R$ opcional, sinal opcional, números com . e ,)
+TRANSACTION_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{4})\s+([A-ZÀ-ÖØ-Ý\s]+)\s+R\$\s*([\-]?\d{1,3}(?:\.\d{3})*,\d{2})')
+
+TRANSACTION_COLUMNS = ["Date", "Description", "Amount", "Type", "Category", "Source"]
+
+
+def iter_pdf_lines(pdf_file):
+    """
+    Percorre o PDF página a página, gerando as linhas de texto de cada página
+
+    Ao contrário de ``extract_text``, nunca monta o texto do documento inteiro
+    em memória: cada página é descartada assim que suas linhas são consumidas.
+    """
+    # Importado no primeiro extrato lido, e não na inicialização do aplicativo
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    for page in extract_pages(pdf_file):
+        for element in page:
+            if isinstance(element, LTTextContainer):
+                yield from element.get_text().split('\n')
+
+
+def parse_statement_lines(lines) -> dict:
+    """Aplica a regex de transação às linhas e acumula o resultado em buffers colunares."""
+    dates, descriptions, amounts = [], [], []
+    for line in lines:
+        match = TRANSACTION_PATTERN.search(line)
+        if match:
+            date_str, description, amount_str = match.groups()
+            dates.append(date_str)
+            # Limpar a descrição de espaços extras
+            descriptions.append(description.strip())
+            # Remover o ponto de milhar e substituir a vírgula por ponto decimal
+            amounts.append(float(amount_str.replace('.', '').replace(',', '.')))
+    return {'Date': dates, 'Description': descriptions, 'Amount': amounts}
+
+
+def _extract_statement(pdf_file):
+    # Executado nos processos do pool: recebe um caminho ou os bytes do PDF e
+    # devolve buffers colunares (serializáveis) ou a mensagem de erro
+    try:
+        if isinstance(pdf_file, bytes):
+            pdf_file = io.BytesIO(pdf_file)
+        return parse_statement_lines(iter_pdf_lines(pdf_file)), None
+    except Exception as e:
+        return None, str(e)
+
+
+class _MemoryReader(io.RawIOBase):
+    """Arquivo somente leitura sobre um buffer já em memória (memoryview/bytearray), sem copiá-lo"""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast('B')
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._buffer[self._position:self._position + len(target)]
+        target[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._buffer)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _source_name(source, index: int = 0) -> str:
+    # Nome gravado na coluna Source: o do arquivo, quando conhecido
+    name = source if _is_path(source) else getattr(source, 'name', None)
+    return os.path.basename(str(name)) if name else f"extrato_{index + 1}.pdf"
+
+
+def _statement_input(source):
+    """
+    Prepara um extrato para o pdfminer
+
+    Aceita caminho, bytes, bytearray, memoryview ou objeto de arquivo (ex.: o
+    UploadedFile do Streamlit). Buffers em memória não são copiados: bytes vão
+    para um BytesIO (que compartilha o objeto) e os demais para um _MemoryReader.
+
+    Returns:
+        (objeto para o pdfminer, buffer para o hash do cache ou None)
+    """
+    if _is_path(source):
+        return source, None
+    if isinstance(source, bytes):
+        return io.BytesIO(source), source
+    if isinstance(source, (bytearray, memoryview)):
+        return _MemoryReader(source), source
+    if hasattr(source, 'getvalue'):
+        # BytesIO e UploadedFile: getvalue() de um BytesIO não modificado não copia o conteúdo
+        data = source.getvalue()
+        return io.BytesIO(data), data
+    data = source.read()
+    return io.BytesIO(data), data
+
+
+@dataclass(frozen=True)
+class StatementParseResult:
+    """Resultado de um processamento de extratos por CashFlowAnalyzer"""
+    transactions: pd.DataFrame
+    stats: dict
+    errors: dict                    # {nome do arquivo: mensagem de erro}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@dataclass(frozen=True)
+class TransactionPage:
+    """Uma página do resultado de CashFlowAnalyzer.query_transactions"""
+    rows: pd.DataFrame
+    total: int
+    page: int
+    page_size: int
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+
+def matches_search(descriptions: pd.Series, search: str) -> np.ndarray:
+    """Máscara das descrições que contêm ``search``, sem diferenciar acentos nem caixa"""
+    needle = normalize_text(search).lower()
+    # Extratos repetem muito as descrições: normaliza cada descrição distinta uma única vez
+    codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+    found = np.array([needle in normalize_text(str(value)).lower() for value in uniques], dtype=bool)
+    return found[codes] if len(codes) > 0 else np.zeros(0, dtype=bool)
+
+
 class CashFlowAnalyzer:
-    def __init__(self):
-        self.transactions = pd.DataFrame(columns=["Date", "Description", "Amount", "Type", "Category"])
+    def __init__(self, store: TransactionStore = None, account: str = "", cache: StatementCache = None):
+        # Com um TransactionStore, as transações são persistidas sem duplicatas e
+        # os resumos passam a ser agregações SQL sobre todo o histórico; o banco é
+        # a única cópia, e self.transactions não acumula os extratos processados.
+        # Com um StatementCache, PDFs já processados (mesmo conteúdo) não são lidos de novo.
+        self.store = store
+        self.account = account
+        self.cache = cache
+        self._dates = None
+        self._timeline = None
+        # Protege as transações acumuladas quando várias threads processam extratos
+        self._lock = threading.RLock()
+        self.transactions = pd.DataFrame(columns=TRANSACTION_COLUMNS)
+        self.last_parse_stats = {}
+        self._categorizer = None
         self.categories = {
             "inflow": {
                 "Salário/Recebimento": ["salario", "pagamento", "recebimento", "deposito", "credito"],
@@ -25,110 +219,284 @@ class CashFlowAnalyzer:
             }
         }
 
-    def parse_pdf_statement(self, pdf_file_path: str):
+    @property
+    def transactions(self) -> pd.DataFrame:
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions: pd.DataFrame):
+        # Mantém as transações ordenadas por data, o que permite busca binária nas consultas
+        if not transactions.empty and not transactions["Date"].is_monotonic_increasing:
+            transactions = transactions.sort_values("Date", kind="mergesort", ignore_index=True)
+        self._transactions = transactions
+        self._dates = None
+        self._timeline = None
+
+    def _date_index(self) -> np.ndarray:
+        if self._dates is None:
+            self._dates = self._transactions["Date"].to_numpy(dtype="datetime64[ns]")
+        return self._dates
+
+    def parse_pdf_statement(self, pdf_file) -> StatementParseResult:
+        """
+        Processa um extrato e junta suas transações às já carregadas
+
+        Args:
+            pdf_file: Caminho, bytes, bytearray, memoryview ou objeto de arquivo do PDF
+
+        Returns:
+            StatementParseResult com as transações lidas deste extrato
+        """
+        start = time.perf_counter()
+        name = _source_name(pdf_file)
         try:
-            text = extract_text(pdf_file_path)
+            columns = self._parse_file(pdf_file)
         except Exception as e:
             print(f"Erro ao extrair texto do PDF: {e}")
-            return
-
-        # Regex para capturar data, descrição e valor (considerando formato BRL e sinais)
-        # Exemplo de linha: 01/01/2023 Descrição da Transação R$ 1.234,56 C
-        # Exemplo de linha: 01/01/2023 Descrição da Transação R$ 1.234,56 D
-        # Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56 C
-        # Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56 D
-        # Exemplo de linha: 01/01/2023 Descrição da Transação 1.234,56
-        # Exemplo de linha: 01/01/2023 Descrição da Transação -1.234,56
-        
-        # Ajuste para o formato do extrato fornecido
-        # O extrato fornecido tem o formato: Data Descrição Valor
-        # Ex: 01/01/2025 SALÁRIO R$ 3.000,00
-        # Ex: 05/01/2025 ALUGUEL R$ -1.500,00
-        
-        # Regex mais robusta para o formato do extrato fornecido
-        # Captura a data (DD/MM/YYYY), a descrição (qualquer coisa até o valor) e o valor (com ou sem R$, com , para decimal e . para milhar, e opcionalmente sinal de -)
-        # E também considera o formato de crédito/débito no final (C/D)
-        
-        # Tentativa 1: Formato DD/MM/YYYY Descrição R$ X.XXX,XX [C/D]
-        # Tentativa 2: Formato DD/MM/YYYY Descrição X.XXX,XX [C/D]
-        # Tentativa 3: Formato DD/MM/YYYY Descrição R$ -X.XXX,XX
-        # Tentativa 4: Formato DD/MM/YYYY Descrição -X.XXX,XX
-        
-        # Ajuste para o extrato fornecido: 01/01/2025 SALÁRIO R$ 3.000,00
-        #                                  05/01/2025 ALUGUEL R$ -1.500,00
-        
-        # Regex para o formato do extrato fornecido
-        # Data (DD/MM/YYYY) - Descrição (qualquer coisa) - Valor (R$ opcional, sinal opcional, números com . e ,)
-        pattern = re.compile(r'(\d{2}/\d{2}/\d{4})\s+([A-Z\s]+)\s+R\$\s*([\-]?\d{1,3}(?:\.\d{3})*,\d{2})')
-
-        for line in text.split('\n'):
-            match = pattern.search(line)
-            if match:
-                date_str, description, amount_str = match.groups()
-                
-                # Limpar a descrição de espaços extras
-                description = description.strip()
-                
-                # Converter o valor para float
-                # Remover o ponto de milhar e substituir a vírgula por ponto decimal
-                amount_str = amount_str.replace('.', '').replace(',', '.')
-                amount = float(amount_str)
-                
-                date = datetime.strptime(date_str, '%d/%m/%Y')
-                
-                transaction_type = 'Inflow' if amount >= 0 else 'Outflow'
-                category = self._categorize_transaction(description, amount, transaction_type)
-                
-                self.transactions = pd.concat([
-                    self.transactions,
-                    pd.DataFrame([{
-                        'Date': date,
-                        'Description': description,
-                        'Amount': amount,
-                        'Type': transaction_type,
-                        'Category': category
-                    }])
-                ], ignore_index=True)
+            return self.add_parsed_statements([], start, errors={name: str(e)})
+        return self.add_parsed_statements([(name, columns)], start)
+
+    @instrumented('cash_flow.extract', rows=lambda columns: len(columns['Date']))
+    def _parse_file(self, pdf_file) -> dict:
+        pdf_input, buffer = _statement_input(pdf_file)
+        if self.cache is None:
+            return parse_statement_lines(iter_pdf_lines(pdf_input))
+        if buffer is None:
+            with open(pdf_input, 'rb') as f:
+                buffer = f.read()
+            pdf_input = io.BytesIO(buffer)
+        key = StatementCache.key_for(buffer)
+        columns = self.cache.get(key)
+        if columns is None:
+            columns = parse_statement_lines(iter_pdf_lines(pdf_input))
+            self.cache.put(key, columns)
+        return columns
+
+    def parse_statements(self, pdf_files, workers: int = None) -> StatementParseResult:
+        """
+        Processa vários extratos em paralelo e junta as transações, ordenadas por data
+
+        A extração do texto e a aplicação da regex rodam em um pool de processos
+        (o pdfminer é Python puro e limitado por CPU); a categorização e a
+        montagem do DataFrame acontecem no processo principal. A coluna
+        ``Source`` guarda o nome do arquivo de origem de cada transação.
+
+        Args:
+            pdf_files: Caminhos, bytes, memoryviews ou objetos de arquivo (ex.: uploads do Streamlit)
+            workers: Processos do pool (1 processa em sequência, sem pool)
+
+        Returns:
+            StatementParseResult com as transações novas, as estatísticas e os erros por arquivo
+        """
+        start = time.perf_counter()
+        pdf_files = list(pdf_files)
+        names = [_source_name(source, index) for index, source in enumerate(pdf_files)]
+        results = [None] * len(pdf_files)
+        keys = [None] * len(pdf_files)
+        inputs = [None] * len(pdf_files)
+        pending = []
+        for index, source in enumerate(pdf_files):
+            try:
+                pdf_input, buffer = _statement_input(source)
+                if self.cache is not None:
+                    if buffer is None:
+                        with open(pdf_input, 'rb') as f:
+                            buffer = f.read()
+                    keys[index] = StatementCache.key_for(buffer)
+                    columns = self.cache.get(keys[index])
+                    if columns is not None:
+                        results[index] = (columns, None)
+                        continue
+            except OSError as e:
+                results[index] = (None, str(e))
+                continue
+            inputs[index] = (pdf_input, buffer)
+            pending.append(index)
+
+        with stage('cash_flow.extract') as extract:
+            if workers == 1 or len(pending) <= 1:
+                extracted = [_extract_statement(inputs[index][0]) for index in pending]
+            else:
+                # O pool recebe caminhos ou bytes (serializáveis): só aqui um buffer em memória é copiado
+                payloads = [pdf_files[index] if _is_path(pdf_files[index]) else bytes(inputs[index][1])
+                            for index in pending]
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    extracted = list(executor.map(_extract_statement, payloads))
+            extract.rows = sum(len(columns['Date']) for columns, error in extracted if error is None)
+        for index, (columns, error) in zip(pending, extracted):
+            results[index] = (columns, error)
+            if self.cache is not None and error is None:
+                self.cache.put(keys[index], columns)
+
+        parsed, errors = [], {}
+        for name, (columns, error) in zip(names, results):
+            if error is not None:
+                print(f"Erro ao extrair texto do PDF {name}: {error}")
+                errors[name] = error
+                continue
+            parsed.append((name, columns))
+        return self.add_parsed_statements(parsed, start, errors)
+
+    def add_parsed_statements(self, parsed, start: float = None, errors: dict = None) -> StatementParseResult:
+        """
+        Categoriza e junta extratos cujo texto já foi extraído
+
+        Usado por parse_statements e pelo aplicativo quando a extração roda no
+        analysis_service: ``parsed`` são pares (nome do arquivo, buffers
+        colunares Date/Description/Amount, como os de parse_statement_lines).
+        Pode ser chamado de várias threads: só a junção às transações
+        acumuladas é serializada.
+        """
+        if start is None:
+            start = time.perf_counter()
+        frames = [self._build_transactions(columns, source) for source, columns in parsed]
+        with self._lock:
+            inserted = self._append_transactions(frames)
+            rows = sum(len(frame) for frame in frames)
+            stats = self._parse_stats(rows, len(frames), time.perf_counter() - start, inserted)
+            self.last_parse_stats = stats
+        transactions = pd.concat(frames, ignore_index=True) if len(frames) > 1 else (
+            frames[0] if frames else pd.DataFrame(columns=TRANSACTION_COLUMNS))
+        return StatementParseResult(transactions, stats, dict(errors or {}))
+
+    @instrumented('cash_flow.append')
+    def _append_transactions(self, frames) -> int:
+        frames = [frame for frame in frames if not frame.empty]
+        if self.store is not None:
+            # O banco é a única cópia do histórico: self.transactions não acumula os lotes
+            # (nem as duplicatas recusadas); resumos e consultas vêm do SQLite
+            inserted = sum(self.store.add_transactions(frame, self.account) for frame in frames)
+            if inserted:
+                # Extratos só com duplicatas não alteram os saldos; do contrário a linha do tempo é refeita
+                self._timeline = None
+            return inserted
+
+        timeline = self._timeline
+        if timeline is not None:
+            # Só as transações novas entram na linha do tempo, em vez de recalcular todo o histórico.
+            # Atualizada antes de self.transactions, para que uma falha não deixe os dois divergentes
+            for frame in frames:
+                timeline.add_transactions(frame)
+        combined = [self.transactions, *frames] if not self.transactions.empty else frames
+        if combined:
+            self.transactions = pd.concat(combined, ignore_index=True) if len(combined) > 1 else combined[0]
+        self._timeline = timeline
+        return None
+
+    @staticmethod
+    def _parse_stats(rows: int, files: int, elapsed: float, inserted: int = None) -> dict:
+        stats = {
+            'rows': rows,
+            'files': files,
+            'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed > 0 else 0.0
+        }
+        if inserted is not None:
+            stats['new_rows'] = inserted
+            stats['duplicate_rows'] = rows - inserted
+        return stats
+
+    @instrumented('cash_flow.categorize', rows=len)
+    def _build_transactions(self, columns: dict, source: str) -> pd.DataFrame:
+        # Materializa o DataFrame uma única vez a partir dos buffers colunares
+        parsed = pd.DataFrame({
+            'Date': pd.to_datetime(columns['Date'], format='%d/%m/%Y'),
+            'Description': columns['Description'],
+            'Amount': pd.Series(columns['Amount'], dtype=float)
+        })
+        parsed['Type'] = np.where(parsed['Amount'] >= 0, 'Inflow', 'Outflow')
+        parsed['Category'] = self._get_categorizer().categorize_series(parsed['Description'], parsed['Type'])
+        parsed['Source'] = source
+        return parsed[TRANSACTION_COLUMNS]
+
+    def _get_categorizer(self) -> TransactionCategorizer:
+        # Recompila as regras apenas quando self.categories muda
+        if self._categorizer is None or self._categorizer.signature != categories_signature(self.categories):
+            self._categorizer = TransactionCategorizer(self.categories)
+        return self._categorizer
 
     def _categorize_transaction(self, description: str, amount: float, transaction_type: str) -> str:
-        description = description.lower()
-        
-        if transaction_type == "Inflow":
-            for category, keywords in self.categories["inflow"].items():
-                for keyword in keywords:
-                    if keyword in description:
-                        return category
-            return "Outra Entrada"
-        else:
-            for category, keywords in self.categories["outflow"].items():
-                for keyword in keywords:
-                    if keyword in description:
-                        return category
-            return "Outra Saída"
+        return self._get_categorizer().categorize(description, transaction_type)
 
+    @instrumented('cash_flow.monthly_summary')
     def get_monthly_summary(self) -> pd.DataFrame:
+        if self.store is not None:
+            return self.store.monthly_summary()
         if self.transactions.empty:
             return pd.DataFrame(columns=["Month", "Year", "Total Inflow", "Total Outflow", "Net Flow"])
-        
-        self.transactions["MonthYear"] = self.transactions["Date"].dt.to_period("M")
-        
-        monthly_summary = self.transactions.groupby("MonthYear").apply(self._calculate_monthly_metrics).reset_index()
-        monthly_summary["Month"] = monthly_summary["MonthYear"].dt.month
-        monthly_summary["Year"] = monthly_summary["MonthYear"].dt.year
-        monthly_summary = monthly_summary[["Month", "Year", "Total Inflow", "Total Outflow", "Net Flow"]]
-        return monthly_summary
-
-    def _calculate_monthly_metrics(self, group):
-        total_inflow = group[group["Type"] == "Inflow"]["Amount"].sum()
-        total_outflow = group[group["Type"] == "Outflow"]["Amount"].sum()
-        net_flow = total_inflow + total_outflow  # Outflows are already negative
-        return pd.Series({
-            "Total Inflow": total_inflow,
-            "Total Outflow": total_outflow,
-            "Net Flow": net_flow
+
+        monthly_summary = self.get_period_summary("monthly")
+        monthly_summary["Month"] = monthly_summary["Period"].dt.month
+        monthly_summary["Year"] = monthly_summary["Period"].dt.year
+        return monthly_summary[["Month", "Year", "Total Inflow", "Total Outflow", "Net Flow"]]
+
+    @instrumented('cash_flow.period_summary')
+    def get_period_summary(self, granularity: str = "monthly", by_category: bool = False) -> pd.DataFrame:
+        """
+        Resume entradas, saídas e saldo por período, sem alterar self.transactions
+
+        Args:
+            granularity: "daily", "weekly", "monthly" ou "quarterly" (ou um código de período do pandas)
+            by_category: Se True, retorna o total por período, tipo e categoria
+
+        Returns:
+            DataFrame com Period, Total Inflow, Total Outflow e Net Flow, ou
+            Period, Type, Category e Total Amount quando by_category=True
+        """
+        # Com um TransactionStore, o SQLite agrega por dia e categoria; só esse resultado pequeno é reagrupado aqui
+        transactions = self.store.daily_category_totals() if self.store is not None else self.transactions
+        if transactions.empty:
+            columns = ["Period", "Type", "Category", "Total Amount"] if by_category else \
+                ["Period", "Total Inflow", "Total Outflow", "Net Flow"]
+            return pd.DataFrame(columns=columns)
+
+        periods = transactions["Date"].dt.to_period(PERIOD_GRANULARITIES.get(granularity, granularity))
+        # Uma única passada sobre as transações: soma por (período, tipo, categoria);
+        # os totais por período são derivados desse resultado, que é pequeno
+        by_period_category = transactions["Amount"].groupby(
+            [periods.rename("Period"), transactions["Type"], transactions["Category"]], sort=True
+        ).sum()
+        if by_category:
+            return by_period_category.reset_index(name="Total Amount")
+
+        totals = (
+            by_period_category.groupby(level=["Period", "Type"]).sum()
+            .unstack("Type", fill_value=0.0)
+            .reindex(columns=["Inflow", "Outflow"], fill_value=0.0)
+        )
+        summary = pd.DataFrame({
+            "Period": totals.index,
+            "Total Inflow": totals["Inflow"].to_numpy(),
+            "Total Outflow": totals["Outflow"].to_numpy()
         })
+        summary["Net Flow"] = summary["Total Inflow"] + summary["Total Outflow"]  # Outflows are already negative
+        return summary
+
+    @instrumented('cash_flow.timeline')
+    def get_timeline(self, opening_balance: float = 0.0) -> CashFlowTimeline:
+        """
+        Linha do tempo do saldo diário (ver CashFlowTimeline)
+
+        A linha do tempo fica guardada e é atualizada de forma incremental
+        quando novos extratos são processados; só é recriada se o saldo
+        inicial mudar ou se as transações forem substituídas.
 
+        Args:
+            opening_balance: Saldo em caixa antes da primeira transação
+
+        Returns:
+            CashFlowTimeline com os saldos diários
+        """
+        if self._timeline is None or self._timeline.opening_balance != opening_balance:
+            # Totais diários por tipo têm o mesmo sinal das transações: bastam para os saldos
+            transactions = self.store.daily_category_totals() if self.store is not None else self.transactions
+            self._timeline = CashFlowTimeline(opening_balance, transactions)
+        return self._timeline
+
+    @instrumented('cash_flow.category_summary')
     def get_category_summary(self, transaction_type: str) -> pd.DataFrame:
+        if self.store is not None:
+            return self.store.category_summary(transaction_type)
         if self.transactions.empty:
             return pd.DataFrame(columns=["Category", "Total Amount"])
         
@@ -138,7 +506,81 @@ class CashFlowAnalyzer:
         return category_summary
 
     def get_all_transactions(self) -> pd.DataFrame:
+        if self.store is not None:
+            return self.store.get_transactions()
         return self.transactions.copy()
 
+    @instrumented('cash_flow.query_transactions')
+    def query_transactions(self, start_date=None, end_date=None, transaction_type: str = None,
+                           categories=None, search: str = None, min_amount: float = None,
+                           max_amount: float = None, page: int = 0, page_size: int = 100) -> TransactionPage:
+        """
+        Consulta paginada das transações
+
+        O intervalo de datas é localizado por busca binária sobre as transações
+        (ordenadas por data); os demais filtros são aplicados só dentro desse
+        intervalo e apenas as linhas da página pedida são copiadas. Com um
+        TransactionStore, a consulta é feita no SQLite com LIMIT/OFFSET.
+
+        Args:
+            start_date: Data inicial (inclusive)
+            end_date: Data final (inclusive, até o fim do dia)
+            transaction_type: "Inflow" ou "Outflow"
+            categories: Uma categoria ou lista de categorias
+            search: Texto procurado na descrição (sem diferenciar acentos nem caixa)
+            min_amount: Valor mínimo (com sinal; saídas são negativas)
+            max_amount: Valor máximo (com sinal)
+            page: Número da página, a partir de 0
+            page_size: Transações por página
+
+        Returns:
+            TransactionPage com as linhas da página e o total de transações encontradas
+        """
+        if isinstance(categories, str):
+            categories = [categories]
+        page, page_size = max(0, int(page)), max(1, int(page_size))
+        start_date = pd.Timestamp(start_date) if start_date is not None else None
+        end_date = pd.Timestamp(end_date) if end_date is not None else None
+
+        if self.store is not None:
+            rows, total = self.store.query_transactions(
+                start_date=start_date, end_date=end_date, transaction_type=transaction_type,
+                categories=categories, search=search, min_amount=min_amount, max_amount=max_amount,
+                limit=page_size, offset=page * page_size
+            )
+            return TransactionPage(rows, total, page, page_size)
+
+        transactions = self.transactions
+        if transactions.empty:
+            return TransactionPage(pd.DataFrame(columns=TRANSACTION_COLUMNS), 0, page, page_size)
+
+        dates = self._date_index()
+        first = 0 if start_date is None else int(np.searchsorted(dates, start_date.to_datetime64(), side="left"))
+        last = len(dates) if end_date is None else int(np.searchsorted(
+            dates, (end_date.normalize() + pd.Timedelta(days=1)).to_datetime64(), side="left"
+        ))
+        window = transactions.iloc[first:max(first, last)]
+
+        filtered = any(value is not None for value in (transaction_type, categories, min_amount, max_amount)) \
+            or bool(search)
+        offset = page * page_size
+        if not filtered:
+            return TransactionPage(window.iloc[offset:offset + page_size].copy(), len(window), page, page_size)
+
+        mask = np.ones(len(window), dtype=bool)
+        if transaction_type is not None:
+            mask &= window["Type"].to_numpy() == transaction_type
+        if categories is not None:
+            mask &= window["Category"].isin(categories).to_numpy()
+        if min_amount is not None:
+            mask &= window["Amount"].to_numpy() >= min_amount
+        if max_amount is not None:
+            mask &= window["Amount"].to_numpy() <= max_amount
+        positions = np.flatnonzero(mask)
+        if search:
+            # A busca textual é a mais cara: roda só nas linhas que passaram pelos outros filtros
+            positions = positions[matches_search(window["Description"].iloc[positions], search)]
+        return TransactionPage(window.iloc[positions[offset:offset + page_size]].copy(), len(positions), page, page_size)
+
 
 
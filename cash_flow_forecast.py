@@ -0,0 +1,329 @@
+"""
+Previsão do fluxo de caixa.
+Projeta o saldo líquido por categoria para as próximas semanas a partir do
+histórico de transações (uma ou várias lojas):
+- pagamentos recorrentes (aluguel, contas de consumo etc.) são detectados pela
+  regularidade de datas e valores e projetados pelo próprio calendário;
+- o restante do fluxo é suavizado com Holt-Winters aditivo, ajustado de uma
+  vez para todas as séries (loja x categoria) e combinações de parâmetros, em
+  arrays NumPy;
+- os saldos projetados abaixo de um limite são sinalizados como falta de caixa.
+"""
+
+import itertools
+import numpy as np
+import pandas as pd
+from typing import Dict, Union
+
+from cash_flow_timeline import PERIOD_GRANULARITIES
+from instrumentation import instrumented
+from transaction_categorizer import normalize_text
+
+SEASON_LENGTHS = {"D": 7, "W": 52}
+ALPHAS = (0.1, 0.3, 0.5)
+BETAS = (0.0, 0.05)
+GAMMAS = (0.05, 0.2, 0.4)
+RECURRING_COLUMNS = ["Store", "Description", "Category", "Type", "Amount", "Interval Days", "Monthly",
+                     "Occurrences", "Last Date"]
+FORECAST_COLUMNS = ["Store", "Category", "Period", "Recurring", "Smoothed", "Net Flow"]
+SHORTFALL_COLUMNS = ["Store", "Period", "Net Flow", "Projected Balance", "Shortfall"]
+
+
+def _recurring_groups(transactions: pd.DataFrame, store_column: str = None):
+    # Agrupa por (loja, descrição sem acentos e caixa, tipo) com códigos inteiros:
+    # cada texto distinto é normalizado e fatorado uma única vez
+    stores = transactions[store_column] if store_column else pd.Series("", index=transactions.index)
+    store_codes, _ = pd.factorize(stores)
+    description_codes, descriptions = pd.factorize(transactions["Description"])
+    key_codes, keys = pd.factorize(np.array([normalize_text(str(value)).lower() for value in descriptions],
+                                            dtype=object))
+    type_codes, types = pd.factorize(transactions["Type"])
+    combined = (store_codes.astype(np.int64) * len(keys) + key_codes[description_codes]) * len(types) + type_codes
+    groups, _ = pd.factorize(combined)
+    frame = pd.DataFrame({
+        "Group": groups, "Store": stores.to_numpy(), "Description": transactions["Description"].to_numpy(),
+        "Category": transactions["Category"].to_numpy(), "Type": transactions["Type"].to_numpy(),
+        "Date": transactions["Date"].to_numpy(dtype="datetime64[ns]"), "Amount": transactions["Amount"].to_numpy()
+    })
+
+    order = np.lexsort((frame["Date"].to_numpy(), groups))
+    sorted_groups = groups[order]
+    intervals = np.diff(frame["Date"].to_numpy()[order]) / np.timedelta64(1, "D")
+    frame["Interval"] = np.nan
+    frame.loc[order[1:][sorted_groups[1:] == sorted_groups[:-1]], "Interval"] = \
+        intervals[sorted_groups[1:] == sorted_groups[:-1]]
+    return groups, frame.iloc[order]
+
+
+def _select_recurring(groups_frame: pd.DataFrame, min_occurrences: int, max_interval_deviation: float,
+                      max_amount_deviation: float) -> pd.DataFrame:
+    # Agregações só sobre colunas numéricas; os textos vêm da primeira/última linha de cada grupo
+    stats = groups_frame.groupby("Group", sort=False).agg(
+        Occurrences=("Date", "size"), Last=("Date", "last"), Amount=("Amount", "median"),
+        Interval=("Interval", "median"), IntervalStd=("Interval", "std"),
+        AmountMin=("Amount", "min"), AmountMax=("Amount", "max")
+    )
+    groups = groups_frame["Group"].to_numpy()
+    boundaries = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    first, last = np.r_[0, boundaries], np.r_[boundaries - 1, len(groups) - 1]
+    for column, positions in (("Store", first), ("Description", first), ("Type", first), ("Category", last)):
+        stats[column] = pd.Series(groups_frame[column].to_numpy()[positions], index=groups[first])
+    spread = np.maximum(stats["Amount"].abs() * max_amount_deviation, 0.01)
+    recurring = stats[
+        (stats["Occurrences"] >= min_occurrences)
+        & (stats["Interval"] >= 1)
+        & (stats["IntervalStd"].fillna(0) <= max_interval_deviation)
+        & ((stats["AmountMax"] - stats["Amount"]) <= spread)
+        & ((stats["Amount"] - stats["AmountMin"]) <= spread)
+    ]
+    return pd.DataFrame({
+        "Store": recurring["Store"], "Description": recurring["Description"], "Category": recurring["Category"],
+        "Type": recurring["Type"], "Amount": recurring["Amount"], "Interval Days": recurring["Interval"],
+        "Monthly": recurring["Interval"].between(28, 31), "Occurrences": recurring["Occurrences"],
+        "Last Date": recurring["Last"]
+    }, columns=RECURRING_COLUMNS)
+
+
+def detect_recurring(transactions: pd.DataFrame, store_column: str = None, min_occurrences: int = 3,
+                     max_interval_deviation: float = 3.0, max_amount_deviation: float = 0.1) -> pd.DataFrame:
+    """
+    Detecta pagamentos e recebimentos recorrentes
+
+    Uma transação é recorrente quando a mesma descrição (sem acentos e caixa)
+    aparece ao menos ``min_occurrences`` vezes em intervalos regulares e com
+    valores parecidos. Intervalos de 28 a 31 dias são tratados como mensais.
+
+    Args:
+        transactions: DataFrame no formato de CashFlowAnalyzer.transactions
+        store_column: Coluna que identifica a loja (None para uma única loja)
+        min_occurrences: Número mínimo de ocorrências
+        max_interval_deviation: Desvio padrão máximo dos intervalos, em dias
+        max_amount_deviation: Desvio máximo dos valores, relativo à mediana
+
+    Returns:
+        DataFrame com uma linha por recorrência (RECURRING_COLUMNS)
+    """
+    if transactions.empty:
+        return pd.DataFrame(columns=RECURRING_COLUMNS)
+    _, groups_frame = _recurring_groups(transactions, store_column)
+    recurring = _select_recurring(groups_frame, min_occurrences, max_interval_deviation, max_amount_deviation)
+    return recurring.reset_index(drop=True)
+
+
+def project_recurring(recurring: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Datas e valores previstos das recorrências entre ``start`` (exclusive) e ``end`` (inclusive)
+
+    Recorrências mensais mantêm o dia do mês (limitado ao último dia do mês);
+    as demais seguem o intervalo mediano em dias.
+
+    Returns:
+        DataFrame com Store, Category, Date e Amount
+    """
+    if recurring.empty:
+        return pd.DataFrame(columns=["Store", "Category", "Date", "Amount"])
+    start, end = np.datetime64(pd.Timestamp(start), "D"), np.datetime64(pd.Timestamp(end), "D")
+    last = recurring["Last Date"].to_numpy(dtype="datetime64[D]")
+    interval = recurring["Interval Days"].round().clip(lower=1).to_numpy(dtype=np.int64)
+    monthly = recurring["Monthly"].to_numpy(dtype=bool)
+    steps = np.arange(1, max(1, int((end - last.min()) / np.timedelta64(1, "D")) // int(interval.min()) + 1) + 1)
+
+    # Uma linha por (recorrência, passo): datas por intervalo em dias ou por mês de calendário
+    by_days = last[:, None] + interval[:, None] * steps[None, :]
+    months = last.astype("datetime64[M]")[:, None] + steps[None, :]
+    day_of_month = (last - last.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)[:, None]
+    month_length = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+    by_month = months.astype("datetime64[D]") + np.minimum(day_of_month, month_length - 1)
+    dates = np.where(monthly[:, None], by_month, by_days)
+
+    rows, columns = np.nonzero((dates > start) & (dates <= end))
+    return pd.DataFrame({
+        "Store": recurring["Store"].to_numpy()[rows],
+        "Category": recurring["Category"].to_numpy()[rows],
+        "Date": pd.to_datetime(dates[rows, columns]),
+        "Amount": recurring["Amount"].to_numpy()[rows]
+    })
+
+
+def fit_holt_winters(series: np.ndarray, season_length: int, horizon: int,
+                     alphas=ALPHAS, betas=BETAS, gammas=GAMMAS) -> np.ndarray:
+    """
+    Holt-Winters aditivo ajustado para várias séries ao mesmo tempo
+
+    Cada série é ajustada com todas as combinações de parâmetros em paralelo
+    (arrays de séries x combinações) e fica com a de menor erro quadrático
+    um passo à frente. Séries com menos de duas temporadas usam só nível e
+    tendência.
+
+    Args:
+        series: Matriz (séries x períodos) com o histórico
+        season_length: Períodos por temporada (ex.: 52 semanas)
+        horizon: Períodos a prever
+        alphas, betas, gammas: Valores testados para nível, tendência e sazonalidade
+
+    Returns:
+        Matriz (séries x horizon) com a previsão
+    """
+    n_series, n_periods = series.shape
+    if n_series == 0 or n_periods == 0:
+        return np.zeros((n_series, horizon))
+    if n_periods < 2 * season_length:
+        season_length, gammas = 1, (0.0,)
+    grid = np.array(list(itertools.product(alphas, betas, gammas)), dtype=float)
+    alpha, beta, gamma = (np.repeat(grid[None, :, k], n_series, axis=0).ravel() for k in range(3))
+    values = np.repeat(series, len(grid), axis=0)
+    rows = np.arange(len(values))
+
+    # Estado inicial: nível = média da primeira temporada, sazonalidade = desvios dessa média
+    level = values[:, :season_length].mean(axis=1)
+    trend = np.zeros(len(values))
+    season = values[:, :season_length] - level[:, None] if season_length > 1 else np.zeros((len(values), 1))
+    errors = np.zeros(len(values))
+    for t in range(n_periods):
+        position = t % season_length
+        seasonal = season[rows, position]
+        error = values[:, t] - (level + trend + seasonal)
+        errors += error * error
+        new_level = alpha * (values[:, t] - seasonal) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[rows, position] = gamma * (values[:, t] - new_level) + (1 - gamma) * seasonal
+        level = new_level
+
+    best = rows.reshape(n_series, len(grid))[np.arange(n_series), errors.reshape(n_series, len(grid)).argmin(axis=1)]
+    steps = np.arange(1, horizon + 1)
+    positions = (n_periods + steps - 1) % season_length
+    return level[best, None] + trend[best, None] * steps[None, :] + season[best][:, positions]
+
+
+class CashFlowForecaster:
+    """Previsão do fluxo líquido por loja e categoria, com alerta de falta de caixa"""
+
+    def __init__(self, horizon_weeks: int = 8, granularity: str = "weekly", season_length: int = None,
+                 min_occurrences: int = 3):
+        """
+        Args:
+            horizon_weeks: Semanas a projetar
+            granularity: "daily" ou "weekly"
+            season_length: Períodos por temporada (padrão: 7 dias ou 52 semanas)
+            min_occurrences: Ocorrências mínimas para considerar uma transação recorrente
+        """
+        self.freq = PERIOD_GRANULARITIES.get(granularity, granularity)
+        if self.freq not in SEASON_LENGTHS:
+            raise ValueError(f"Granularidade não suportada: {granularity}")
+        self.horizon = horizon_weeks * 7 if self.freq == "D" else horizon_weeks
+        self.season_length = season_length or SEASON_LENGTHS[self.freq]
+        self.min_occurrences = min_occurrences
+        self.recurring = pd.DataFrame(columns=RECURRING_COLUMNS)
+        self.closing_balances = pd.Series(dtype=float)
+        self._forecast = pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    @instrumented('forecast.fit')
+    def fit(self, transactions: Union[pd.DataFrame, Dict[str, pd.DataFrame]], store_column: str = None,
+            opening_balances: Union[float, Dict[str, float]] = 0.0):
+        """
+        Ajusta o modelo e calcula a previsão
+
+        Args:
+            transactions: Transações (CashFlowAnalyzer.transactions) ou dicionário {loja: transações}
+            store_column: Coluna da loja, quando todas as lojas vêm em um único DataFrame
+            opening_balances: Saldo inicial (único ou por loja) antes da primeira transação
+
+        Returns:
+            O próprio CashFlowForecaster
+        """
+        if isinstance(transactions, dict):
+            transactions = pd.concat(
+                [frame.assign(Store=store) for store, frame in transactions.items()], ignore_index=True
+            ) if transactions else pd.DataFrame(columns=["Date", "Description", "Amount", "Type", "Category", "Store"])
+            store_column = "Store"
+        stores = transactions[store_column].to_numpy() if store_column else np.full(len(transactions), "")
+        if transactions.empty:
+            self.recurring = pd.DataFrame(columns=RECURRING_COLUMNS)
+            self.closing_balances = pd.Series(dtype=float)
+            self._forecast = pd.DataFrame(columns=FORECAST_COLUMNS)
+            return self
+
+        opening = pd.Series(opening_balances) if isinstance(opening_balances, dict) else None
+        totals = pd.Series(transactions["Amount"].to_numpy(), index=stores).groupby(level=0).sum()
+        self.closing_balances = totals + (opening.reindex(totals.index, fill_value=0.0) if opening is not None
+                                          else opening_balances)
+
+        groups, groups_frame = _recurring_groups(transactions, store_column)
+        recurring = _select_recurring(groups_frame, self.min_occurrences, 3.0, 0.1)
+        # Só continuam valendo as recorrências vistas nos dois últimos intervalos do histórico
+        history_end = transactions["Date"].max()
+        recurring = recurring[
+            recurring["Last Date"] >= history_end - pd.to_timedelta(2 * recurring["Interval Days"], unit="D")
+        ]
+        is_recurring = np.isin(groups, recurring.index.to_numpy())
+        self.recurring = recurring.reset_index(drop=True)
+
+        # Histórico sem as recorrências, somado por (loja, categoria, período) em uma matriz densa;
+        # um último período incompleto (ex.: semana cortada pelo fim do extrato) fica fora do ajuste
+        # e passa a ser o primeiro período previsto
+        ordinals = pd.PeriodIndex(transactions["Date"].dt.to_period(self.freq)).asi8
+        first_forecast = (history_end + pd.Timedelta(days=1)).to_period(self.freq)
+        n_periods = int(first_forecast.ordinal - ordinals.min())
+        period_index = ordinals - ordinals.min()
+        in_history = period_index < n_periods
+        store_codes, store_names = pd.factorize(stores)
+        category_codes, categories = pd.factorize(transactions["Category"])
+        series_codes, series_ids = pd.factorize(store_codes.astype(np.int64) * len(categories) + category_codes)
+        series_stores = np.asarray(store_names, dtype=object)[series_ids // len(categories)]
+        series_categories = np.asarray(categories, dtype=object)[series_ids % len(categories)]
+        history = np.zeros((len(series_ids), n_periods))
+        amounts = np.where(is_recurring, 0.0, transactions["Amount"].to_numpy(dtype=float))
+        np.add.at(history, (series_codes[in_history], period_index[in_history]), amounts[in_history])
+
+        smoothed = fit_holt_winters(history, self.season_length, self.horizon)
+        future = pd.period_range(first_forecast, periods=self.horizon, freq=self.freq)
+        forecast = pd.DataFrame({
+            "Store": np.repeat(series_stores, self.horizon),
+            "Category": np.repeat(series_categories, self.horizon),
+            "Period": np.tile(future, len(series_ids)),
+            "Smoothed": smoothed.ravel()
+        })
+
+        scheduled = project_recurring(self.recurring, history_end, future[-1].end_time)
+        if not scheduled.empty:
+            scheduled = scheduled.assign(Period=scheduled["Date"].dt.to_period(self.freq)) \
+                .groupby(["Store", "Category", "Period"], as_index=False)["Amount"].sum()
+            forecast = forecast.merge(scheduled.rename(columns={"Amount": "Recurring"}),
+                                      on=["Store", "Category", "Period"], how="outer")
+        else:
+            forecast["Recurring"] = 0.0
+        forecast[["Recurring", "Smoothed"]] = forecast[["Recurring", "Smoothed"]].fillna(0.0)
+        forecast["Net Flow"] = forecast["Recurring"] + forecast["Smoothed"]
+        self._forecast = forecast.sort_values(["Store", "Period", "Category"], ignore_index=True)[FORECAST_COLUMNS]
+        return self
+
+    def forecast(self, by_category: bool = True) -> pd.DataFrame:
+        """
+        Fluxo líquido previsto por período
+
+        Args:
+            by_category: Se False, soma as categorias de cada loja
+
+        Returns:
+            DataFrame com Store, Category, Period, Recurring, Smoothed e Net Flow
+        """
+        if by_category:
+            return self._forecast.copy()
+        return self._forecast.groupby(["Store", "Period"], as_index=False, sort=True)[
+            ["Recurring", "Smoothed", "Net Flow"]
+        ].sum()
+
+    def shortfalls(self, threshold: float = 0.0) -> pd.DataFrame:
+        """
+        Saldo projetado por loja e período, sinalizando os períodos abaixo de ``threshold``
+
+        Returns:
+            DataFrame com Store, Period, Net Flow, Projected Balance e Shortfall
+        """
+        totals = self.forecast(by_category=False)
+        if totals.empty:
+            return pd.DataFrame(columns=SHORTFALL_COLUMNS)
+        totals["Projected Balance"] = totals.groupby("Store")["Net Flow"].cumsum() \
+            + totals["Store"].map(self.closing_balances).fillna(0.0)
+        totals["Shortfall"] = totals["Projected Balance"] < threshold
+        return totals[SHORTFALL_COLUMNS]
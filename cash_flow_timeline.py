@@ -0,0 +1,155 @@
+"""
+Linha do tempo da posição de caixa.
+Calcula o saldo diário acumulado a partir de um saldo inicial, o saldo mínimo e
+máximo de cada período e os dias abaixo de um limite (ex.: zero antes da folha
+de pagamento). Os valores são acumulados em centavos por dia em arrays NumPy;
+novas transações atualizam apenas os dias a partir da data mais antiga
+recebida, sem refazer o histórico inteiro.
+"""
+
+import numpy as np
+import pandas as pd
+
+PERIOD_GRANULARITIES = {"daily": "D", "weekly": "W", "monthly": "M", "quarterly": "Q"}
+DAILY_COLUMNS = ["Date", "Total Inflow", "Total Outflow", "Net Flow", "Balance"]
+PERIOD_COLUMNS = ["Period", "Opening Balance", "Closing Balance", "Min Balance", "Max Balance",
+                  "Min Balance Date", "Days Below Threshold"]
+DAY = np.timedelta64(1, "D")
+
+
+class CashFlowTimeline:
+    """Saldo de caixa dia a dia, atualizado de forma incremental"""
+
+    def __init__(self, opening_balance: float = 0.0, transactions: pd.DataFrame = None):
+        """
+        Args:
+            opening_balance: Saldo em caixa antes da primeira transação
+            transactions: Transações iniciais, no formato de CashFlowAnalyzer.transactions
+        """
+        self.opening_balance = opening_balance
+        self._opening_cents = int(round(opening_balance * 100))
+        self._start = None                                   # datetime64[D] do primeiro dia
+        self._inflow = np.zeros(0, dtype=np.int64)           # centavos por dia
+        self._outflow = np.zeros(0, dtype=np.int64)
+        self._balance = np.zeros(0, dtype=np.int64)          # saldo no fim de cada dia
+        if transactions is not None:
+            self.add_transactions(transactions)
+
+    def __len__(self) -> int:
+        return len(self._balance)
+
+    @property
+    def empty(self) -> bool:
+        return len(self._balance) == 0
+
+    def _grow(self, first_day, last_day):
+        # Amplia o intervalo de dias coberto, preenchendo os novos dias com movimento zero
+        if self._start is None:
+            self._start = first_day
+        before = max(0, int((self._start - first_day) / DAY))
+        # Medido a partir do início atual: os dias acrescentados antes não contam aqui
+        after = max(0, int((last_day - self._start) / DAY) + 1 - len(self._balance))
+        if before or after:
+            self._inflow = np.pad(self._inflow, (before, after))
+            self._outflow = np.pad(self._outflow, (before, after))
+            self._balance = np.pad(self._balance, (before, after))
+            self._start = self._start - before * DAY
+
+    def add_transactions(self, transactions: pd.DataFrame):
+        """
+        Acrescenta transações e atualiza os saldos
+
+        Só os dias a partir da transação mais antiga recebida (ou do fim do
+        intervalo anterior, se ele for ampliado) são recalculados; no caso comum
+        (extrato do mês seguinte) isso é apenas o período novo.
+
+        Args:
+            transactions: DataFrame com as colunas Date e Amount (saídas negativas)
+        """
+        if transactions.empty:
+            return
+        days = transactions["Date"].to_numpy(dtype="datetime64[D]")
+        cents = np.round(transactions["Amount"].to_numpy(dtype=float) * 100).astype(np.int64)
+        first_day, last_day = days.min(), days.max()
+        old_start, old_length = self._start, len(self._balance)
+        self._grow(first_day, last_day)
+        # Fim do intervalo anterior, já no índice após o crescimento
+        old_end = int((old_start - self._start) / DAY) + old_length if old_start is not None else 0
+
+        offsets = ((days - self._start) / DAY).astype(np.intp)
+        size = len(self._balance)
+        self._inflow += np.bincount(offsets, weights=np.where(cents > 0, cents, 0), minlength=size).astype(np.int64)
+        self._outflow += np.bincount(offsets, weights=np.where(cents < 0, cents, 0), minlength=size).astype(np.int64)
+
+        # Dias acrescentados depois do fim anterior (inclusive os sem movimento, preenchidos
+        # com zero) também precisam do saldo acumulado
+        first = min(int(offsets.min()), old_end)
+        previous = self._balance[first - 1] if first > 0 else self._opening_cents
+        self._balance[first:] = previous + np.cumsum(self._inflow[first:] + self._outflow[first:])
+
+    def daily_balances(self) -> pd.DataFrame:
+        """
+        Saldo no fim de cada dia, incluindo os dias sem movimento
+
+        Returns:
+            DataFrame com Date, Total Inflow, Total Outflow, Net Flow e Balance
+        """
+        if self.empty:
+            return pd.DataFrame(columns=DAILY_COLUMNS)
+        return pd.DataFrame({
+            "Date": pd.to_datetime(self._start + np.arange(len(self._balance)) * DAY),
+            "Total Inflow": self._inflow / 100,
+            "Total Outflow": self._outflow / 100,
+            "Net Flow": (self._inflow + self._outflow) / 100,
+            "Balance": self._balance / 100
+        })
+
+    def balance_on(self, date) -> float:
+        """Saldo no fim do dia ``date`` (o saldo inicial antes da primeira transação)"""
+        if self.empty:
+            return self.opening_balance
+        offset = int((np.datetime64(pd.Timestamp(date), "D") - self._start) / DAY)
+        if offset < 0:
+            return self.opening_balance
+        return self._balance[min(offset, len(self._balance) - 1)] / 100
+
+    def days_below(self, threshold: float = 0.0) -> int:
+        """Número de dias que terminaram com saldo abaixo de ``threshold``"""
+        return int(np.count_nonzero(self._balance < round(threshold * 100)))
+
+    def period_summary(self, granularity: str = "monthly", threshold: float = 0.0) -> pd.DataFrame:
+        """
+        Saldo inicial, final, mínimo e máximo por período, e dias abaixo do limite
+
+        Args:
+            granularity: "daily", "weekly", "monthly" ou "quarterly" (ou um código de período do pandas)
+            threshold: Saldo mínimo desejado; conta os dias que terminaram abaixo dele
+
+        Returns:
+            DataFrame com Period, Opening Balance, Closing Balance, Min Balance,
+            Max Balance, Min Balance Date e Days Below Threshold
+        """
+        if self.empty:
+            return pd.DataFrame(columns=PERIOD_COLUMNS)
+        dates = pd.DatetimeIndex(self._start + np.arange(len(self._balance)) * DAY)
+        periods = dates.to_period(PERIOD_GRANULARITIES.get(granularity, granularity))
+        # Os dias são contínuos e ordenados: cada período é um bloco contíguo do array
+        codes, uniques = pd.factorize(periods)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)] - 1
+
+        balance = self._balance
+        below = (balance < round(threshold * 100)).astype(np.int64)
+        # Posição do mínimo de cada bloco: ordena por (bloco, saldo) e pega o primeiro de cada bloco
+        order = np.lexsort((balance, codes))
+        min_positions = order[starts]
+        opening = np.r_[self._opening_cents, balance[:-1]][starts]
+        return pd.DataFrame({
+            "Period": uniques,
+            "Opening Balance": opening / 100,
+            "Closing Balance": balance[ends] / 100,
+            "Min Balance": np.minimum.reduceat(balance, starts) / 100,
+            "Max Balance": np.maximum.reduceat(balance, starts) / 100,
+            "Min Balance Date": dates[min_positions],
+            "Days Below Threshold": np.add.reduceat(below, starts)
+        })
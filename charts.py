@@ -0,0 +1,48 @@
+"""
+Módulo de gráficos do aplicativo
+Monta as figuras do plotly usadas nas telas de análise. O plotly é importado
+apenas na primeira figura criada, e não na inicialização do aplicativo.
+"""
+
+import pandas as pd
+
+from instrumentation import instrumented
+
+
+def _express():
+    import plotly.express as px
+    return px
+
+
+@instrumented('charts.contribution_margin_bar')
+def contribution_margin_bar(contribution_analysis: pd.DataFrame):
+    """Barras da margem de contribuição (%) de cada produto"""
+    figure = _express().bar(contribution_analysis, x='name', y='contribution_margin_percent',
+                            title='Margem de Contribuição por Produto (%)',
+                            labels={'contribution_margin_percent': 'Margem (%)', 'name': 'Produto'},
+                            color='contribution_margin_percent',
+                            color_continuous_scale='RdYlGn')
+    figure.update_layout(showlegend=False, xaxis_tickangle=-45)
+    return figure
+
+
+@instrumented('charts.contribution_pie')
+def contribution_pie(contribution_analysis: pd.DataFrame):
+    """Pizza da participação de cada produto na margem de contribuição total"""
+    return _express().pie(contribution_analysis, values='total_contribution', names='name',
+                          title='Participação na Margem de Contribuição Total')
+
+
+@instrumented('charts.category_pie')
+def category_pie(category_summary: pd.DataFrame, title: str):
+    """Pizza dos valores por categoria (resultado de get_category_summary)"""
+    return _express().pie(category_summary, values='Total Amount', names='Category', title=title)
+
+
+@instrumented('charts.balance_line')
+def balance_line(daily_balances: pd.DataFrame, threshold: float = 0.0):
+    """Linha do saldo diário (resultado de CashFlowTimeline.daily_balances), com o limite mínimo"""
+    figure = _express().line(daily_balances, x='Date', y='Balance', title='Saldo Diário em Caixa',
+                             labels={'Date': 'Data', 'Balance': 'Saldo (R$)'})
+    figure.add_hline(y=threshold, line_dash='dash', line_color='red')
+    return figure
@@ -0,0 +1,168 @@
+"""
+Módulo de busca de combos
+Procura, em todo o cardápio, os melhores combos de 2 a 4 produtos para vários
+níveis de desconto, usando as mesmas regras de calculate_combo_analysis.
+A busca usa branch-and-bound sobre limites superiores da margem, o que a
+mantém viável em cardápios com centenas de produtos, e os combos encontrados
+são avaliados em lote com arrays de índices do NumPy.
+"""
+
+import heapq
+import time
+import numpy as np
+import pandas as pd
+from typing import List, Sequence
+
+from financial_analysis import FinancialAnalyzer
+
+SORT_KEYS = ('combo_margin', 'incremental_contribution')
+
+
+class ComboSearchEngine:
+    """Busca dos combos mais lucrativos a partir de um FinancialAnalyzer"""
+
+    def __init__(self, analyzer: FinancialAnalyzer, uptake_rate: float = 0.1, cannibalization: float = 0.5):
+        """
+        Inicializa o motor de busca
+
+        A contribuição incremental estimada de um combo é
+        ``uptake_rate * min(quantidades) * (margem do combo - cannibalization * soma das margens individuais)``:
+        parte dos clientes do produto menos vendido passa a comprar o combo, e uma
+        fração dessas vendas já aconteceria de qualquer forma, item a item.
+
+        Args:
+            analyzer: Analisador com os produtos do cardápio
+            uptake_rate: Fração das vendas do item menos vendido que vira combo
+            cannibalization: Fração das vendas do combo que substitui vendas avulsas
+        """
+        arrays = analyzer.arrays
+        self.names = arrays['name'].copy()
+        self.price = arrays['price'].copy()
+        self.cost = arrays['cost'].copy()
+        self.quantity = arrays['quantity'].copy()
+        self.contribution_margin = arrays['contribution_margin'].copy()
+        self.contribution_margin_percent = arrays['contribution_margin_percent'].copy()
+        self.uptake_rate = uptake_rate
+        self.cannibalization = cannibalization
+        self.last_search_stats = {}
+
+    def _item_weights(self, discount_percent: float, sort_by: str) -> np.ndarray:
+        # Ambas as métricas são somas por item: (1 - d) * preço - custo (- canibalização da margem avulsa)
+        weights = self.price * (1 - discount_percent / 100) - self.cost
+        if sort_by == 'incremental_contribution':
+            weights = weights - self.cannibalization * self.contribution_margin
+        return weights
+
+    def _branch_and_bound(self, weights: np.ndarray, size: int, top_n: int, sort_by: str):
+        order = np.argsort(-weights, kind='stable')
+        sorted_weights = weights[order].tolist()
+        sorted_quantity = self.quantity[order].tolist()
+        prefix = np.concatenate([[0.0], np.cumsum(weights[order])]).tolist()
+        n = len(sorted_weights)
+        use_volume = sort_by == 'incremental_contribution'
+        volume_cap = max(sorted_quantity) * self.uptake_rate if sorted_quantity else 0.0
+        heap: List = []
+        chosen: List[int] = []
+        nodes = 0
+
+        def search(start: int, partial: float, volume: float):
+            nonlocal nodes
+            nodes += 1
+            remaining = size - len(chosen)
+            if remaining == 0:
+                score = partial * volume if use_volume else partial
+                entry = (score, tuple(order[index] for index in chosen))
+                if len(heap) < top_n:
+                    heapq.heappush(heap, entry)
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+                return
+            for position in range(start, n - remaining + 1):
+                # Melhor complemento possível: os próximos itens de maior peso (pesos em ordem decrescente)
+                best = partial + prefix[position + remaining] - prefix[position]
+                bound = (best * volume if best > 0 else 0.0) if use_volume else best
+                if len(heap) == top_n and bound <= heap[0][0]:
+                    break  # o limite só diminui para posições seguintes
+                chosen.append(position)
+                item_volume = sorted_quantity[position] * self.uptake_rate
+                search(position + 1, partial + sorted_weights[position], min(volume, item_volume))
+                chosen.pop()
+
+        search(0, 0.0, volume_cap)
+        return [combo for _, combo in heap], nodes
+
+    def _evaluate(self, combos: np.ndarray, discounts: np.ndarray) -> pd.DataFrame:
+        # Avaliação em lote: cada linha de ``combos`` contém os índices dos produtos (-1 = posição vazia)
+        mask = combos >= 0
+        safe = np.where(mask, combos, 0)
+        size = mask.sum(axis=1)
+        original_price = np.where(mask, self.price[safe], 0.0).sum(axis=1)
+        total_cost = np.where(mask, self.cost[safe], 0.0).sum(axis=1)
+        discounted_price = original_price * (1 - discounts / 100)
+        combo_margin = discounted_price - total_cost
+        with np.errstate(divide='ignore', invalid='ignore'):
+            combo_margin_percent = np.where(discounted_price > 0, combo_margin / discounted_price * 100, 0.0)
+        avg_individual_margin = np.where(mask, self.contribution_margin_percent[safe], 0.0).sum(axis=1) / size
+        individual_margin = np.where(mask, self.contribution_margin[safe], 0.0).sum(axis=1)
+        estimated_units = np.where(mask, self.quantity[safe], np.inf).min(axis=1) * self.uptake_rate
+
+        return pd.DataFrame({
+            'products': [tuple(self.names[row[row >= 0]]) for row in combos],
+            'size': size,
+            'discount_applied': discounts,
+            'original_price': original_price,
+            'discounted_price': discounted_price,
+            'total_cost': total_cost,
+            'combo_margin': combo_margin,
+            'combo_margin_percent': combo_margin_percent,
+            'avg_individual_margin_percent': avg_individual_margin,
+            'margin_impact': combo_margin_percent - avg_individual_margin,
+            'estimated_units': estimated_units,
+            'incremental_contribution': estimated_units * (combo_margin - self.cannibalization * individual_margin),
+            'viability': np.where(combo_margin_percent > 15, 'Viável',
+                                  np.where(combo_margin_percent > 5, 'Revisar', 'Não recomendado'))
+        })
+
+    def search(self, sizes: Sequence[int] = (2, 3, 4), discounts: Sequence[float] = (5, 10, 15),
+               top_n: int = 10, sort_by: str = 'combo_margin') -> pd.DataFrame:
+        """
+        Busca os melhores combos do cardápio
+
+        Args:
+            sizes: Quantidades de produtos por combo
+            discounts: Percentuais de desconto avaliados
+            top_n: Número de combos retornados
+            sort_by: "combo_margin" (margem do combo em R$) ou
+                "incremental_contribution" (contribuição incremental estimada)
+
+        Returns:
+            DataFrame com os ``top_n`` melhores combos, com as mesmas métricas de
+            calculate_combo_analysis e a contribuição incremental estimada
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f'sort_by deve ser um de {SORT_KEYS}')
+        start = time.perf_counter()
+        max_size = max(sizes) if sizes else 0
+        candidates, candidate_discounts = [], []
+        nodes = 0
+
+        for discount in discounts:
+            weights = self._item_weights(discount, sort_by)
+            for size in sizes:
+                if size > len(self.names) or size < 1:
+                    continue
+                combos, explored = self._branch_and_bound(weights, size, top_n, sort_by)
+                nodes += explored
+                for combo in combos:
+                    candidates.append(list(combo) + [-1] * (max_size - size))
+                    candidate_discounts.append(discount)
+
+        self.last_search_stats = {'nodes_explored': nodes, 'candidates': len(candidates)}
+        if not candidates:
+            self.last_search_stats['elapsed_seconds'] = time.perf_counter() - start
+            return pd.DataFrame()
+
+        results = self._evaluate(np.array(candidates, dtype=int), np.array(candidate_discounts, dtype=float))
+        results = results.sort_values(sort_by, ascending=False, kind='stable').head(top_n).reset_index(drop=True)
+        self.last_search_stats['elapsed_seconds'] = time.perf_counter() - start
+        return results
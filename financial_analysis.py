@@ -6,58 +6,226 @@ margem de segurança, alavancagem operacional e análise custo-volume-lucro.
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from dataclasses import dataclass, replace
+from typing import List, Dict, Tuple, Union
+
+from financial_core import ProductArrays
+from instrumentation import instrumented, stage
+
+
+@dataclass(frozen=True)
+class PortfolioSummary:
+    """Totais do portfólio de produtos, calculados em uma única passada"""
+    total_revenue: float
+    total_variable_cost: float
+    total_contribution: float
+    total_quantity: float
+    total_tax: float
+    product_count: int
+
 
 class FinancialAnalyzer:
     """Classe para análise financeira de produtos de cafeteria"""
     
-    def __init__(self, products_data: List[Dict], fixed_costs: float, tax_rate: float = 0.0):
+    SUMMARY_COLUMNS = ['total_revenue', 'total_variable_cost', 'total_contribution', 'quantity', 'total_tax']
+    
+    def __init__(self, products_data: Union[List[Dict], pd.DataFrame], fixed_costs: float, tax_rate: float = 0.0):
         """
         Inicializa o analisador financeiro
         
+        Os produtos ficam em arrays NumPy (self.arrays) e as métricas são
+        calculadas sobre eles; self.df só é montado no primeiro acesso.
+        
         Args:
-            products_data: Lista de dicionários com dados dos produtos
+            products_data: Lista de dicionários com dados dos produtos, ou DataFrame
+                com as colunas name, price, cost e quantity (ex.: product_loader)
             fixed_costs: Custos fixos totais
+            tax_rate: Alíquota efetiva sobre a receita (%)
         """
         self.products_data = products_data
-        self.fixed_costs = fixed_costs
-        self.tax_rate = tax_rate
-        self.df = pd.DataFrame(products_data)
+        self._fixed_costs = fixed_costs
+        self._tax_rate = tax_rate
+        with stage('financial.load', len(products_data)):
+            if isinstance(products_data, pd.DataFrame):
+                self.arrays = ProductArrays.from_frame(products_data)
+            else:
+                self.arrays = ProductArrays.from_records(products_data)
+        self._df = None
+        self._name_index = None
+        self._calculate_metrics()
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """DataFrame com produtos e métricas, montado a partir dos arrays quando solicitado"""
+        if self._df is None:
+            self._df = self.arrays.to_frame()
+        return self._df
+    
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self.arrays = ProductArrays.from_frame(value)
+        self._calculate_metrics()
+    
+    @property
+    def fixed_costs(self) -> float:
+        return self._fixed_costs
+    
+    @fixed_costs.setter
+    def fixed_costs(self, value: float):
+        # Os totais por produto não dependem dos custos fixos; só as análises derivadas
+        self._fixed_costs = value
+        self._results = {}
+    
+    @property
+    def tax_rate(self) -> float:
+        return self._tax_rate
+    
+    @tax_rate.setter
+    def tax_rate(self, value: float):
+        self._tax_rate = value
         self._calculate_metrics()
     
     def _calculate_metrics(self):
         """Calcula métricas básicas para cada produto"""
-        if len(self.df) > 0:
-            self.df['contribution_margin'] = self.df['price'] - self.df['cost']
-            # Calcular imposto sobre receita
-            self.df['tax'] = self.df['price'] * (self.tax_rate / 100)
-            self.df['total_tax'] = self.df['tax'] * self.df['quantity']
-            # Ajustar margem de contribuição considerando impostos
-            self.df['contribution_margin'] = self.df['price'] - self.df['cost'] - self.df['tax']
-            self.df['contribution_margin_percent'] = (
-                (self.df['contribution_margin'] / self.df['price']) * 100
-            ).fillna(0)
-            self.df['total_revenue'] = self.df['price'] * self.df['quantity']
-            self.df['total_variable_cost'] = (self.df['cost'] + self.df['tax']) * self.df['quantity']
-            self.df['total_contribution'] = self.df['contribution_margin'] * self.df['quantity']
+        with stage('financial.metrics', len(self.arrays)):
+            self.arrays.calculate_metrics(self.tax_rate)
+        self._reset()
+    
+    def _reset(self):
+        self._df = None
+        self._summary = None
+        self._name_index = None
+        self._results = {}
+    
+    def invalidate(self):
+        """Descarta os totais e análises em cache (chamar após alterar self.df diretamente)"""
+        if self._df is not None:
+            self.arrays = ProductArrays.from_frame(self._df)
+        self._calculate_metrics()
+    
+    @property
+    def summary(self) -> PortfolioSummary:
+        """Totais do portfólio, recalculados apenas quando produtos ou alíquota mudam"""
+        if self._summary is None:
+            totals = self.arrays.totals(self.SUMMARY_COLUMNS)
+            self._summary = PortfolioSummary(*(float(total) for total in totals), product_count=len(self.arrays))
+        return self._summary
+    
+    def _summary_delta(self, summary: PortfolioSummary, old_totals: np.ndarray, new_totals: np.ndarray,
+                       count_change: int) -> PortfolioSummary:
+        # Ajusta os totais (obtidos antes da alteração) pela diferença das linhas alteradas, sem somar tudo
+        delta = dict(zip(self.SUMMARY_COLUMNS, (float(value) for value in new_totals - old_totals)))
+        return replace(
+            summary,
+            total_revenue=summary.total_revenue + delta['total_revenue'],
+            total_variable_cost=summary.total_variable_cost + delta['total_variable_cost'],
+            total_contribution=summary.total_contribution + delta['total_contribution'],
+            total_quantity=summary.total_quantity + delta['quantity'],
+            total_tax=summary.total_tax + delta['total_tax'],
+            product_count=summary.product_count + count_change
+        )
+    
+    def _name_positions(self) -> Dict[str, List[int]]:
+        if self._name_index is None:
+            self._name_index = {}
+            for position, name in enumerate(self.arrays['name'].tolist()):
+                self._name_index.setdefault(name, []).append(position)
+        return self._name_index
+    
+    def _positions_for(self, product_name: str) -> List[int]:
+        positions = self._name_positions().get(product_name)
+        if not positions:
+            raise KeyError(f'Produto não encontrado: {product_name}')
+        return positions
+    
+    def _mutated(self, summary: PortfolioSummary):
+        self._df = None
+        self._summary = summary
+        self._results = {}
+    
+    def update_product(self, product_name: str, price: float = None, cost: float = None, quantity: float = None):
+        """
+        Atualiza preço, custo e/ou quantidade de um produto
+        
+        Recalcula apenas as métricas das linhas do produto e ajusta os totais em
+        cache pela diferença, em tempo constante.
+        
+        Args:
+            product_name: Nome do produto
+            price: Novo preço de venda (None mantém o atual)
+            cost: Novo custo variável (None mantém o atual)
+            quantity: Nova quantidade vendida (None mantém a atual)
+        """
+        positions = self._positions_for(product_name)
+        summary = self.summary
+        old_totals = self.arrays.totals(self.SUMMARY_COLUMNS, positions)
+        values = {'price': price, 'cost': cost, 'quantity': quantity}
+        self.arrays.set_values(positions, {column: value for column, value in values.items() if value is not None})
+        self.arrays.calculate_metrics(self.tax_rate, positions)
+        new_totals = self.arrays.totals(self.SUMMARY_COLUMNS, positions)
+        self._mutated(self._summary_delta(summary, old_totals, new_totals, 0))
+    
+    def add_product(self, product: Dict):
+        """
+        Adiciona um produto ao portfólio
+        
+        Args:
+            product: Dicionário com name, price, cost e quantity
+        """
+        summary = self.summary
+        self.arrays.append(product)
+        position = len(self.arrays) - 1
+        self.arrays.calculate_metrics(self.tax_rate, [position])
+        if self._name_index is not None:
+            self._name_index.setdefault(product['name'], []).append(position)
+        new_totals = self.arrays.totals(self.SUMMARY_COLUMNS, [position])
+        self._mutated(self._summary_delta(summary, np.zeros(len(new_totals)), new_totals, 1))
+    
+    def remove_product(self, product_name: str):
+        """
+        Remove todas as linhas de um produto do portfólio
+        
+        Args:
+            product_name: Nome do produto
+        """
+        positions = self._positions_for(product_name)
+        summary = self.summary
+        old_totals = self.arrays.totals(self.SUMMARY_COLUMNS, positions)
+        self.arrays.delete(positions)
+        # As posições seguintes mudam; o índice por nome é refeito na próxima consulta
+        self._name_index = None
+        self._mutated(self._summary_delta(summary, old_totals, np.zeros(len(old_totals)), -len(positions)))
+    
+    def _cached(self, key: str, compute):
+        if key not in self._results:
+            with stage(f'financial.{key}', len(self.arrays)):
+                self._results[key] = compute()
+        return self._results[key]
     
     def get_contribution_margin_analysis(self) -> pd.DataFrame:
         """
         Retorna análise detalhada da margem de contribuição por produto
         
+        O DataFrame retornado fica em cache e é compartilhado entre chamadas;
+        faça uma cópia antes de modificá-lo.
+        
         Returns:
             DataFrame com análise de margem de contribuição
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return pd.DataFrame()
         
+        return self._cached('contribution_margin_analysis', self._contribution_margin_analysis)
+    
+    def _contribution_margin_analysis(self) -> pd.DataFrame:
+        summary = self.summary
         analysis_df = self.df.copy()
         analysis_df['contribution_rank'] = analysis_df['contribution_margin_percent'].rank(ascending=False)
         analysis_df['revenue_participation'] = (
-            analysis_df['total_revenue'] / analysis_df['total_revenue'].sum() * 100
+            analysis_df['total_revenue'] / summary.total_revenue * 100
         )
         analysis_df['contribution_participation'] = (
-            analysis_df['total_contribution'] / analysis_df['total_contribution'].sum() * 100
+            analysis_df['total_contribution'] / summary.total_contribution * 100
         )
         
         return analysis_df
@@ -69,12 +237,16 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com métricas de ponto de equilíbrio
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return {}
         
-        total_contribution = self.df['total_contribution'].sum()
-        total_quantity = self.df['quantity'].sum()
-        total_revenue = self.df['total_revenue'].sum()
+        return dict(self._cached('breakeven_analysis', self._breakeven_analysis))
+    
+    def _breakeven_analysis(self) -> Dict:
+        summary = self.summary
+        total_contribution = summary.total_contribution
+        total_quantity = summary.total_quantity
+        total_revenue = summary.total_revenue
         
         # Margem de contribuição média ponderada
         weighted_avg_contribution_margin = total_contribution / total_quantity if total_quantity > 0 else 0
@@ -110,10 +282,10 @@ class FinancialAnalyzer:
         Returns:
             Valor da alavancagem operacional
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return 0
         
-        total_contribution = self.df['total_contribution'].sum()
+        total_contribution = self.summary.total_contribution
         net_profit = total_contribution - self.fixed_costs
         
         if net_profit == 0:
@@ -128,12 +300,16 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com análise CVP completa
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return {}
         
-        total_revenue = self.df['total_revenue'].sum()
-        total_variable_cost = self.df['total_variable_cost'].sum()
-        total_contribution = self.df['total_contribution'].sum()
+        return dict(self._cached('cost_volume_profit_analysis', self._cost_volume_profit_analysis))
+    
+    def _cost_volume_profit_analysis(self) -> Dict:
+        summary = self.summary
+        total_revenue = summary.total_revenue
+        total_variable_cost = summary.total_variable_cost
+        total_contribution = summary.total_contribution
         net_profit = total_contribution - self.fixed_costs
         
         # Razão da margem de contribuição
@@ -168,38 +344,123 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com análise do impacto da mudança
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return {}
         
-        product_idx = self.df[self.df['name'] == product_name].index
-        if len(product_idx) == 0:
+        if product_name not in self._name_positions():
             return {'error': 'Produto não encontrado'}
         
-        # Estado atual
-        current_analysis = self.get_cost_volume_profit_analysis()
+        simulation = self._price_scenarios({product_name: [new_price]})
         
-        # Simular mudança
-        df_sim = self.df.copy()
-        df_sim.loc[product_idx, 'price'] = new_price
-        df_sim.loc[product_idx, 'contribution_margin'] = new_price - df_sim.loc[product_idx, 'cost']
-        df_sim.loc[product_idx, 'contribution_margin_percent'] = (
-            (df_sim.loc[product_idx, 'contribution_margin'] / new_price) * 100
-        )
-        df_sim.loc[product_idx, 'total_revenue'] = new_price * df_sim.loc[product_idx, 'quantity']
-        df_sim.loc[product_idx, 'total_contribution'] = (
-            df_sim.loc[product_idx, 'contribution_margin'] * df_sim.loc[product_idx, 'quantity']
+        return {
+            'current_profit': simulation['current_profit'],
+            'new_profit': simulation['new_profit'][0],
+            'profit_change': simulation['profit_change'][0],
+            'current_contribution_ratio': simulation['current_contribution_ratio'],
+            'new_contribution_ratio': simulation['new_contribution_ratio'][0]
+        }
+    
+    def simulate_price_grid(self, price_grid) -> pd.DataFrame:
+        """
+        Simula em lote mudanças de preço para vários produtos e preços candidatos
+        
+        Cada célula (produto, preço) é um cenário independente: só o preço daquele
+        produto muda e os demais ficam como estão. Os cenários são calculados com
+        operações vetorizadas sobre os totais atuais, sem copiar o DataFrame nem
+        criar novos analisadores.
+        
+        Args:
+            price_grid: Dicionário {nome do produto: lista de preços} ou matriz
+                (n_produtos x n_preços) alinhada com as linhas de self.df.
+                Produtos não encontrados são ignorados.
+            
+        Returns:
+            DataFrame com uma linha por cenário: lucro, razão da margem de
+            contribuição e ponto de equilíbrio antes e depois da mudança
+        """
+        columns = ['name', 'current_price', 'new_price', 'current_profit', 'new_profit', 'profit_change',
+                   'current_contribution_ratio', 'new_contribution_ratio', 'breakeven_units', 'breakeven_revenue']
+        if len(self.arrays) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        return pd.DataFrame(self._price_scenarios(price_grid), columns=columns)
+    
+    @instrumented('financial.price_scenarios')
+    def _price_scenarios(self, price_grid) -> Dict:
+        arrays = self.arrays
+        quantity = arrays['quantity']
+        revenue = arrays['total_revenue']
+        contribution = arrays['total_contribution']
+        cost_volume = arrays['cost'] * quantity
+        
+        if isinstance(price_grid, dict):
+            # Agrega por nome (nomes repetidos mudam de preço juntos, como em simulate_price_changes)
+            name_positions = self._name_positions()
+            names = [name for name in price_grid if name in name_positions]
+            positions = [name_positions[name] for name in names]
+            flat_positions = np.fromiter(
+                (position for group in positions for position in group), dtype=int,
+                count=sum(len(group) for group in positions)
+            )
+            starts = np.cumsum([0] + [len(group) for group in positions[:-1]]) if names else np.empty(0, dtype=int)
+            
+            def by_name(values: np.ndarray) -> np.ndarray:
+                return np.add.reduceat(values[flat_positions], starts) if names else np.empty(0)
+            
+            prices = [np.asarray(price_grid[name], dtype=float).ravel() for name in names]
+            counts = np.array([len(candidate_prices) for candidate_prices in prices], dtype=int)
+            entity_index = np.repeat(np.arange(len(names)), counts)
+            new_price = np.concatenate(prices) if prices else np.empty(0)
+            entity_names = np.asarray(names, dtype=object)
+            entity_price = arrays['price'][[group[0] for group in positions]] if names else np.empty(0)
+            quantity, revenue = by_name(quantity), by_name(revenue)
+            contribution, cost_volume = by_name(contribution), by_name(cost_volume)
+        else:
+            grid = np.asarray(price_grid, dtype=float)
+            if grid.ndim == 1:
+                grid = grid[:, np.newaxis]
+            if grid.shape[0] != len(arrays):
+                raise ValueError('A matriz de preços deve ter uma linha por produto')
+            entity_index = np.repeat(np.arange(grid.shape[0]), grid.shape[1])
+            new_price = grid.ravel()
+            entity_names = arrays['name']
+            entity_price = arrays['price']
+        
+        summary = self.summary
+        total_revenue = summary.total_revenue
+        total_contribution = summary.total_contribution
+        total_quantity = summary.total_quantity
+        current_profit = total_contribution - self.fixed_costs
+        current_ratio = (total_contribution / total_revenue * 100) if total_revenue > 0 else 0
+        
+        # Receita e contribuição totais em cada cenário, ajustadas pela diferença do produto alterado
+        tax_factor = 1 - self.tax_rate / 100
+        sim_revenue = total_revenue - revenue[entity_index] + new_price * quantity[entity_index]
+        sim_contribution = (
+            total_contribution - contribution[entity_index]
+            + new_price * tax_factor * quantity[entity_index] - cost_volume[entity_index]
         )
+        new_profit = sim_contribution - self.fixed_costs
         
-        # Recalcular métricas
-        sim_analyzer = FinancialAnalyzer(df_sim.to_dict('records'), self.fixed_costs)
-        new_analysis = sim_analyzer.get_cost_volume_profit_analysis()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_ratio = np.where(sim_revenue > 0, sim_contribution / sim_revenue * 100, 0.0)
+            weighted_avg_contribution_margin = sim_contribution / total_quantity if total_quantity > 0 else np.zeros_like(sim_contribution)
+            weighted_avg_price = sim_revenue / total_quantity if total_quantity > 0 else np.zeros_like(sim_revenue)
+            breakeven_units = np.where(
+                weighted_avg_contribution_margin > 0, self.fixed_costs / weighted_avg_contribution_margin, 0.0
+            )
         
         return {
-            'current_profit': current_analysis.get('net_profit', 0),
-            'new_profit': new_analysis.get('net_profit', 0),
-            'profit_change': new_analysis.get('net_profit', 0) - current_analysis.get('net_profit', 0),
-            'current_contribution_ratio': current_analysis.get('contribution_margin_ratio', 0),
-            'new_contribution_ratio': new_analysis.get('contribution_margin_ratio', 0)
+            'name': entity_names[entity_index],
+            'current_price': entity_price[entity_index],
+            'new_price': new_price,
+            'current_profit': current_profit,
+            'new_profit': new_profit,
+            'profit_change': new_profit - current_profit,
+            'current_contribution_ratio': current_ratio,
+            'new_contribution_ratio': new_ratio,
+            'breakeven_units': breakeven_units,
+            'breakeven_revenue': breakeven_units * weighted_avg_price
         }
     
     def analyze_product_mix_optimization(self) -> Dict:
@@ -209,26 +470,35 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com recomendações de otimização
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return {}
         
-        df_analysis = self.get_contribution_margin_analysis()
-        
-        # Produtos com maior margem
-        high_margin_products = df_analysis.nlargest(3, 'contribution_margin_percent')
-        
-        # Produtos com menor margem
-        low_margin_products = df_analysis.nsmallest(3, 'contribution_margin_percent')
-        
-        # Produtos com maior contribuição total
-        high_contribution_products = df_analysis.nlargest(3, 'total_contribution')
+        return dict(self._cached('product_mix_optimization', self._product_mix_optimization))
+    
+    def _product_mix_optimization(self) -> Dict:
+        # Ordenação estável sobre os arrays: mesmos empates de nlargest/nsmallest(keep='first')
+        margin_percent = self.arrays['contribution_margin_percent']
+        total_contribution = self.arrays['total_contribution']
+        
+        def records(positions: np.ndarray) -> List[Dict]:
+            names = self.arrays['name']
+            return [
+                {'name': names[position],
+                 'contribution_margin_percent': float(margin_percent[position]),
+                 'total_contribution': float(total_contribution[position])}
+                for position in positions
+            ]
         
         return {
-            'high_margin_products': high_margin_products[['name', 'contribution_margin_percent', 'total_contribution']].to_dict('records'),
-            'low_margin_products': low_margin_products[['name', 'contribution_margin_percent', 'total_contribution']].to_dict('records'),
-            'high_contribution_products': high_contribution_products[['name', 'contribution_margin_percent', 'total_contribution']].to_dict('records')
+            # Produtos com maior margem
+            'high_margin_products': records(np.argsort(-margin_percent, kind='stable')[:3]),
+            # Produtos com menor margem
+            'low_margin_products': records(np.argsort(margin_percent, kind='stable')[:3]),
+            # Produtos com maior contribuição total
+            'high_contribution_products': records(np.argsort(-total_contribution, kind='stable')[:3])
         }
     
+    @instrumented('financial.combo_analysis')
     def calculate_combo_analysis(self, product_names: List[str], discount_percent: float) -> Dict:
         """
         Analisa viabilidade de combo de produtos
@@ -240,23 +510,26 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com análise do combo
         """
-        if len(self.df) == 0:
+        if len(self.arrays) == 0:
             return {}
         
-        combo_products = self.df[self.df['name'].isin(product_names)]
+        name_positions = self._name_positions()
+        combo_positions = sorted(
+            position for name in set(product_names) for position in name_positions.get(name, [])
+        )
         
-        if len(combo_products) == 0:
+        if len(combo_positions) == 0:
             return {'error': 'Nenhum produto encontrado'}
         
         # Cálculos do combo
-        combo_original_price = combo_products['price'].sum()
+        combo_original_price = self.arrays['price'][combo_positions].sum()
         combo_discounted_price = combo_original_price * (1 - discount_percent / 100)
-        combo_total_cost = combo_products['cost'].sum()
+        combo_total_cost = self.arrays['cost'][combo_positions].sum()
         combo_margin = combo_discounted_price - combo_total_cost
         combo_margin_percent = (combo_margin / combo_discounted_price * 100) if combo_discounted_price > 0 else 0
         
         # Margem média dos produtos individuais
-        avg_individual_margin = combo_products['contribution_margin_percent'].mean()
+        avg_individual_margin = self.arrays['contribution_margin_percent'][combo_positions].mean()
         
         return {
             'products': product_names,
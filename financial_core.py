@@ -0,0 +1,180 @@
+"""
+Módulo do núcleo de cálculo em arrays
+Guarda os produtos em arrays NumPy paralelos (um por coluna) e calcula as
+métricas de cada produto diretamente sobre eles. O DataFrame equivalente só é
+montado quando alguém pede por ele, o que elimina o custo fixo do pandas
+(construção, atribuição de colunas, cópias) em cardápios pequenos.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence
+
+NUMERIC_COLUMNS = ['price', 'cost', 'quantity']
+METRIC_COLUMNS = ['contribution_margin', 'tax', 'total_tax', 'contribution_margin_percent',
+                  'total_revenue', 'total_variable_cost', 'total_contribution']
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+
+
+class ProductArrays:
+    """Produtos e métricas por produto em arrays paralelos"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], extras: Dict[str, List], index: np.ndarray,
+                 order: List[str], integer_columns):
+        """
+        Inicializa o núcleo (use from_records ou from_frame)
+
+        Args:
+            columns: Arrays de name, price, cost, quantity e das métricas
+            extras: Demais colunas informadas nos produtos, como listas
+            index: Rótulos das linhas do DataFrame materializado
+            order: Ordem das colunas de entrada, como em pd.DataFrame(products_data)
+            integer_columns: Colunas numéricas informadas com valores inteiros
+        """
+        self.columns = columns
+        self.extras = extras
+        self.index = index
+        self.order = order
+        self.integer_columns = set(integer_columns)
+
+    @classmethod
+    def from_records(cls, products_data: Sequence[Dict]) -> 'ProductArrays':
+        """Cria o núcleo a partir de uma lista de dicionários de produtos"""
+        order = list(dict.fromkeys(key for product in products_data for key in product))
+        columns = {'name': np.array([product.get('name') for product in products_data], dtype=object)}
+        integer_columns = []
+        for column in NUMERIC_COLUMNS:
+            values = [product.get(column, np.nan) for product in products_data]
+            if values and all(_is_integer(value) for value in values):
+                integer_columns.append(column)
+            columns[column] = np.array(values, dtype=float)
+        extras = {
+            column: [product.get(column) for product in products_data]
+            for column in order if column not in columns and column not in METRIC_COLUMNS
+        }
+        order = [column for column in order if column not in METRIC_COLUMNS]
+        return cls(columns, extras, np.arange(len(products_data)), order, integer_columns)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'ProductArrays':
+        """Cria o núcleo a partir de um DataFrame no formato de FinancialAnalyzer.df"""
+        n = len(df)
+        columns = {
+            'name': df['name'].to_numpy(dtype=object) if 'name' in df else np.full(n, None, dtype=object)
+        }
+        integer_columns = []
+        for column in NUMERIC_COLUMNS:
+            if column in df:
+                if pd.api.types.is_integer_dtype(df[column].dtype):
+                    integer_columns.append(column)
+                columns[column] = df[column].to_numpy(dtype=float, copy=True)
+            else:
+                columns[column] = np.full(n, np.nan)
+        order = [column for column in df.columns if column not in METRIC_COLUMNS]
+        extras = {column: df[column].tolist() for column in order if column not in columns}
+        return cls(columns, extras, df.index.to_numpy(), order, integer_columns)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def calculate_metrics(self, tax_rate: float, positions=None):
+        """
+        Calcula as métricas por produto (as mesmas de FinancialAnalyzer.df)
+
+        Args:
+            tax_rate: Alíquota efetiva sobre a receita (%)
+            positions: Posições a recalcular (None = todas)
+        """
+        price, cost, quantity = (self.columns[column] for column in NUMERIC_COLUMNS)
+        if positions is not None:
+            price, cost, quantity = price[positions], cost[positions], quantity[positions]
+        tax = price * (tax_rate / 100)
+        contribution_margin = price - cost - tax
+        with np.errstate(divide='ignore', invalid='ignore'):
+            contribution_margin_percent = contribution_margin / price * 100
+        contribution_margin_percent[np.isnan(contribution_margin_percent)] = 0.0
+        metrics = {
+            'contribution_margin': contribution_margin,
+            'tax': tax,
+            'total_tax': tax * quantity,
+            'contribution_margin_percent': contribution_margin_percent,
+            'total_revenue': price * quantity,
+            'total_variable_cost': (cost + tax) * quantity,
+            'total_contribution': contribution_margin * quantity
+        }
+        if positions is None:
+            self.columns.update(metrics)
+        else:
+            for column, values in metrics.items():
+                self.columns.setdefault(column, np.full(len(self), np.nan))[positions] = values
+
+    def totals(self, columns: Sequence[str], positions=None) -> np.ndarray:
+        """Soma das colunas informadas (em todas as linhas ou só nas posições dadas)"""
+        if positions is None:
+            return np.array([self.columns[column].sum() for column in columns])
+        return np.array([self.columns[column][positions].sum() for column in columns])
+
+    def set_values(self, positions, values: Dict[str, float]):
+        """Altera colunas numéricas nas posições dadas (recalcule as métricas em seguida)"""
+        for column, value in values.items():
+            self.columns[column][positions] = value
+            if column in self.integer_columns and not _is_integer(value):
+                # Como no DataFrame, a coluna deixa de ser inteira ao receber um valor fracionário
+                self.integer_columns.discard(column)
+
+    def append(self, product: Dict):
+        """Acrescenta um produto ao final (recalcule as métricas da última posição em seguida)"""
+        if not self.order:
+            added = ProductArrays.from_records([product])
+            self.columns, self.extras, self.order = added.columns, added.extras, added.order
+            self.integer_columns = added.integer_columns
+            self.index = np.array([self.index.max() + 1 if len(self.index) > 0 else 0])
+            return
+        self.index = np.append(self.index, self.index.max() + 1 if len(self.index) > 0 else 0)
+        self.columns['name'] = np.append(self.columns['name'], np.array([product.get('name')], dtype=object))
+        for column in NUMERIC_COLUMNS:
+            value = product.get(column, np.nan)
+            if column in self.integer_columns and not _is_integer(value):
+                self.integer_columns.discard(column)
+            self.columns[column] = np.append(self.columns[column], float(value))
+        for column in METRIC_COLUMNS:
+            if column in self.columns:
+                self.columns[column] = np.append(self.columns[column], np.nan)
+        # Como em df.loc[rótulo] = linha, chaves que não são colunas existentes são ignoradas
+        for column, values in self.extras.items():
+            values.append(product.get(column))
+
+    def delete(self, positions: Sequence[int]):
+        """Remove as linhas nas posições dadas"""
+        self.index = np.delete(self.index, positions)
+        for column, values in self.columns.items():
+            self.columns[column] = np.delete(values, positions)
+        removed = set(positions)
+        for column, values in self.extras.items():
+            self.extras[column] = [value for position, value in enumerate(values) if position not in removed]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Monta o DataFrame equivalente (mesmas colunas e tipos de pd.DataFrame(products_data))"""
+        if not self.order:
+            return pd.DataFrame()
+        data = {}
+        for column in self.order:
+            if column in self.extras:
+                data[column] = self.extras[column]
+            elif column in self.integer_columns:
+                data[column] = self.columns[column].astype(np.int64)
+            else:
+                data[column] = self.columns[column]
+        for column in METRIC_COLUMNS:
+            if column in self.columns:
+                data[column] = self.columns[column]
+        if 'total_revenue' in data and {'price', 'quantity'} <= self.integer_columns:
+            # Preço e quantidade inteiros dão receita inteira, como na multiplicação das colunas
+            data['total_revenue'] = data['total_revenue'].astype(np.int64)
+        return pd.DataFrame(data, index=self.index)
@@ -0,0 +1,191 @@
+"""
+Instrumentação dos caminhos críticos.
+Mede o tempo e o número de linhas de cada etapa do FinancialAnalyzer, do
+CashFlowAnalyzer e dos gráficos, e opcionalmente captura um perfil com
+cProfile. Desligada (o padrão), cada etapa custa apenas uma leitura de
+ContextVar. Ligada, as medições ficam em um Recorder próprio da execução
+atual (cada reexecução do Streamlit roda em sua própria thread/contexto).
+
+Uso:
+    recorder = instrumentation.start(profile=True)
+    ...  # código instrumentado
+    instrumentation.stop(recorder)
+    recorder.summary()            # DataFrame por etapa
+    recorder.to_json()            # tempos de cada etapa, para exportação
+"""
+
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+
+SUMMARY_COLUMNS = ['stage', 'calls', 'total_seconds', 'mean_seconds', 'max_seconds', 'rows', 'rows_per_second']
+
+_current = contextvars.ContextVar('instrumentation_recorder', default=None)
+
+
+class _NullStage:
+    # Devolvido por stage() com a instrumentação desligada: atribuir rows não tem efeito
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('recorder', 'name', 'rows', 'start')
+
+    def __init__(self, recorder, name: str, rows: Optional[int]):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class Recorder:
+    """Medições de uma execução: uma entrada por etapa executada, em ordem"""
+
+    def __init__(self, profile: bool = False):
+        self.started_at = time.time()
+        self.records: List[Dict] = []
+        self.elapsed = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._profiler = cProfile.Profile() if profile else None
+
+    def record(self, stage: str, seconds: float, rows: Optional[int] = None):
+        with self._lock:
+            self.records.append({'stage': stage, 'seconds': seconds, 'rows': rows})
+
+    def summary(self) -> pd.DataFrame:
+        """Tempo total, médio e máximo, chamadas e linhas por etapa, da mais lenta para a mais rápida"""
+        if not self.records:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        records = pd.DataFrame(self.records)
+        summary = records.groupby('stage', sort=False).agg(
+            calls=('seconds', 'size'), total_seconds=('seconds', 'sum'),
+            mean_seconds=('seconds', 'mean'), max_seconds=('seconds', 'max'), rows=('rows', 'sum')
+        ).reset_index()
+        summary['rows'] = summary['rows'].astype('int64')
+        summary['rows_per_second'] = (summary['rows'] / summary['total_seconds']).where(summary['rows'] > 0, 0.0)
+        return summary.sort_values('total_seconds', ascending=False, ignore_index=True)[SUMMARY_COLUMNS]
+
+    def profile_text(self, limit: int = 25, sort: str = 'cumulative') -> str:
+        """Funções mais caras segundo o cProfile (vazio se o perfil não foi capturado)"""
+        if self._profiler is None:
+            return ''
+        output = io.StringIO()
+        pstats.Stats(self._profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_seconds': self.elapsed,
+            'stages': self.summary().to_dict(orient='records'),
+            'records': list(self.records)
+        }
+
+    def to_json(self) -> str:
+        """Tempos por etapa (resumo e cada chamada) em JSON"""
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+
+def is_enabled() -> bool:
+    return _current.get() is not None
+
+
+def start(profile: bool = False) -> Recorder:
+    """
+    Liga a instrumentação no contexto atual
+
+    Args:
+        profile: Se True, captura também um perfil cProfile até stop()
+
+    Returns:
+        Recorder que recebe as medições
+    """
+    recorder = Recorder(profile)
+    _current.set(recorder)
+    if recorder._profiler is not None:
+        try:
+            recorder._profiler.enable()
+        except ValueError:
+            # Outro profiler já ativo (ex.: execução sob cProfile): segue só com os tempos
+            recorder._profiler = None
+    return recorder
+
+
+def stop(recorder: Recorder) -> Recorder:
+    """Desliga a instrumentação e encerra o perfil, se houver"""
+    if recorder._profiler is not None:
+        recorder._profiler.disable()
+    recorder.elapsed = time.perf_counter() - recorder._start
+    if _current.get() is recorder:
+        _current.set(None)
+    return recorder
+
+
+def disable():
+    """Desliga a instrumentação no contexto atual, encerrando um Recorder que ficou aberto"""
+    recorder = _current.get()
+    if recorder is not None:
+        stop(recorder)
+
+
+def stage(name: str, rows: Optional[int] = None):
+    """
+    Mede um trecho de código como uma etapa
+
+        with stage('cash_flow.extract') as current:
+            ...
+            current.rows = len(linhas)
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL_STAGE
+    return _Stage(recorder, name, rows)
+
+
+def instrumented(name: str, rows: Callable = None):
+    """
+    Decorador que mede cada chamada da função como a etapa ``name``
+
+    Args:
+        name: Nome da etapa
+        rows: Função opcional que recebe o resultado e devolve o número de linhas
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _current.get()
+            if recorder is None:
+                return function(*args, **kwargs)
+            start_time = time.perf_counter()
+            result = function(*args, **kwargs)
+            recorder.record(name, time.perf_counter() - start_time, rows(result) if rows else None)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,135 @@
+"""
+Módulo de análise custo-volume-lucro em painel
+Calcula, de uma só vez, todas as métricas de
+FinancialAnalyzer.get_cost_volume_profit_analysis para cada par
+(loja, período) de uma base em formato longo, com operações agrupadas e
+vetorizadas em vez de um analisador por grupo.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Union
+
+GROUP_COLUMNS = ['store', 'period']
+SALES_COLUMNS = ['store', 'period', 'product', 'price', 'cost', 'quantity']
+
+
+class PanelCVPAnalyzer:
+    """Análise CVP de várias lojas e períodos em uma única passada"""
+
+    def __init__(self, sales: pd.DataFrame, fixed_costs: Union[pd.DataFrame, float] = 0.0, tax_rate: float = 0.0):
+        """
+        Inicializa o analisador em painel
+
+        Args:
+            sales: DataFrame longo com as colunas store, period, product, price, cost e quantity
+            fixed_costs: DataFrame com store, period, fixed_costs e, opcionalmente, tax_rate
+                (um valor por loja/período), ou um único valor de custos fixos para todos os grupos
+            tax_rate: Alíquota efetiva padrão (%), usada quando não informada por loja/período
+        """
+        missing = [column for column in SALES_COLUMNS if column not in sales.columns]
+        if missing:
+            raise ValueError(f'Colunas ausentes na base de vendas: {missing}')
+
+        self.sales = sales
+        self.tax_rate = tax_rate
+        self._group_codes, self.groups = self._factorize_groups(sales)
+        self._fixed_costs, self._tax_rates = self._group_parameters(fixed_costs)
+        self.df = self._calculate_metrics()
+
+    @staticmethod
+    def _factorize_groups(sales: pd.DataFrame):
+        # Código inteiro de cada (loja, período), na ordem de classificação dos grupos
+        codes, groups = pd.MultiIndex.from_frame(sales[GROUP_COLUMNS]).factorize(sort=True)
+        return codes, pd.MultiIndex.from_tuples(groups, names=GROUP_COLUMNS)
+
+    def _group_parameters(self, fixed_costs):
+        n_groups = len(self.groups)
+        if not isinstance(fixed_costs, pd.DataFrame):
+            return np.full(n_groups, float(fixed_costs)), np.full(n_groups, float(self.tax_rate))
+
+        if fixed_costs.duplicated(GROUP_COLUMNS).any():
+            raise ValueError('Há mais de um registro de custos fixos para a mesma loja/período')
+        parameters = fixed_costs.set_index(GROUP_COLUMNS).reindex(self.groups)
+        group_fixed_costs = parameters['fixed_costs'].fillna(0.0).to_numpy(dtype=float)
+        if 'tax_rate' in parameters.columns:
+            group_tax_rates = parameters['tax_rate'].fillna(self.tax_rate).to_numpy(dtype=float)
+        else:
+            group_tax_rates = np.full(n_groups, float(self.tax_rate))
+        return group_fixed_costs, group_tax_rates
+
+    def _calculate_metrics(self) -> pd.DataFrame:
+        """Calcula as métricas de cada produto, com a alíquota da sua loja/período"""
+        df = self.sales.copy()
+        price = df['price'].to_numpy(dtype=float)
+        cost = df['cost'].to_numpy(dtype=float)
+        quantity = df['quantity'].to_numpy(dtype=float)
+        tax = price * (self._tax_rates[self._group_codes] / 100)
+        contribution_margin = price - cost - tax
+
+        df['tax'] = tax
+        df['total_tax'] = tax * quantity
+        df['contribution_margin'] = contribution_margin
+        with np.errstate(divide='ignore', invalid='ignore'):
+            contribution_margin_percent = contribution_margin / price * 100
+        df['contribution_margin_percent'] = np.where(np.isnan(contribution_margin_percent), 0, contribution_margin_percent)
+        df['total_revenue'] = price * quantity
+        df['total_variable_cost'] = (cost + tax) * quantity
+        df['total_contribution'] = contribution_margin * quantity
+        return df
+
+    def get_cost_volume_profit_analysis(self) -> pd.DataFrame:
+        """
+        Análise custo-volume-lucro de cada loja e período
+
+        Returns:
+            DataFrame com uma linha por (store, period) e as mesmas chaves do
+            dicionário de FinancialAnalyzer.get_cost_volume_profit_analysis
+        """
+        n_groups = len(self.groups)
+        if n_groups == 0:
+            return pd.DataFrame(columns=GROUP_COLUMNS)
+
+        def group_sum(column: str) -> np.ndarray:
+            return np.bincount(self._group_codes, weights=self.df[column].to_numpy(dtype=float), minlength=n_groups)
+
+        total_revenue = group_sum('total_revenue')
+        total_variable_cost = group_sum('total_variable_cost')
+        total_contribution = group_sum('total_contribution')
+        total_quantity = group_sum('quantity')
+        fixed_costs = self._fixed_costs
+        net_profit = total_contribution - fixed_costs
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_revenue = total_revenue > 0
+            has_quantity = total_quantity > 0
+            contribution_margin_ratio = np.where(has_revenue, total_contribution / total_revenue * 100, 0.0)
+            variable_cost_ratio = np.where(has_revenue, total_variable_cost / total_revenue * 100, 0.0)
+            operating_leverage = np.where(net_profit != 0, total_contribution / net_profit, np.inf)
+            weighted_avg_contribution_margin = np.where(has_quantity, total_contribution / total_quantity, 0.0)
+            weighted_avg_price = np.where(has_quantity, total_revenue / total_quantity, 0.0)
+            breakeven_units = np.where(
+                weighted_avg_contribution_margin > 0, fixed_costs / weighted_avg_contribution_margin, 0.0
+            )
+            breakeven_revenue = breakeven_units * weighted_avg_price
+            safety_margin_units = total_quantity - breakeven_units
+            safety_margin_percent = np.where(has_quantity, safety_margin_units / total_quantity * 100, 0.0)
+
+        analysis = self.groups.to_frame(index=False)
+        analysis['total_revenue'] = total_revenue
+        analysis['total_variable_cost'] = total_variable_cost
+        analysis['total_contribution'] = total_contribution
+        analysis['fixed_costs'] = fixed_costs
+        analysis['net_profit'] = net_profit
+        analysis['contribution_margin_ratio'] = contribution_margin_ratio
+        analysis['variable_cost_ratio'] = variable_cost_ratio
+        analysis['operating_leverage'] = operating_leverage
+        analysis['breakeven_units'] = breakeven_units
+        analysis['breakeven_revenue'] = breakeven_revenue
+        analysis['safety_margin_units'] = safety_margin_units
+        analysis['safety_margin_percent'] = safety_margin_percent
+        analysis['safety_margin_revenue'] = total_revenue - breakeven_revenue
+        analysis['weighted_avg_contribution_margin'] = weighted_avg_contribution_margin
+        analysis['weighted_avg_price'] = weighted_avg_price
+        analysis['tax_rate'] = self._tax_rates
+        return analysis
@@ -0,0 +1,196 @@
+"""
+Módulo de carga da planilha de produtos
+Lê a planilha de produtos (CSV ou Excel) no formato do template, mapeia as
+colunas em português para os nomes usados pelo FinancialAnalyzer, converte os
+tipos de forma vetorizada e registra os erros de validação por linha sem
+interromper a carga. CSVs grandes são lidos em blocos.
+"""
+
+import io
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+from transaction_categorizer import normalize_text
+
+TEMPLATE_COLUMNS = {
+    'Nome do Produto': 'name',
+    'Preço de Venda (R$)': 'price',
+    'Custo Variável (R$)': 'cost',
+    'Quantidade Vendida (mês)': 'quantity'
+}
+PRODUCT_COLUMNS = ['name', 'price', 'cost', 'quantity']
+ERROR_COLUMNS = ['row', 'column', 'value', 'message']
+CSV_CHUNK_ROWS = 50_000
+# Linha da planilha correspondente ao primeiro registro (a linha 1 é o cabeçalho)
+FIRST_DATA_ROW = 2
+
+
+def _header_key(column) -> str:
+    # Cabeçalhos comparados sem acentos, caixa e espaços extras
+    return ' '.join(normalize_text(str(column)).lower().split())
+
+
+HEADER_ALIASES = {
+    _header_key(alias): column
+    for column, aliases in {
+        'name': ['Nome do Produto', 'Produto', 'Nome', 'name'],
+        'price': ['Preço de Venda (R$)', 'Preço de Venda', 'Preço', 'price'],
+        'cost': ['Custo Variável (R$)', 'Custo Variável', 'Custo', 'cost'],
+        'quantity': ['Quantidade Vendida (mês)', 'Quantidade Vendida', 'Quantidade', 'quantity']
+    }.items()
+    for alias in aliases
+}
+
+
+@dataclass
+class ProductLoadResult:
+    """Resultado da carga: produtos válidos e erros por linha"""
+    products: pd.DataFrame
+    errors: pd.DataFrame
+    total_rows: int = 0
+    missing_columns: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing_columns
+
+
+def map_columns(frame: pd.DataFrame) -> Dict:
+    """
+    Associa os cabeçalhos da planilha às colunas do analisador
+
+    Returns:
+        Dicionário {cabeçalho da planilha: coluna do analisador}
+    """
+    mapping = {}
+    for column in frame.columns:
+        target = HEADER_ALIASES.get(_header_key(column))
+        if target is not None and target not in mapping.values():
+            mapping[column] = target
+    return mapping
+
+
+def _parse_numbers(values: pd.Series) -> pd.Series:
+    # Colunas já numéricas passam direto; texto aceita "R$ 1.234,56", "4,50" e "4.50"
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        return values.astype(float)
+    text = values.astype(str).str.replace('R$', '', regex=False).str.replace(' ', '', regex=False)
+    # O último separador é o decimal: "1.234,56" (vírgula) ou "1,234.56" (ponto)
+    decimal_comma = text.str.rfind(',') > text.str.rfind('.')
+    text = text.where(
+        decimal_comma,
+        text.str.replace(',', '', regex=False)
+    ).where(
+        ~decimal_comma,
+        text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    )
+    return pd.to_numeric(text, errors='coerce')
+
+
+def coerce_products(frame: pd.DataFrame, first_row: int = FIRST_DATA_ROW):
+    """
+    Converte e valida um bloco da planilha (colunas já mapeadas)
+
+    Args:
+        frame: DataFrame com as colunas name, price, cost e quantity
+        first_row: Número da linha da planilha do primeiro registro do bloco
+
+    Returns:
+        Tupla (produtos válidos, erros por linha)
+    """
+    rows = np.arange(first_row, first_row + len(frame))
+    raw_names = frame['name']
+    names = raw_names.astype(str).str.strip()
+    checks = [('name', raw_names, raw_names.isna() | (names == ''), 'Nome do produto vazio')]
+
+    products = {'name': names.to_numpy(dtype=object)}
+    valid = ~checks[0][2].to_numpy()
+    for column in ('price', 'cost', 'quantity'):
+        raw = frame[column]
+        numbers = _parse_numbers(raw)
+        missing = raw.isna()
+        checks.append((column, raw, missing, 'Valor ausente'))
+        checks.append((column, raw, ~np.isfinite(numbers) & ~missing, 'Valor não numérico'))
+        checks.append((column, raw, numbers < 0, 'Valor negativo'))
+        products[column] = numbers.to_numpy(dtype=float)
+
+    errors = []
+    for column, raw, mask, message in checks:
+        mask = mask.to_numpy(dtype=bool)
+        if mask.any():
+            valid &= ~mask
+            errors.append(pd.DataFrame({
+                'row': rows[mask], 'column': column, 'value': raw.to_numpy(dtype=object)[mask], 'message': message
+            }))
+
+    products = pd.DataFrame({column: values[valid] for column, values in products.items()})
+    # Quantidades fracionárias são truncadas, como em int()
+    products['quantity'] = np.trunc(products['quantity'].to_numpy()).astype(np.int64)
+    errors = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=ERROR_COLUMNS)
+    return products, errors
+
+
+def _csv_options(source) -> Dict:
+    # Planilhas exportadas em português costumam usar ";" como separador e "," como decimal
+    if hasattr(source, 'read'):
+        position = source.tell()
+        first_line = source.readline()
+        source.seek(position)
+    else:
+        with open(source, 'rb') as handle:
+            first_line = handle.readline()
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode('utf-8', errors='ignore')
+    if first_line.count(';') > first_line.count(','):
+        return {'sep': ';', 'decimal': ','}
+    return {'sep': ','}
+
+
+def load_products(source: Union[str, io.IOBase], filename: Optional[str] = None,
+                  chunksize: int = CSV_CHUNK_ROWS) -> ProductLoadResult:
+    """
+    Carrega a planilha de produtos
+
+    Linhas inválidas são descartadas e descritas em ``errors`` (linha da
+    planilha, coluna, valor e motivo); as demais seguem para a análise.
+
+    Args:
+        source: Caminho ou arquivo (ex.: upload do Streamlit)
+        filename: Nome do arquivo, usado para identificar CSV/Excel quando source é um objeto
+        chunksize: Linhas lidas por vez nos arquivos CSV
+
+    Returns:
+        ProductLoadResult com os produtos prontos para FinancialAnalyzer
+    """
+    filename = filename or getattr(source, 'name', None) or str(source)
+    if filename.lower().endswith('.csv'):
+        chunks = pd.read_csv(source, chunksize=chunksize, **_csv_options(source))
+    else:
+        chunks = [pd.read_excel(source)]
+
+    products, errors = [], []
+    total_rows = 0
+    for chunk in chunks:
+        mapping = map_columns(chunk)
+        missing = [
+            header for header, column in TEMPLATE_COLUMNS.items() if column not in mapping.values()
+        ]
+        if missing:
+            empty = pd.DataFrame(columns=PRODUCT_COLUMNS)
+            return ProductLoadResult(empty, pd.DataFrame(columns=ERROR_COLUMNS), total_rows, missing)
+        chunk_products, chunk_errors = coerce_products(
+            chunk.rename(columns=mapping)[PRODUCT_COLUMNS], FIRST_DATA_ROW + total_rows
+        )
+        products.append(chunk_products)
+        errors.append(chunk_errors)
+        total_rows += len(chunk)
+
+    if not products:
+        return ProductLoadResult(pd.DataFrame(columns=PRODUCT_COLUMNS), pd.DataFrame(columns=ERROR_COLUMNS))
+    return ProductLoadResult(
+        pd.concat(products, ignore_index=True),
+        pd.concat(errors, ignore_index=True).sort_values('row', kind='stable', ignore_index=True),
+        total_rows
+    )
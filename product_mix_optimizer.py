@@ -0,0 +1,127 @@
+"""
+Módulo de otimização do mix de produtos
+Resolve, por programação linear, as quantidades de cada produto que maximizam
+a margem de contribuição total, respeitando limites de demanda, quantidades
+mínimas e restrições de capacidade compartilhadas (minutos de barista,
+espaço no forno etc.).
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix
+from typing import Dict, Optional, Union
+
+from financial_analysis import FinancialAnalyzer
+
+PerProduct = Union[Dict[str, float], np.ndarray, list]
+
+LINPROG_STATUS = {0: 'optimal', 1: 'iteration_limit', 2: 'infeasible', 3: 'unbounded', 4: 'numerical_error'}
+
+
+class ProductMixOptimizer:
+    """Otimizador do mix de produtos baseado nas margens de um FinancialAnalyzer"""
+
+    def __init__(self, analyzer: FinancialAnalyzer):
+        """
+        Inicializa o otimizador
+
+        Args:
+            analyzer: Analisador com os produtos, margens e custos fixos
+        """
+        self.analyzer = analyzer
+        arrays = analyzer.arrays
+        self.names = arrays['name'].copy()
+        self.contribution_margin = arrays['contribution_margin'].copy()
+        self.current_quantity = arrays['quantity'].copy()
+
+    def _per_product(self, values: Optional[PerProduct], default: float) -> np.ndarray:
+        # Aceita {nome: valor} (produtos ausentes recebem o padrão) ou um vetor alinhado com os produtos
+        if values is None:
+            return np.full(len(self.names), default)
+        if isinstance(values, dict):
+            return pd.Series(self.names).map(values).fillna(default).to_numpy(dtype=float)
+        values = np.asarray(values, dtype=float)
+        if values.shape != self.names.shape:
+            raise ValueError('Informe um valor por produto ou um dicionário {nome: valor}')
+        return values
+
+    def optimize(self, max_quantity: Optional[PerProduct] = None, min_quantity: Optional[PerProduct] = None,
+                 capacity_constraints: Optional[Dict[str, Dict]] = None, integer: bool = False) -> Dict:
+        """
+        Calcula o mix de produtos que maximiza a margem de contribuição
+
+        Args:
+            max_quantity: Limite de demanda de cada produto (None = sem limite)
+            min_quantity: Quantidade mínima de cada produto (padrão 0)
+            capacity_constraints: Restrições de capacidade no formato
+                {nome: {'usage': {produto: consumo por unidade}, 'capacity': total disponível}}
+            integer: Se True, exige quantidades inteiras (problema inteiro misto)
+
+        Returns:
+            Dicionário com status, tempo de solução, margem e lucro ótimos, o mix
+            ótimo por produto e o uso de cada restrição
+        """
+        if len(self.names) == 0:
+            return {}
+
+        upper = self._per_product(max_quantity, np.inf)
+        lower = self._per_product(min_quantity, 0.0)
+        capacity_constraints = capacity_constraints or {}
+        constraint_names = list(capacity_constraints)
+        usage = csr_matrix(np.vstack([
+            self._per_product(capacity_constraints[name]['usage'], 0.0) for name in constraint_names
+        ])) if constraint_names else None
+        capacity = np.array([float(capacity_constraints[name]['capacity']) for name in constraint_names])
+
+        start = time.perf_counter()
+        result = linprog(
+            -self.contribution_margin,
+            A_ub=usage, b_ub=capacity if constraint_names else None,
+            bounds=np.column_stack([lower, upper]),
+            method='highs',
+            integrality=np.ones(len(self.names)) if integer else None
+        )
+        solve_time = time.perf_counter() - start
+
+        status = LINPROG_STATUS.get(result.status, 'error')
+        current_contribution = float(self.contribution_margin @ self.current_quantity)
+        optimization = {
+            'status': status,
+            'message': result.message,
+            'solve_time': solve_time,
+            'current_contribution': current_contribution,
+            'current_net_profit': current_contribution - self.analyzer.fixed_costs
+        }
+        if status != 'optimal':
+            return optimization
+
+        quantity = result.x
+        total_contribution = float(self.contribution_margin @ quantity)
+        optimization.update({
+            'total_contribution': total_contribution,
+            'net_profit': total_contribution - self.analyzer.fixed_costs,
+            'contribution_gain': total_contribution - current_contribution,
+            'products': pd.DataFrame({
+                'name': self.names,
+                'current_quantity': self.current_quantity,
+                'optimal_quantity': quantity,
+                'quantity_change': quantity - self.current_quantity,
+                'contribution_margin': self.contribution_margin,
+                'total_contribution': self.contribution_margin * quantity
+            })
+        })
+        if constraint_names:
+            used = usage @ quantity
+            # Preço sombra: margem adicional por unidade extra de capacidade (não disponível no caso inteiro)
+            # (o HiGHS devolve marginais zerados no problema inteiro, que não são preços sombra)
+            marginals = None if integer else getattr(getattr(result, 'ineqlin', None), 'marginals', None)
+            optimization['constraints'] = pd.DataFrame({
+                'name': constraint_names,
+                'capacity': capacity,
+                'used': used,
+                'slack': capacity - used,
+                'shadow_price': -marginals if marginals is not None else np.nan
+            })
+        return optimization
@@ -0,0 +1,299 @@
+"""
+Módulo de geração de relatórios
+Escreve os relatórios de análise financeira e de fluxo de caixa diretamente em
+um arquivo (ou objeto file-like), em blocos, com as linhas formatadas de forma
+vetorizada em vez de iterrows e concatenação de strings. As mesmas seções
+podem ser exportadas em CSV (um arquivo por seção, compactados em .zip) ou XLSX
+(uma planilha por seção).
+"""
+
+import io
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, TextIO
+
+from instrumentation import stage
+
+SEPARATOR = '=' * 60
+CHUNK_ROWS = 10_000
+# Relatórios maiores que isso vão para um arquivo temporário em disco em vez da memória
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+# Os auxiliares devolvem o mesmo dtype de astype(str), para que a concatenação com
+# outras colunas funcione também em séries vazias (no pandas 3, str + object falha)
+def _money(values) -> pd.Series:
+    # Formatação vetorizada com duas casas decimais (equivale a f'{valor:.2f}')
+    values = pd.Series(values, dtype=float)
+    return pd.Series(np.char.mod('%.2f', values.to_numpy()), index=values.index, dtype=str)
+
+
+def _percent(values) -> pd.Series:
+    values = pd.Series(values, dtype=float)
+    return pd.Series(np.char.mod('%.1f', values.to_numpy()), index=values.index, dtype=str)
+
+
+def _dates(values) -> pd.Series:
+    # Extratos têm poucas datas distintas: formata cada data uma vez e replica pelos códigos
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    formatted = np.asarray(pd.DatetimeIndex(uniques).strftime('%d/%m/%Y'), dtype=object)
+    return pd.Series(formatted[codes], index=values.index, dtype=str)
+
+
+def _write_lines(out: TextIO, lines: pd.Series):
+    if len(lines) > 0:
+        out.write('\n'.join(lines.tolist()))
+        out.write('\n')
+
+
+def write_financial_report(out: TextIO, analyzer, cvp_analysis: Dict, contribution_analysis: pd.DataFrame,
+                           chunk_rows: int = CHUNK_ROWS):
+    """
+    Escreve o relatório de análise financeira em ``out``
+
+    Args:
+        out: Arquivo de texto (ou io.StringIO) de destino
+        analyzer: FinancialAnalyzer com os produtos
+        cvp_analysis: Resultado de get_cost_volume_profit_analysis
+        contribution_analysis: Resultado de get_contribution_margin_analysis
+        chunk_rows: Produtos formatados e escritos por vez
+    """
+    out.write(f"""
+RELATÓRIO DE ANÁLISE FINANCEIRA - CAFETERIA
+Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}
+{SEPARATOR}
+
+RESUMO EXECUTIVO
+{SEPARATOR}
+• Receita Total: R$ {cvp_analysis['total_revenue']:,.2f}
+• Margem de Contribuição Total: R$ {cvp_analysis['total_contribution']:,.2f}
+• Custos Fixos: R$ {cvp_analysis['fixed_costs']:,.2f}
+• Lucro Líquido: R$ {cvp_analysis['net_profit']:,.2f}
+• Margem de Contribuição (%): {cvp_analysis['contribution_margin_ratio']:.1f}%
+
+ANÁLISE POR PRODUTO
+{SEPARATOR}
+""")
+
+    for start in range(0, len(contribution_analysis), chunk_rows):
+        products = contribution_analysis.iloc[start:start + chunk_rows]
+        blocks = (
+            '\n' + products['name'].astype(str) + ':\n'
+            + '  - Preço: R$ ' + _money(products['price']) + '\n'
+            + '  - Custo Variável: R$ ' + _money(products['cost']) + '\n'
+            + '  - Margem de Contribuição: R$ ' + _money(products['contribution_margin'])
+            + ' (' + _percent(products['contribution_margin_percent']) + '%)\n'
+            + '  - Quantidade Vendida: ' + products['quantity'].astype(str) + ' unidades\n'
+            + '  - Contribuição Total: R$ ' + _money(products['total_contribution']) + '\n'
+            + '  - Participação na Receita: ' + _percent(products['revenue_participation']) + '%\n'
+            + '  - Participação na Contribuição: ' + _percent(products['contribution_participation']) + '%'
+        )
+        _write_lines(out, blocks)
+
+    out.write(f"""
+
+ANÁLISE CUSTO-VOLUME-LUCRO
+{SEPARATOR}
+• Ponto de Equilíbrio (unidades): {cvp_analysis['breakeven_units']:,.0f}
+• Ponto de Equilíbrio (receita): R$ {cvp_analysis['breakeven_revenue']:,.2f}
+• Margem de Segurança (unidades): {cvp_analysis['safety_margin_units']:,.0f}
+• Margem de Segurança (%): {cvp_analysis['safety_margin_percent']:.1f}%
+• Alavancagem Operacional: {cvp_analysis['operating_leverage']:.2f}
+• Razão Margem de Contribuição: {cvp_analysis['contribution_margin_ratio']:.1f}%
+
+RECOMENDAÇÕES ESTRATÉGICAS
+{SEPARATOR}
+""")
+
+    optimization = analyzer.analyze_product_mix_optimization()
+
+    out.write("\nPRODUTOS COM MAIOR MARGEM:\n")
+    for product in optimization['high_margin_products']:
+        out.write(f"• {product['name']}: {product['contribution_margin_percent']:.1f}% de margem\n")
+
+    out.write("\nPRODUTOS COM MENOR MARGEM:\n")
+    for product in optimization['low_margin_products']:
+        out.write(f"• {product['name']}: {product['contribution_margin_percent']:.1f}% de margem\n")
+
+    out.write("\nMAIORES CONTRIBUIDORES:\n")
+    for product in optimization['high_contribution_products']:
+        out.write(f"• {product['name']}: R$ {product['total_contribution']:.2f}\n")
+
+    out.write(f"""
+
+CONCLUSÕES E PRÓXIMOS PASSOS
+{SEPARATOR}
+1. Foque nos produtos de maior margem para aumentar lucratividade
+2. Revise preços ou custos dos produtos de menor margem
+3. Considere criar combos estratégicos
+4. Monitore regularmente o ponto de equilíbrio
+5. Analise oportunidades de aumento de volume nos produtos mais lucrativos
+
+Relatório gerado automaticamente pelo Sistema de Análise de Precificação e Lucratividade
+""")
+
+
+def write_cash_flow_report(out: TextIO, analyzer, chunk_rows: int = CHUNK_ROWS):
+    """
+    Escreve o relatório de fluxo de caixa em ``out``
+
+    As transações individuais são formatadas e escritas em blocos de
+    ``chunk_rows`` linhas, de modo que o texto completo nunca fica na memória.
+
+    Args:
+        out: Arquivo de texto (ou io.StringIO) de destino
+        analyzer: CashFlowAnalyzer com as transações
+        chunk_rows: Transações formatadas e escritas por vez
+    """
+    out.write(f"""
+RELATÓRIO DE ANÁLISE DE FLUXO DE CAIXA
+Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}
+{SEPARATOR}
+
+RESUMO MENSAL
+{SEPARATOR}
+""")
+    monthly_summary = analyzer.get_monthly_summary()
+    if len(monthly_summary) > 0:
+        _write_lines(out, (
+            'Mês/Ano: ' + monthly_summary['Month'].astype(int).astype(str) + '/'
+            + monthly_summary['Year'].astype(int).astype(str) + '\n'
+            + '  - Entradas: R$ ' + _money(monthly_summary['Total Inflow']) + '\n'
+            + '  - Saídas: R$ ' + _money(monthly_summary['Total Outflow']) + '\n'
+            + '  - Saldo: R$ ' + _money(monthly_summary['Net Flow']) + '\n'
+        ))
+
+    for heading, transaction_type in (("\nDETALHAMENTO DE ENTRADAS POR CATEGORIA", "Inflow"),
+                                      ("\n\nDETALHAMENTO DE SAÍDAS POR CATEGORIA", "Outflow")):
+        out.write(f"{heading}\n{SEPARATOR}\n")
+        categories = analyzer.get_category_summary(transaction_type)
+        if len(categories) > 0:
+            _write_lines(out, '- ' + categories['Category'].astype(str) + ': R$ ' + _money(categories['Total Amount']))
+
+    out.write(f"\n\nTRANSAÇÕES INDIVIDUAIS\n{SEPARATOR}\n")
+    transactions = analyzer.get_all_transactions()
+    for start in range(0, len(transactions), chunk_rows):
+        chunk = transactions.iloc[start:start + chunk_rows]
+        _write_lines(out, (
+            _dates(chunk['Date'])
+            + ' - ' + chunk['Description'].astype(str)
+            + ' - R$ ' + _money(chunk['Amount'])
+            + ' (' + chunk['Category'].astype(str) + ')'
+        ))
+
+
+def financial_report_tables(analyzer, cvp_analysis: Dict, contribution_analysis: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Seções do relatório financeiro como tabelas, para exportação em CSV/XLSX
+
+    Returns:
+        Dicionário {nome da seção: DataFrame}
+    """
+    optimization = analyzer.analyze_product_mix_optimization()
+    recommendations = pd.DataFrame([
+        {'group': group, **product}
+        for group in ('high_margin_products', 'low_margin_products', 'high_contribution_products')
+        for product in optimization.get(group, [])
+    ])
+    product_columns = ['name', 'price', 'cost', 'contribution_margin', 'contribution_margin_percent', 'quantity',
+                       'total_contribution', 'revenue_participation', 'contribution_participation']
+    return {
+        'resumo_cvp': pd.DataFrame({'metric': list(cvp_analysis), 'value': list(cvp_analysis.values())}),
+        'produtos': contribution_analysis[product_columns] if len(contribution_analysis) > 0 else pd.DataFrame(),
+        'recomendacoes': recommendations
+    }
+
+
+def cash_flow_report_tables(analyzer) -> Dict[str, pd.DataFrame]:
+    """
+    Seções do relatório de fluxo de caixa como tabelas, para exportação em CSV/XLSX
+
+    Returns:
+        Dicionário {nome da seção: DataFrame}
+    """
+    return {
+        'resumo_mensal': analyzer.get_monthly_summary(),
+        'entradas_por_categoria': analyzer.get_category_summary("Inflow"),
+        'saidas_por_categoria': analyzer.get_category_summary("Outflow"),
+        'transacoes': analyzer.get_all_transactions()
+    }
+
+
+def write_tables_csv(out: BinaryIO, tables: Dict[str, pd.DataFrame]):
+    """
+    Exporta as seções como CSVs (UTF-8) dentro de um arquivo .zip
+
+    Args:
+        out: Arquivo binário de destino
+        tables: Dicionário {nome da seção: DataFrame}
+    """
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, table in tables.items():
+            with archive.open(f'{name}.csv', 'w') as member, \
+                    io.TextIOWrapper(member, encoding='utf-8', newline='') as text:
+                table.to_csv(text, index=False, chunksize=CHUNK_ROWS)
+
+
+def write_tables_xlsx(out: BinaryIO, tables: Dict[str, pd.DataFrame]):
+    """
+    Exporta as seções como planilhas de um arquivo XLSX (requer openpyxl)
+
+    Args:
+        out: Arquivo binário de destino
+        tables: Dicionário {nome da seção: DataFrame}
+    """
+    with pd.ExcelWriter(out, engine='openpyxl') as writer:
+        for name, table in tables.items():
+            # O Excel limita o nome das planilhas a 31 caracteres
+            table.to_excel(writer, sheet_name=name[:31], index=False)
+
+
+def json_safe(value):
+    """
+    Converte um resultado em valores aceitos por JSON estrito
+
+    Floats não finitos (ex.: alavancagem operacional infinita com lucro zero)
+    viram None, escritos como null em vez de Infinity/NaN; escalares NumPy
+    viram tipos nativos. Dicionários, listas e tuplas são percorridos.
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def report_file(writer: Callable, *args, binary: bool = False, **kwargs) -> BinaryIO:
+    """
+    Gera um relatório em um arquivo temporário e o devolve pronto para leitura
+
+    O arquivo fica na memória até SPOOL_MAX_BYTES e passa para o disco acima
+    disso; pode ser passado diretamente ao st.download_button.
+
+    Args:
+        writer: Função de escrita (write_financial_report, write_tables_csv etc.)
+        *args: Argumentos da função de escrita, após o arquivo de destino
+        binary: True para escritores que produzem bytes (CSV compactado, XLSX)
+        **kwargs: Argumentos nomeados da função de escrita
+
+    Returns:
+        Arquivo binário posicionado no início
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with stage(f'reports.{writer.__name__}'):
+        if binary:
+            writer(spooled, *args, **kwargs)
+        else:
+            text = io.TextIOWrapper(spooled, encoding='utf-8', newline='')
+            writer(text, *args, **kwargs)
+            text.flush()
+            text.detach()
+    spooled.seek(0)
+    return spooled
@@ -0,0 +1,169 @@
+"""
+Módulo de análise de risco por simulação de Monte Carlo
+Sorteia preços, custos e quantidades de cada produto e os custos fixos, e
+calcula lucro líquido, ponto de equilíbrio, margem de segurança e alavancagem
+operacional de milhões de cenários com NumPy, processados em blocos de
+memória limitada.
+"""
+
+import time
+import numpy as np
+from typing import Dict, Sequence, Union
+
+from financial_analysis import FinancialAnalyzer
+
+Volatility = Union[float, Sequence[float], np.ndarray]
+# Cenários sorteados por um mesmo gerador: os blocos de memória são múltiplos deste tamanho
+SEED_BLOCK_SCENARIOS = 4_096
+
+
+class MonteCarloRiskAnalyzer:
+    """Simulação de Monte Carlo sobre os produtos de um FinancialAnalyzer"""
+
+    METRICS = ['net_profit', 'breakeven_units', 'safety_margin_percent', 'operating_leverage']
+
+    def __init__(self, analyzer: FinancialAnalyzer, price_volatility: Volatility = 0.0,
+                 cost_volatility: Volatility = 0.1, quantity_volatility: Volatility = 0.2,
+                 fixed_cost_volatility: float = 0.05):
+        """
+        Inicializa o simulador
+
+        As volatilidades são desvios-padrão relativos (0.1 = 10% do valor atual),
+        informados como um único número ou um valor por produto. Os valores
+        sorteados seguem distribuições normais truncadas em zero.
+
+        Args:
+            analyzer: Analisador com os produtos, custos fixos e alíquota base
+            price_volatility: Volatilidade dos preços de venda
+            cost_volatility: Volatilidade dos custos variáveis (ex.: café, leite)
+            quantity_volatility: Volatilidade da demanda
+            fixed_cost_volatility: Volatilidade dos custos fixos totais
+        """
+        arrays = analyzer.arrays
+        self.names = arrays['name'].tolist()
+        self.price = arrays['price'].copy()
+        self.cost = arrays['cost'].copy()
+        self.quantity = arrays['quantity'].copy()
+        self.fixed_costs = float(analyzer.fixed_costs)
+        self.tax_rate = float(analyzer.tax_rate)
+        self.price_volatility = self._per_product(price_volatility)
+        self.cost_volatility = self._per_product(cost_volatility)
+        self.quantity_volatility = self._per_product(quantity_volatility)
+        self.fixed_cost_volatility = float(fixed_cost_volatility)
+
+    def _per_product(self, volatility: Volatility) -> np.ndarray:
+        volatility = np.asarray(volatility, dtype=float)
+        if volatility.ndim == 0:
+            return np.full(len(self.price), float(volatility))
+        if volatility.shape != self.price.shape:
+            raise ValueError('Informe uma volatilidade por produto ou um único valor')
+        return volatility
+
+    @staticmethod
+    def _standard_normal(rngs, block_rows, columns: int = None) -> np.ndarray:
+        # Cada bloco de cenários é sorteado pelo seu próprio gerador, direto na matriz de saída
+        samples = np.empty((sum(block_rows), columns) if columns is not None else sum(block_rows))
+        offset = 0
+        for rng, rows in zip(rngs, block_rows):
+            rng.standard_normal(out=samples[offset:offset + rows])
+            offset += rows
+        return samples
+
+    def _sample(self, rngs, block_rows, base: np.ndarray, volatility: np.ndarray) -> np.ndarray:
+        samples = self._standard_normal(rngs, block_rows, len(base))
+        samples *= volatility
+        samples += 1.0
+        samples *= base
+        return np.maximum(samples, 0.0, out=samples)
+
+    def _simulate_chunk(self, rngs, block_rows) -> Dict[str, np.ndarray]:
+        price = self._sample(rngs, block_rows, self.price, self.price_volatility)
+        cost = self._sample(rngs, block_rows, self.cost, self.cost_volatility)
+        quantity = self._sample(rngs, block_rows, self.quantity, self.quantity_volatility)
+        fixed_costs = np.maximum(
+            self.fixed_costs * (1.0 + self.fixed_cost_volatility * self._standard_normal(rngs, block_rows)), 0.0
+        )
+
+        total_revenue = np.einsum('ij,ij->i', price, quantity)
+        total_cost = np.einsum('ij,ij->i', cost, quantity)
+        total_quantity = quantity.sum(axis=1)
+        total_contribution = total_revenue * (1 - self.tax_rate / 100) - total_cost
+        net_profit = total_contribution - fixed_costs
+
+        # Mesmas convenções de FinancialAnalyzer.calculate_breakeven_analysis e calculate_operating_leverage
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted_avg_contribution_margin = np.where(total_quantity > 0, total_contribution / total_quantity, 0.0)
+            breakeven_units = np.where(
+                weighted_avg_contribution_margin > 0, fixed_costs / weighted_avg_contribution_margin, 0.0
+            )
+            safety_margin_percent = np.where(
+                total_quantity > 0, (total_quantity - breakeven_units) / total_quantity * 100, 0.0
+            )
+            operating_leverage = np.where(net_profit != 0, total_contribution / net_profit, np.inf)
+
+        return {
+            'net_profit': net_profit,
+            'breakeven_units': breakeven_units,
+            'safety_margin_percent': safety_margin_percent,
+            'operating_leverage': operating_leverage
+        }
+
+    def run(self, n_scenarios: int = 1_000_000, seed: int = None, max_chunk_elements: int = 1_000_000,
+            percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict:
+        """
+        Executa a simulação
+
+        Os cenários são gerados em blocos de no máximo ``max_chunk_elements``
+        valores por matriz (cenários x produtos), o que limita o pico de memória
+        independentemente do número de cenários. Cada bloco fixo de
+        SEED_BLOCK_SCENARIOS cenários tem seu próprio gerador, derivado da
+        semente por SeedSequence.spawn: a mesma semente com os mesmos parâmetros
+        reproduz exatamente os mesmos resultados, qualquer que seja
+        ``max_chunk_elements``.
+
+        Args:
+            n_scenarios: Número de cenários simulados
+            seed: Semente do gerador aleatório
+            max_chunk_elements: Tamanho máximo de cada bloco de cenários x produtos
+                (nunca menor que SEED_BLOCK_SCENARIOS cenários; não altera os resultados)
+            percentiles: Percentis reportados para cada métrica
+
+        Returns:
+            Dicionário com percentis de cada métrica, probabilidade de prejuízo e
+            desempenho da simulação (cenários por segundo)
+        """
+        if len(self.price) == 0 or n_scenarios <= 0:
+            return {}
+
+        start = time.perf_counter()
+        n_blocks = -(-n_scenarios // SEED_BLOCK_SCENARIOS)
+        rngs = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(n_blocks)]
+        # O bloco de memória agrupa blocos inteiros de sementes (no mínimo um)
+        blocks_per_chunk = max(1, max_chunk_elements // len(self.price) // SEED_BLOCK_SCENARIOS)
+        results = {metric: np.empty(n_scenarios) for metric in self.METRICS}
+
+        for first_block in range(0, n_blocks, blocks_per_chunk):
+            chunk_start = first_block * SEED_BLOCK_SCENARIOS
+            chunk_end = min(n_scenarios, (first_block + blocks_per_chunk) * SEED_BLOCK_SCENARIOS)
+            block_rows = [min(SEED_BLOCK_SCENARIOS, chunk_end - block_start)
+                          for block_start in range(chunk_start, chunk_end, SEED_BLOCK_SCENARIOS)]
+            chunk = self._simulate_chunk(rngs[first_block:first_block + len(block_rows)], block_rows)
+            for metric in self.METRICS:
+                results[metric][chunk_start:chunk_end] = chunk[metric]
+
+        net_profit = results['net_profit']
+        summary = {
+            'scenarios': n_scenarios,
+            'seed': seed,
+            'probability_of_loss': float(np.mean(net_profit < 0)),
+            'expected_net_profit': float(net_profit.mean()),
+            'net_profit_std': float(net_profit.std())
+        }
+        for metric in self.METRICS:
+            values = np.percentile(results[metric], percentiles)
+            summary[metric] = {f'p{percentile:g}': float(value) for percentile, value in zip(percentiles, values)}
+
+        elapsed = time.perf_counter() - start
+        summary['elapsed_seconds'] = elapsed
+        summary['scenarios_per_second'] = n_scenarios / elapsed if elapsed > 0 else 0.0
+        return summary
@@ -0,0 +1,148 @@
+"""
+Cache de extratos já processados.
+Indexa o resultado do parsing pelo SHA-256 dos bytes do PDF, com uma camada em
+memória (LRU por número de entradas) e uma camada opcional em disco (LRU por
+tamanho total), para que reexecuções do Streamlit não reprocessem o mesmo
+arquivo.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class StatementCache:
+    """Cache LRU de resultados de parsing de extratos, indexado pelo conteúdo do PDF"""
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Inicializa o cache
+
+        Args:
+            max_entries: Número máximo de extratos mantidos em memória
+            cache_dir: Diretório da camada em disco (None desativa a camada)
+            max_disk_bytes: Tamanho máximo ocupado pela camada em disco
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._evict_disk()
+
+    @staticmethod
+    def key_for(data) -> str:
+        """SHA-256 dos bytes do PDF"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retorna o resultado em cache ou None, atualizando os contadores"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+            value = self._read_disk(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: Dict):
+        """Guarda o resultado do parsing nas camadas em memória e em disco"""
+        with self._lock:
+            self._remember(key, value)
+            self._write_disk(key, value)
+
+    def _remember(self, key: str, value: Dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            # Atualiza a data de modificação, usada como ordem de uso na evicção
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return value
+
+    def _write_disk(self, key: str, value: Dict):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Erro ao gravar cache de extrato: {e}")
+            return
+        self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        return sorted(entries)
+
+    def _evict_disk(self):
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+
+    def stats(self) -> Dict:
+        """Contadores de acertos/faltas e ocupação das camadas"""
+        with self._lock:
+            requests = self.hits + self.misses
+            disk_entries = self._disk_entries() if self.cache_dir else []
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(disk_entries),
+                'disk_bytes': sum(size for _, size, _ in disk_entries)
+            }
+
+    def clear(self):
+        """Esvazia as duas camadas e zera os contadores"""
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir:
+                for _, _, name in self._disk_entries():
+                    os.remove(os.path.join(self.cache_dir, name))
+            self.hits = self.misses = self.disk_hits = 0
@@ -0,0 +1,110 @@
+"""
+Motor de categorização de transações do fluxo de caixa.
+Compila as palavras-chave de cada tipo de fluxo em uma única expressão regular
+e categoriza Series inteiras de descrições, avaliando cada descrição
+normalizada distinta uma única vez.
+"""
+
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+FLOW_KEYS = {"Inflow": "inflow", "Outflow": "outflow"}
+DEFAULT_CATEGORIES = {"Inflow": "Outra Entrada", "Outflow": "Outra Saída"}
+
+
+def normalize_text(text: str) -> str:
+    """Remove acentos e converte para minúsculas ("SALÁRIO" -> "salario")"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def categories_signature(categories: Dict[str, Dict[str, List[str]]]) -> tuple:
+    """Retorna uma assinatura imutável das categorias, usada para detectar alterações"""
+    return tuple(
+        (flow, tuple((category, tuple(keywords)) for category, keywords in flow_categories.items()))
+        for flow, flow_categories in categories.items()
+    )
+
+
+class TransactionCategorizer:
+    """Categorizador compilado a partir do dicionário de categorias do CashFlowAnalyzer"""
+
+    def __init__(self, categories: Dict[str, Dict[str, List[str]]]):
+        """
+        Compila as regras de categorização
+
+        Args:
+            categories: Dicionário {"inflow"|"outflow": {categoria: [palavras-chave]}}
+        """
+        self.signature = categories_signature(categories)
+        self._patterns = {}
+        self._group_categories = {}
+        for transaction_type, flow_key in FLOW_KEYS.items():
+            self._patterns[transaction_type], self._group_categories[transaction_type] = (
+                self._compile(categories.get(flow_key, {}))
+            )
+
+    @staticmethod
+    def _compile(flow_categories: Dict[str, List[str]]):
+        # Cada categoria vira uma alternativa com lookahead: a regex tenta as
+        # alternativas na ordem do dicionário, preservando a prioridade original
+        # (a primeira categoria com alguma palavra-chave presente vence).
+        alternatives = []
+        group_categories = {}
+        for index, (category, keywords) in enumerate(flow_categories.items()):
+            normalized = sorted({normalize_text(keyword) for keyword in keywords if keyword}, key=len, reverse=True)
+            if not normalized:
+                continue
+            group = f"c{index}"
+            group_categories[group] = category
+            alternatives.append(f"(?=.*?(?:{'|'.join(map(re.escape, normalized))}))(?P<{group}>)")
+        if not alternatives:
+            return None, group_categories
+        return re.compile("|".join(alternatives), re.DOTALL), group_categories
+
+    def categorize(self, description: str, transaction_type: str) -> str:
+        """Categoriza uma única descrição"""
+        return self._match(normalize_text(description), transaction_type)
+
+    def _match(self, normalized_description: str, transaction_type: str) -> str:
+        # Como no código original, qualquer tipo diferente de "Inflow" é tratado como saída
+        flow = "Inflow" if transaction_type == "Inflow" else "Outflow"
+        pattern = self._patterns[flow]
+        match = pattern.match(normalized_description) if pattern is not None else None
+        if match is None:
+            return DEFAULT_CATEGORIES[flow]
+        return self._group_categories[flow][match.lastgroup]
+
+    def categorize_series(self, descriptions: pd.Series, transaction_types: pd.Series) -> pd.Series:
+        """
+        Categoriza todas as descrições de uma vez
+
+        Args:
+            descriptions: Series com as descrições das transações
+            transaction_types: Series alinhada com "Inflow"/"Outflow"
+
+        Returns:
+            Series de categorias com o mesmo índice de ``descriptions``
+        """
+        descriptions = pd.Series(descriptions).astype(str)
+        result = np.empty(len(descriptions), dtype=object)
+        is_inflow = np.asarray(transaction_types, dtype=object) == "Inflow"
+
+        for transaction_type, mask in (("Inflow", is_inflow), ("Outflow", ~is_inflow)):
+            if not mask.any():
+                continue
+            # Descrições brutas distintas -> normalizadas distintas -> uma regex por valor
+            raw_codes, raw_uniques = pd.factorize(descriptions.to_numpy()[mask])
+            normalized = [normalize_text(description) for description in raw_uniques]
+            normalized_codes, normalized_uniques = pd.factorize(np.asarray(normalized, dtype=object))
+            unique_categories = np.array(
+                [self._match(description, transaction_type) for description in normalized_uniques], dtype=object
+            )
+            result[mask] = unique_categories[normalized_codes][raw_codes]
+
+        return pd.Series(result, index=descriptions.index, name="Category")
@@ -0,0 +1,222 @@
+"""
+Armazenamento persistente de transações do fluxo de caixa.
+Guarda as transações em um banco SQLite local, identificadas por um hash do
+conteúdo (data, descrição, valor e conta), de forma que reenviar extratos com
+períodos sobrepostos não duplica lançamentos. Os resumos mensais, por
+categoria e por dia são calculados por agregações SQL indexadas.
+"""
+
+import hashlib
+import functools
+import sqlite3
+import threading
+import pandas as pd
+
+from transaction_categorizer import normalize_text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    description TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    account TEXT NOT NULL DEFAULT '',
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date, type, amount_cents);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (type, category, amount_cents);
+CREATE INDEX IF NOT EXISTS idx_transactions_day_category ON transactions (date, type, category, amount_cents);
+"""
+
+
+def transaction_hashes(transactions: pd.DataFrame, account: str = "") -> list:
+    """
+    Calcula o hash estável de cada transação
+
+    Lançamentos idênticos dentro do mesmo lote (mesma data, descrição e valor)
+    recebem um número de ocorrência diferente, para que cobranças repetidas
+    legítimas não sejam descartadas, enquanto o mesmo extrato reenviado gera
+    exatamente os mesmos hashes.
+    """
+    dates = transactions["Date"].dt.strftime("%Y-%m-%d")
+    cents = (transactions["Amount"] * 100).round().astype("int64")
+    keys = pd.DataFrame({"date": dates, "description": transactions["Description"], "cents": cents})
+    occurrences = keys.groupby(["date", "description", "cents"], sort=False).cumcount()
+    return [
+        hashlib.sha256(f"{date}|{description}|{amount}|{account}|{occurrence}".encode("utf-8")).hexdigest()
+        for date, description, amount, occurrence in zip(dates, keys["description"], cents, occurrences)
+    ]
+
+
+@functools.lru_cache(maxsize=65536)
+def _search_text(text) -> str:
+    # Extratos repetem muito as descrições: cada uma é normalizada uma única vez
+    return normalize_text(text or "").lower()
+
+
+class TransactionStore:
+    """Banco de transações em arquivo SQLite, sem duplicatas"""
+
+    def __init__(self, db_path: str = "transacoes.db"):
+        """
+        Abre (ou cria) o banco de transações
+
+        Args:
+            db_path: Caminho do arquivo SQLite (":memory:" para um banco temporário)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        # Busca textual sem diferenciar acentos nem caixa, como em CashFlowAnalyzer.query_transactions
+        self._connection.create_function("search_text", 1, _search_text, deterministic=True)
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def add_transactions(self, transactions: pd.DataFrame, account: str = "") -> int:
+        """
+        Insere transações, ignorando as que já existem no banco
+
+        Args:
+            transactions: DataFrame no formato de CashFlowAnalyzer.transactions
+            account: Identificação da conta bancária
+
+        Returns:
+            Número de transações efetivamente inseridas
+        """
+        if transactions.empty:
+            return 0
+
+        sources = transactions["Source"] if "Source" in transactions.columns else [None] * len(transactions)
+        rows = zip(
+            transaction_hashes(transactions, account),
+            transactions["Date"].dt.strftime("%Y-%m-%d"),
+            transactions["Description"],
+            (transactions["Amount"] * 100).round().astype("int64").tolist(),
+            transactions["Type"],
+            transactions["Category"],
+            [account] * len(transactions),
+            sources
+        )
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO transactions "
+                "(id, date, description, amount_cents, type, category, account, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return self._connection.total_changes - before
+
+    def _read_sql(self, query: str, params=()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(query, self._connection, params=params)
+
+    def count(self) -> int:
+        """Número total de transações armazenadas"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def get_transactions(self) -> pd.DataFrame:
+        """Carrega todas as transações, ordenadas por data"""
+        transactions = self._read_sql(
+            "SELECT date AS Date, description AS Description, amount_cents / 100.0 AS Amount, "
+            "type AS Type, category AS Category, source AS Source "
+            "FROM transactions ORDER BY date, rowid"
+        )
+        transactions["Date"] = pd.to_datetime(transactions["Date"], format="%Y-%m-%d")
+        return transactions
+
+    def query_transactions(self, start_date=None, end_date=None, transaction_type: str = None,
+                           categories=None, search: str = None, min_amount: float = None,
+                           max_amount: float = None, limit: int = 100, offset: int = 0):
+        """
+        Consulta paginada (mesmos filtros de CashFlowAnalyzer.query_transactions)
+
+        O intervalo de datas usa o índice por data; só as linhas da página são lidas.
+
+        Returns:
+            Tupla (DataFrame da página, total de transações que atendem aos filtros)
+        """
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+        if transaction_type is not None:
+            conditions.append("type = ?")
+            params.append(transaction_type)
+        if categories is not None:
+            categories = list(categories)
+            conditions.append(f"category IN ({', '.join('?' * len(categories))})" if categories else "0")
+            params.extend(categories)
+        if min_amount is not None:
+            conditions.append("amount_cents >= ?")
+            params.append(int(round(min_amount * 100)))
+        if max_amount is not None:
+            conditions.append("amount_cents <= ?")
+            params.append(int(round(max_amount * 100)))
+        if search:
+            conditions.append("instr(search_text(description), ?) > 0")
+            params.append(normalize_text(search).lower())
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            total = self._connection.execute(f"SELECT COUNT(*) FROM transactions {where}", params).fetchone()[0]
+        rows = self._read_sql(
+            "SELECT date AS Date, description AS Description, amount_cents / 100.0 AS Amount, "
+            "type AS Type, category AS Category, source AS Source "
+            f"FROM transactions {where} ORDER BY date, rowid LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset))
+        )
+        rows["Date"] = pd.to_datetime(rows["Date"], format="%Y-%m-%d")
+        return rows, total
+
+    def monthly_summary(self) -> pd.DataFrame:
+        """Resumo mensal de entradas, saídas e saldo, agregado no SQLite"""
+        return self._read_sql(
+            "SELECT CAST(substr(date, 6, 2) AS INTEGER) AS Month, "
+            "CAST(substr(date, 1, 4) AS INTEGER) AS Year, "
+            "COALESCE(SUM(CASE WHEN type = 'Inflow' THEN amount_cents END), 0) / 100.0 AS \"Total Inflow\", "
+            "COALESCE(SUM(CASE WHEN type = 'Outflow' THEN amount_cents END), 0) / 100.0 AS \"Total Outflow\", "
+            "SUM(amount_cents) / 100.0 AS \"Net Flow\" "
+            "FROM transactions GROUP BY substr(date, 1, 7) ORDER BY substr(date, 1, 7)"
+        )
+
+    def daily_category_totals(self) -> pd.DataFrame:
+        """
+        Total por dia, tipo e categoria, agregado no SQLite
+
+        O resultado tem no máximo uma linha por dia e categoria, muito menor que
+        o histórico: os resumos por período e a linha do tempo do saldo partem
+        dele em vez de carregar todas as transações.
+
+        Returns:
+            DataFrame com Date, Type, Category e Amount, ordenado por data
+        """
+        totals = self._read_sql(
+            "SELECT date AS Date, type AS Type, category AS Category, SUM(amount_cents) / 100.0 AS Amount "
+            "FROM transactions GROUP BY date, type, category ORDER BY date, type, category"
+        )
+        totals["Date"] = pd.to_datetime(totals["Date"], format="%Y-%m-%d")
+        return totals
+
+    def category_summary(self, transaction_type: str) -> pd.DataFrame:
+        """Total por categoria para um tipo de transação ("Inflow" ou "Outflow")"""
+        return self._read_sql(
+            "SELECT category AS Category, SUM(amount_cents) / 100.0 AS \"Total Amount\" "
+            "FROM transactions WHERE type = ? GROUP BY category ORDER BY category",
+            (transaction_type,)
+        )
+
+    def clear(self):
+        """Remove todas as transações do banco"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM transactions")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()